@@ -0,0 +1,86 @@
+"""
+Compares galaxy-wide influence questions answered by InfluenceStore with the same questions answered by looping over
+the faction branches.
+
+Usage: python benchmarks/bench_analytics.py [branches]
+"""
+
+import random
+import sys
+import time
+from collections import defaultdict
+
+from edclasses.analytics import InfluenceStore
+from edclasses.models import SystemModel, FactionModel, FactionBranchModel
+
+BRANCHES_PER_SYSTEM = 6
+
+
+def populate(branches: int):
+    random.seed(0)
+    factions = [FactionModel.create(name=f"Faction {i}") for i in range(branches // 10)]
+    for system_number in range(branches // BRANCHES_PER_SYSTEM):
+        system = SystemModel.create(name=f"System {system_number}")
+        for faction in random.sample(factions, BRANCHES_PER_SYSTEM):
+            FactionBranchModel.create(
+                faction=faction, system=system, influence=random.random()
+            )
+
+
+def conflict_risks_loop(threshold: float):
+    leaders = defaultdict(float)
+    branches = list(FactionBranchModel.registry.values())
+    for branch in branches:
+        leaders[branch.system] = max(leaders[branch.system], branch.influence)
+    return [
+        branch
+        for branch in branches
+        if branch.influence != leaders[branch.system]
+        and leaders[branch.system] - branch.influence <= threshold
+    ]
+
+
+def system_means_loop():
+    totals = defaultdict(float)
+    counts = defaultdict(int)
+    for branch in FactionBranchModel.registry.values():
+        totals[branch.system] += branch.influence
+        counts[branch.system] += 1
+    return {system: totals[system] / counts[system] for system in totals}
+
+
+def measure(name: str, func, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<40} {best * 1000:>10.2f} ms")
+
+
+def main():
+    branches = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    populate(branches)
+    print(f"{len(FactionBranchModel.registry)} faction branches")
+
+    start = time.perf_counter()
+    store = InfluenceStore()
+    print(
+        f"{'attaching the store':<40} {(time.perf_counter() - start) * 1000:>10.2f} ms"
+    )
+
+    measure("conflict risks, loop", lambda: conflict_risks_loop(0.03))
+    measure("conflict risks, store", lambda: store.conflict_risks(0.03))
+    measure("mean per system, loop", system_means_loop)
+    measure("mean per system, store", store.system_aggregates)
+    measure(
+        "top 10, loop",
+        lambda: sorted(
+            FactionBranchModel.registry.values(), key=lambda b: -b.influence
+        )[:10],
+    )
+    measure("top 10, store", lambda: store.top(10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the cost of reading attributes of auto-refreshed objects with refreshed fields implemented as descriptors
+(current) and with the __getattribute__ override used before.
+
+Usage: python benchmarks/bench_attribute_access.py
+"""
+
+import datetime
+import timeit
+
+from edclasses import System
+from edclasses.models import SystemModel
+
+
+class FakeAdapter:
+    def eddb_id(self, obj):
+        return 100
+
+
+class LegacyAutoRefreshMixin:
+    """
+    The previous implementation, kept here for comparison.
+    """
+
+    refreshed_fields = tuple()
+    adapter = None
+    EXPIRATION_TIME_MINUTES = 15
+
+    def _get_new_expiration_registry(self):
+        get_atr = super().__getattribute__
+        expiration_registry = {item: None for item in get_atr("refreshed_fields")}
+        self._expiration_registry = expiration_registry
+        return expiration_registry
+
+    def _is_expired(self, item):
+        get_atr = super().__getattribute__
+        expiration_date = get_atr("_expiration_registry")[item]
+        return expiration_date is None or expiration_date <= datetime.datetime.utcnow()
+
+    def __getattribute__(self, item):
+        get_atr = super().__getattribute__
+        try:
+            expiration_registry = get_atr("_expiration_registry")
+        except AttributeError:
+            expiration_registry = get_atr("_get_new_expiration_registry")()
+
+        if item not in expiration_registry:
+            return get_atr(item)
+
+        if get_atr("_is_expired")(item):
+            value = getattr(get_atr("adapter"), item)(self)
+            setattr(self, item, value)
+            expiration_registry[item] = datetime.datetime.utcnow() + datetime.timedelta(
+                minutes=get_atr("EXPIRATION_TIME_MINUTES")
+            )
+
+        return get_atr(item)
+
+
+class LegacySystem(LegacyAutoRefreshMixin, SystemModel):
+    refreshed_fields = ("eddb_id",)
+    adapter = FakeAdapter()
+
+
+def measure(label, obj, attribute, number=1_000_000):
+    obj_globals = {"obj": obj}
+    seconds = min(
+        timeit.repeat(f"obj.{attribute}", globals=obj_globals, number=number, repeat=5)
+    )
+    print(f"{label:>40}: {seconds / number * 1e9:6.1f} ns")
+
+
+if __name__ == "__main__":
+    model = SystemModel.create(name="Model System", eddb_id=100)
+    legacy = LegacySystem.create(name="Legacy System")
+    current = System.create(name="Current System", adapter=FakeAdapter())
+
+    measure("model, name", model, "name")
+    measure("__getattribute__, name", legacy, "name")
+    measure("descriptor, name", current, "name")
+    measure("model, eddb_id", model, "eddb_id")
+    measure("__getattribute__, fresh eddb_id", legacy, "eddb_id")
+    measure("descriptor, fresh eddb_id", current, "eddb_id")
@@ -0,0 +1,289 @@
+"""
+End-to-end benchmarks of the whole stack - EliteBgsClient, adapters, refreshed fields and relations - against a local
+fake Elite BGS server serving generated factions, stations, systems and ticks.
+
+Every scenario starts from scratch (a new client with an empty cache, empty registries) and reports throughput,
+latency percentiles of its operations, requests the server got and memory. Results can be saved and compared with a
+previous run - the script exits with 1 when a scenario got slower by more than the tolerance or sends more requests.
+
+Usage: python benchmarks/bench_end_to_end.py [--systems 50] [--factions 6] [--stations 10] [--padding 2000]
+       [--latency-ms 5] [--save results.json] [--compare baseline.json] [--tolerance 0.25] [scenario ...]
+"""
+
+import argparse
+import gc
+import json
+import math
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from edclasses import metrics, System, Faction, FactionBranch, OrbitalStation
+from edclasses.api_clients import EliteBgsClient
+from edclasses.commons.rate_scheduler import RateScheduler
+from edclasses.models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from edclasses.tests.fake_api import FakeEliteBgsApi, FakeEliteBgsServer
+from edclasses.ticks import TickWatcher
+from edclasses.utils import InstanceRegistry
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+MODELS = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+
+def traverse_system(name):
+    system = System.create(name=name)
+    for faction_branch in system.faction_branches:
+        faction_branch.influence
+        faction_branch.active_states
+        faction_branch.faction.name
+    for station in system.stations:
+        station.services
+        station.controlling_faction
+
+
+def traverse_faction(name):
+    faction = Faction.create(name=name)
+    for faction_branch in faction.faction_branches:
+        faction_branch.system.name
+        faction_branch.influence
+
+
+def no_teardown():
+    pass
+
+
+# scenarios get the api and the client and return (operations, number of threads running them, teardown)
+
+
+def system_cold(api, client):
+    return [partial(traverse_system, name) for name in api.systems], 1, no_teardown
+
+
+def system_warm(api, client):
+    for name in api.systems:
+        traverse_system(name)
+    return [partial(traverse_system, name) for name in api.systems] * 5, 1, no_teardown
+
+
+def faction_cold(api, client):
+    return [partial(traverse_faction, name) for name in api.factions], 1, no_teardown
+
+
+def prefetch(api, client):
+    batches = [api.systems[i : i + 10] for i in range(0, len(api.systems), 10)]
+    operations = [
+        partial(System.prefetch, batch, related=["faction_branches", "stations"])
+        for batch in batches
+    ]
+    return operations, 1, no_teardown
+
+
+def concurrent_cold(api, client):
+    return [partial(traverse_system, name) for name in api.systems], 8, no_teardown
+
+
+def tick_refresh(api, client):
+    watcher = TickWatcher(client=client, poll_interval_minutes=60)
+    watcher.install(*CLASSES)
+    for name in api.systems:
+        traverse_system(name)
+    previous_tick, api.tick = api.tick, "2022-01-02T12:00:00.000Z"
+
+    def teardown():
+        watcher.uninstall()
+        api.tick = previous_tick
+
+    def poll_and_refresh():
+        watcher.poll()
+        watcher.refresh_tracked()
+
+    return [poll_and_refresh], 1, teardown
+
+
+SCENARIOS = {
+    scenario.__name__: scenario
+    for scenario in (
+        system_cold,
+        system_warm,
+        faction_cold,
+        prefetch,
+        concurrent_cold,
+        tick_refresh,
+    )
+}
+
+
+def reset(server) -> EliteBgsClient:
+    client = EliteBgsClient(
+        api_url=server.url, scheduler=RateScheduler(calls=1_000_000, period=1)
+    )
+    for cls in CLASSES:
+        cls.adapter.client = client
+    for model in MODELS:
+        model.registry = InstanceRegistry()
+    # the relations keep no links of their own - they're on the objects, so the previous scenario's graph goes away
+    # with its registries; it's full of reference cycles though, so it's collected now, not during the next scenario
+    gc.collect()
+    server.requests_made.clear()
+    return client
+
+
+def timed(operation, latencies):
+    start = time.perf_counter()
+    operation()
+    latencies.append(time.perf_counter() - start)
+
+
+def run_scenario(name, server, trace_memory=False) -> dict:
+    client = reset(server)
+    operations, threads, teardown = SCENARIOS[name](server.api, client)
+    server.requests_made.clear()
+    metrics_registry = metrics.enable()
+    if trace_memory:
+        tracemalloc.start()
+
+    latencies = []
+    start = time.perf_counter()
+    try:
+        if threads == 1:
+            for operation in operations:
+                timed(operation, latencies)
+        else:
+            with ThreadPoolExecutor(threads) as executor:
+                for future in [
+                    executor.submit(timed, operation, latencies)
+                    for operation in operations
+                ]:
+                    future.result()
+        total = time.perf_counter() - start
+        if trace_memory:
+            retained, peak = tracemalloc.get_traced_memory()
+            return {"retained_bytes": retained, "peak_bytes": peak}
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        metrics.disable()
+        teardown()
+
+    latencies.sort()
+    return {
+        "operations": len(latencies),
+        "seconds": total,
+        "operations_per_second": len(latencies) / total,
+        **{f"p{p}_ms": percentile(latencies, p) * 1000 for p in (50, 95, 99)},
+        "max_ms": latencies[-1] * 1000,
+        "requests": len(server.requests_made),
+        "requests_by_endpoint": dict(Counter(path for path, _ in server.requests_made)),
+        "cache_hits": sum(
+            value for _, _, value in metrics_registry.cache_hits.samples()
+        ),
+    }
+
+
+def percentile(values, p) -> float:
+    # nearest rank, values have to be sorted
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def print_results(results: dict):
+    print(
+        f"{'scenario':<16} {'ops':>6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        f" {'requests':>8} {'hits':>6} {'kept MB':>8} {'peak MB':>8}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<16} {result['operations']:>6} {result['operations_per_second']:>9.1f}"
+            f" {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            f" {result['max_ms']:>8.2f} {result['requests']:>8} {result['cache_hits']:>6}"
+            f" {result['retained_bytes'] / 2**20:>8.2f} {result['peak_bytes'] / 2**20:>8.2f}"
+        )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns descriptions of the regressions against the baseline results.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["operations_per_second"] < previous["operations_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{name}: {result['operations_per_second']:.1f} ops/s, was {previous['operations_per_second']:.1f}"
+            )
+        if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms, was {previous['p95_ms']:.2f} ms"
+            )
+        if result["requests"] > previous["requests"]:
+            regressions.append(
+                f"{name}: {result['requests']} requests, was {previous['requests']}"
+            )
+        if result["peak_bytes"] > previous["peak_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {result['peak_bytes']} bytes, was {previous['peak_bytes']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("scenarios", nargs="*", help=", ".join(SCENARIOS))
+    parser.add_argument("--systems", type=int, default=50)
+    parser.add_argument("--factions", type=int, default=6)
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--padding", type=int, default=2000, help="bytes per doc")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--save", help="file to save the results to")
+    parser.add_argument("--compare", help="results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}, choose from {', '.join(SCENARIOS)}")
+
+    api = FakeEliteBgsApi(
+        prefix="Bench",
+        systems=args.systems,
+        factions_per_system=args.factions,
+        stations_per_system=args.stations,
+        padding_bytes=args.padding,
+    )
+    results = {}
+    with FakeEliteBgsServer(api, latency=args.latency_ms / 1000) as server:
+        for name in args.scenarios or SCENARIOS:
+            results[name] = {
+                **run_scenario(name, server),
+                **run_scenario(name, server, trace_memory=True),
+            }
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"config": vars(args), "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
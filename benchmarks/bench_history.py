@@ -0,0 +1,95 @@
+"""
+Measures memory and query time of InfluenceHistory, compared to keeping the samples as a list of dicts.
+
+Usage: python benchmarks/bench_history.py [samples]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from edclasses import enums
+from edclasses.history import InfluenceHistory
+
+START = int(datetime(2018, 1, 1, tzinfo=timezone.utc).timestamp())
+HOUR = 60 * 60
+
+
+def make_samples(count: int):
+    random.seed(0)
+    states = list(enums.State)
+    return [
+        (
+            START + i * HOUR,
+            random.random(),
+            random.sample(states, 2),
+            random.sample(states, 1),
+            [],
+        )
+        for i in range(count)
+    ]
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def measure(name: str, func, repeat: int = 20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<40} {best * 1000:>10.3f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    samples = make_samples(count)
+
+    def build_history():
+        history = InfluenceHistory()
+        history.extend(samples)
+        return history
+
+    def build_dicts():
+        return [
+            {
+                "timestamp": timestamp,
+                "influence": influence,
+                "active_states": list(active),
+                "pending_states": list(pending),
+                "recovering_states": list(recovering),
+            }
+            for timestamp, influence, active, pending, recovering in samples
+        ]
+
+    history, history_size = measure_memory(build_history)
+    dicts, dicts_size = measure_memory(build_dicts)
+    print(f"{count} samples")
+    print(f"{'InfluenceHistory':<40} {history_size / count:>10.1f} B per sample")
+    print(f"{'list of dicts':<40} {dicts_size / count:>10.1f} B per sample")
+
+    week_start, week_end = START + count // 2 * HOUR, START + (count // 2 + 168) * HOUR
+    timestamps = [sample["timestamp"] for sample in dicts]
+
+    def dicts_range():
+        first = bisect_left(timestamps, week_start)
+        last = bisect_right(timestamps, week_end)
+        return dicts[first:last]
+
+    measure("one week, list of dicts", dicts_range)
+    measure("one week, range", lambda: history.range(week_start, week_end))
+    measure("one week, series", lambda: history.series(week_start, week_end))
+    measure("daily means, downsample", lambda: history.downsample(24 * HOUR), 3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the memory held by the registries after creating many stations, and a branch of one of a few big factions
+in every system, with and without a limit on the number of kept instances. The factions themselves are never evicted,
+so their branches must not keep the evicted objects alive.
+
+Usage: python benchmarks/bench_identity_map.py [stations_count]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from edclasses import enums
+from edclasses.models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from edclasses.utils import InstanceRegistry
+
+STATIONS_PER_SYSTEM = 10
+FACTIONS = 10
+MODELS = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+
+def create_stations(stations_count):
+    for i in range(stations_count):
+        system_index = i // STATIONS_PER_SYSTEM
+        system = SystemModel.create(name=f"System {system_index}")
+        if i % STATIONS_PER_SYSTEM == 0:
+            FactionBranchModel.create(
+                faction=FactionModel.create(name=f"Faction {system_index % FACTIONS}"),
+                system=system,
+            )
+        OrbitalStationModel.create(
+            name=f"Station {i}", station_type=enums.StationType.CORIOLIS, system=system
+        )
+
+
+def measure(stations_count, max_instances):
+    for cls in MODELS:
+        cls.registry = InstanceRegistry()
+    per_system = max_instances // STATIONS_PER_SYSTEM if max_instances else None
+    SystemModel.set_max_instances(per_system)
+    FactionBranchModel.set_max_instances(per_system)
+    OrbitalStationModel.set_max_instances(max_instances)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    create_stations(stations_count)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    label = f"max_instances={max_instances}"
+    print(
+        f"{label:>24}: {len(OrbitalStationModel.registry):>7} stations, "
+        f"{len(FactionBranchModel.registry):>6} branches kept, "
+        f"{current / 2**20:7.1f} MiB held, {peak / 2**20:7.1f} MiB peak, {elapsed:.2f}s"
+    )
+
+    for cls in MODELS:
+        for obj in list(cls.registry.values()):
+            obj.delete()
+
+
+if __name__ == "__main__":
+    stations_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(
+        f"{stations_count} stations in {stations_count // STATIONS_PER_SYSTEM} systems,"
+        f" with branches of {FACTIONS} factions"
+    )
+    measure(stations_count, None)
+    measure(stations_count, 10_000)
+    measure(stations_count, 1_000)
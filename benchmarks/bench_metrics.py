@@ -0,0 +1,45 @@
+"""
+Measures what the metrics hooks cost: reads of fresh refreshed fields, cached client requests and field loads, with
+metrics disabled and enabled.
+
+Usage: python benchmarks/bench_metrics.py
+"""
+
+import timeit
+
+from edclasses import metrics, System
+from edclasses.tests.fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+NUMBER = 200_000
+
+
+def measure(name: str, statement, number: int = NUMBER):
+    best = min(timeit.repeat(statement, number=number, repeat=5))
+    print(f"{name:<45} {best / number * 1e9:>8.1f} ns")
+
+
+def main():
+    client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Bench"))
+    System.adapter.client = client
+    system = System.create(name="Bench System 0")
+    system.eddb_id
+    client.get_request("systems", name="Bench System 0")
+
+    def load():
+        system.expire("eddb_id")
+        system.eddb_id
+
+    for state in ("disabled", "enabled"):
+        if state == "enabled":
+            metrics.enable()
+        measure(f"fresh field read, metrics {state}", lambda: system.eddb_id)
+        measure(
+            f"cached request, metrics {state}",
+            lambda: client.get_request("systems", name="Bench System 0"),
+        )
+        measure(f"field load from cache, metrics {state}", load, number=NUMBER // 10)
+    metrics.disable()
+
+
+if __name__ == "__main__":
+    main()
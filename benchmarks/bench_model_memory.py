@@ -0,0 +1,84 @@
+"""
+Measures memory used per station (with its share of the system and faction branch) by the regular and the compact
+model classes.
+
+Usage: python benchmarks/bench_model_memory.py [stations_count ...]
+"""
+
+import sys
+import tracemalloc
+from decimal import Decimal
+
+from edclasses import enums
+from edclasses import models
+from edclasses.utils import InstanceRegistry
+
+STATIONS_PER_SYSTEM = 10
+SERVICES = [
+    enums.StationService.DOCK,
+    enums.StationService.AUTODOCK,
+    enums.StationService.OUTFITTING,
+    enums.StationService.SHIPYARD,
+]
+
+VARIANTS = {
+    "regular": (
+        models.SystemModel,
+        models.FactionModel,
+        models.FactionBranchModel,
+        models.OrbitalStationModel,
+    ),
+    "compact": (
+        models.CompactSystemModel,
+        models.CompactFactionModel,
+        models.CompactFactionBranchModel,
+        models.CompactOrbitalStationModel,
+    ),
+}
+
+
+def create_objects(stations_count, system_cls, faction_cls, branch_cls, station_cls):
+    faction = faction_cls.create(name="Faction")
+    for i in range(stations_count):
+        system_name = f"System {i // STATIONS_PER_SYSTEM}"
+        system = system_cls.create(name=system_name)
+        faction_branch = branch_cls.get_from_registry(faction=faction, system=system)
+        if faction_branch is None:
+            faction_branch = branch_cls.create(
+                faction=faction, system=system, influence=Decimal("0.125")
+            )
+        station_cls.create(
+            name=f"Station {i}",
+            station_type=enums.StationType.CORIOLIS,
+            system=system,
+            distance_to_arrival=Decimal(i % 5000),
+            services=list(SERVICES),
+            controlling_faction=faction_branch,
+        )
+
+
+def measure(stations_count, variant):
+    classes = VARIANTS[variant]
+    for cls in classes:
+        cls.registry = InstanceRegistry()
+
+    tracemalloc.start()
+    create_objects(stations_count, *classes)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{stations_count:>9} stations, {variant:>8}: {current / stations_count:7.0f} B per station, "
+        f"{current / 2**20:8.1f} MiB total"
+    )
+
+    for cls in classes:
+        for obj in list(cls.registry.values()):
+            obj.delete()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        for variant in VARIANTS:
+            measure(size, variant)
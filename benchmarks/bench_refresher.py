@@ -0,0 +1,85 @@
+"""
+Measures how long reads of auto-refreshed fields take while the data keeps expiring, with and without the
+BackgroundRefresher. The API is a local fake server answering after a delay.
+
+Usage: python benchmarks/bench_refresher.py [seconds] [latency_ms]
+"""
+
+import random
+import sys
+import time
+
+from edclasses import System, Faction, FactionBranch, OrbitalStation
+from edclasses.api_clients import EliteBgsClient
+from edclasses.commons.caching_utils import MemoryCache
+from edclasses.commons.rate_scheduler import RateScheduler
+from edclasses.refresher import BackgroundRefresher
+from edclasses.tests.fake_api import FakeEliteBgsApi, FakeEliteBgsServer
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+SYSTEMS = 10
+EXPIRATION_SECONDS = 2
+
+
+def run(server, seconds: float, refresher=None):
+    client = EliteBgsClient(
+        api_url=server.url,
+        # responses live shorter than the fields, so an expired field is really fetched again
+        cache=MemoryCache(ttl_seconds=EXPIRATION_SECONDS / 2),
+        scheduler=RateScheduler(calls=100, period=1),
+    )
+    for cls in CLASSES:
+        cls.adapter.client = client
+        cls.EXPIRATION_TIME_MINUTES = EXPIRATION_SECONDS / 60
+
+    faction_branches = [
+        faction_branch
+        for name in server.api.systems
+        for faction_branch in System.create(name=name).faction_branches
+    ]
+    for faction_branch in faction_branches:
+        faction_branch.influence
+
+    if refresher is not None:
+        refresher.start(*CLASSES)
+    random.seed(0)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            faction_branch = random.choice(faction_branches)
+            start = time.perf_counter()
+            faction_branch.influence
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.001)
+    finally:
+        if refresher is not None:
+            refresher.stop()
+
+    latencies.sort()
+    blocked = sum(latency > 0.001 for latency in latencies)
+    print(
+        f"{'with refresher' if refresher else 'without refresher':<20}"
+        f" reads {len(latencies):>6}"
+        f"  blocked {blocked:>4}"
+        f"  p99 {latencies[int(len(latencies) * 0.99)] * 1000:>8.3f} ms"
+        f"  max {latencies[-1] * 1000:>8.3f} ms"
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    with FakeEliteBgsServer(
+        FakeEliteBgsApi(systems=SYSTEMS), latency=latency
+    ) as server:
+        run(server, seconds)
+        run(
+            server,
+            seconds,
+            BackgroundRefresher(interval_seconds=0.1, lead_seconds=0.5),
+        )
+
+
+if __name__ == "__main__":
+    main()
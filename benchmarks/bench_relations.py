@@ -0,0 +1,102 @@
+"""
+Measures how the cost of relation operations grows with the number of children, for the dict-backed
+OneToManyRelation and the list-backed implementation used before.
+
+Usage: python benchmarks/bench_relations.py
+"""
+
+import time
+from collections import defaultdict
+
+from edclasses.utils import OneToManyRelation
+
+
+class LegacyOneToManyRelation:
+    """
+    The previous implementation, kept here for comparison.
+    """
+
+    def __init__(self):
+        self.parent_side = defaultdict(list)
+        self.child_side = {}
+
+    def _delete_link(self, parent_obj, child_obj):
+        self.parent_side[parent_obj].remove(child_obj)
+        self.child_side.pop(child_obj)
+
+    def set_for_parent(self, parent_obj, children):
+        for child in self.parent_side.get(parent_obj, list()):
+            self.child_side.pop(child)
+
+        for child in children:
+            old_parent = self.child_side.get(child)
+            if old_parent is not None:
+                self._delete_link(old_parent, child)
+            self.child_side[child] = parent_obj
+
+        self.parent_side[parent_obj] = children
+
+    def set_for_child(self, child_obj, parent_obj):
+        old_parent = self.child_side.get(child_obj)
+        if parent_obj is old_parent:
+            return
+        if old_parent is not None:
+            self._delete_link(old_parent, child_obj)
+        if parent_obj is not None:
+            self.parent_side[parent_obj].append(child_obj)
+            self.child_side[child_obj] = parent_obj
+
+
+class Obj:
+    pass
+
+
+def move_children_one_by_one(relation, children_count):
+    old_parent, new_parent = Obj(), Obj()
+    children = [Obj() for _ in range(children_count)]
+    relation.set_for_parent(old_parent, list(children))
+    relation.set_for_parent(new_parent, [])
+
+    start = time.perf_counter()
+    # moving from the back means list.remove has to scan the whole list
+    for child in reversed(children):
+        relation.set_for_child(child, new_parent)
+    return time.perf_counter() - start
+
+
+def replace_one_child(relation, children_count, repeat=100):
+    parent = Obj()
+    children = [Obj() for _ in range(children_count)]
+    relation.set_for_parent(parent, list(children))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        children[0] = Obj()
+        relation.set_for_parent(parent, list(children))
+    return (time.perf_counter() - start) / repeat
+
+
+def new_relation():
+    relation = OneToManyRelation("Parent", "Child")
+    OneToManyRelation.registry.pop(relation._registry_key)
+    return relation
+
+
+if __name__ == "__main__":
+    print(
+        f"{'children':>9} {'move one (list)':>16} {'move one (dict)':>16} {'set (list)':>12} {'set (dict)':>12}"
+    )
+    for children_count in (100, 1_000, 10_000, 50_000):
+        legacy_move = move_children_one_by_one(
+            LegacyOneToManyRelation(), children_count
+        )
+        move = move_children_one_by_one(new_relation(), children_count)
+        legacy_set = replace_one_child(LegacyOneToManyRelation(), children_count)
+        set_ = replace_one_child(new_relation(), children_count)
+        print(
+            f"{children_count:>9} "
+            f"{legacy_move / children_count * 1e6:>13.2f} us "
+            f"{move / children_count * 1e6:>13.2f} us "
+            f"{legacy_set * 1e3:>9.2f} ms "
+            f"{set_ * 1e3:>9.2f} ms"
+        )
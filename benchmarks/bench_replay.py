@@ -0,0 +1,84 @@
+"""
+Records a session against the local fake Elite BGS server (with a rate limit and latency like the real API), then
+replays it from the cassette. Reports the time of both runs and the size of the cassette with each compression.
+
+Usage: python benchmarks/bench_replay.py [systems] [latency_ms]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from edclasses import System, Faction, FactionBranch, OrbitalStation
+from edclasses.api_clients import EliteBgsClient
+from edclasses.commons.rate_scheduler import RateScheduler
+from edclasses.commons.transports import ReplayTransport, recording, replaying
+from edclasses.models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from edclasses.tests.fake_api import FakeEliteBgsApi, FakeEliteBgsServer
+from edclasses.utils import InstanceRegistry
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+MODELS = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+
+def session(systems):
+    for model in MODELS:
+        model.registry = InstanceRegistry()
+    start = time.perf_counter()
+    for name in systems:
+        system = System.create(name=name)
+        for faction_branch in system.faction_branches:
+            faction_branch.influence
+            faction_branch.faction.name
+        for station in system.stations:
+            station.services
+    return time.perf_counter() - start
+
+
+def main():
+    systems_count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    api = FakeEliteBgsApi(
+        prefix="Replay",
+        systems=systems_count,
+        stations_per_system=10,
+    )
+    client = EliteBgsClient(scheduler=RateScheduler(calls=20, period=1, burst=5))
+    for cls in CLASSES:
+        cls.adapter.client = client
+
+    server = FakeEliteBgsServer(api, latency=latency)
+    with tempfile.TemporaryDirectory() as directory, server:
+        client.api_url = server.url
+        sizes = {}
+        for extension in ("gz", "xz", "bz2"):
+            cassette = os.path.join(directory, f"session.jsonl.{extension}")
+            with recording(client, cassette) as recorder:
+                recorded_seconds = session(api.systems)
+            sizes[extension] = os.path.getsize(cassette)
+
+        raw_size = sum(
+            len(json.dumps(response))
+            for responses in ReplayTransport(cassette)._responses.values()
+            for response in responses
+        )
+        with replaying(client, cassette):
+            replayed_seconds = session(api.systems)
+
+    print(f"requests recorded                {recorder.recorded:>10}")
+    print(f"live session (rate limited)      {recorded_seconds * 1000:>10.1f} ms")
+    print(f"replayed session                 {replayed_seconds * 1000:>10.1f} ms")
+    print(f"responses as JSON                {raw_size / 1024:>10.1f} KiB")
+    for extension, size in sizes.items():
+        print(f"cassette .{extension:<4}                  {size / 1024:>10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
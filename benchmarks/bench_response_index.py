@@ -0,0 +1,61 @@
+"""
+Compares looking up every station of a system by scanning the response docs (as the adapters used to do) with looking
+it up in the IndexedResponse.
+
+Usage: python benchmarks/bench_response_index.py
+"""
+
+import time
+
+from edclasses.api_adapters.response_index import IndexedResponse
+from edclasses.utils import return_first_match
+
+
+def make_response(stations_count):
+    return {
+        "docs": [
+            {
+                "name": f"Station {i}",
+                "name_lower": f"station {i}",
+                "controlling_minor_faction": f"faction {i % 10}",
+                "distance_from_star": i,
+            }
+            for i in range(stations_count)
+        ]
+    }
+
+
+def scan_all(response, names):
+    for name in names:
+        return_first_match(
+            lambda station: station["name"].lower() == name.lower(), response["docs"]
+        )
+
+
+def index_all(response, names):
+    data = IndexedResponse(response)
+    for name in names:
+        data.get(name)
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'stations':>10} {'scan [ms]':>12} {'index [ms]':>12} {'speedup':>10}")
+    for stations_count in (10, 100, 1000, 5000):
+        response = make_response(stations_count)
+        names = [doc["name"] for doc in response["docs"]]
+        scan_time = measure(scan_all, response, names)
+        index_time = measure(index_all, response, names)
+        print(
+            f"{stations_count:>10} {scan_time * 1000:>12.2f} {index_time * 1000:>12.2f}"
+            f" {scan_time / index_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures saving and loading a snapshot of a generated galaxy, and reading a single row from the memory-mapped file.
+
+Usage: python benchmarks/bench_snapshot.py [stations_count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from edclasses import enums, snapshot
+from edclasses.models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+
+STATIONS_PER_SYSTEM = 10
+CLASSES = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+
+def create_galaxy(stations_count):
+    factions = [FactionModel.create(name=f"Faction {i}") for i in range(100)]
+    for i in range(stations_count // STATIONS_PER_SYSTEM):
+        system = SystemModel.create(name=f"System {i}", eddb_id=i)
+        faction_branch = FactionBranchModel.create(
+            faction=factions[i % len(factions)],
+            system=system,
+            influence=Decimal("0.25"),
+            active_states=[enums.State.BOOM],
+        )
+        for j in range(STATIONS_PER_SYSTEM):
+            OrbitalStationModel.create(
+                name=f"Station {i}-{j}",
+                station_type=enums.StationType.CORIOLIS,
+                system=system,
+                distance_to_arrival=Decimal(j * 100),
+                services=[enums.StationService.DOCK, enums.StationService.SHIPYARD],
+                controlling_faction=faction_branch,
+            )
+
+
+def clear():
+    for cls in CLASSES:
+        for obj in list(cls.registry.values()):
+            obj.delete()
+
+
+if __name__ == "__main__":
+    stations_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    path = os.path.join(tempfile.mkdtemp(), "galaxy.snapshot")
+
+    start = time.perf_counter()
+    create_galaxy(stations_count)
+    print(f"create {stations_count} stations: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    saved = snapshot.save(path)
+    print(
+        f"save {saved} objects: {time.perf_counter() - start:.2f}s, "
+        f"{os.path.getsize(path) / 2**20:.1f} MiB"
+    )
+    clear()
+
+    start = time.perf_counter()
+    with snapshot.SnapshotReader(path) as reader:
+        table = reader.tables[-1]
+        reader.row(table, table.rows - 1)
+    print(f"open and read the last row: {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+    start = time.perf_counter()
+    loaded = snapshot.load(path)
+    print(f"load {loaded} objects: {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,103 @@
+"""
+Compares radius and nearest neighbour queries answered by SpatialIndex with a brute force scan of all systems, and
+measures queries from a small cluster far from the rest (like Colonia), which have to cross a lot of empty cells.
+
+Usage: python benchmarks/bench_spatial.py [systems]
+"""
+
+import heapq
+import math
+import random
+import sys
+import time
+
+from edclasses.models import CompactSystemModel
+from edclasses.spatial import SpatialIndex
+
+
+def populate(count: int):
+    # a dense bubble around Sol and a thin disc around it, roughly like the inhabited space and the rest
+    random.seed(0)
+    for i in range(count):
+        if i % 10:
+            point = [random.gauss(0, 150), random.gauss(0, 60), random.gauss(0, 150)]
+        else:
+            point = [
+                random.uniform(-5000, 5000),
+                random.gauss(0, 300),
+                random.uniform(-5000, 5000),
+            ]
+        CompactSystemModel.create(
+            name=f"System {i}", x=point[0], y=point[1], z=point[2]
+        )
+    for i in range(30):
+        CompactSystemModel.create(
+            name=f"Colonia {i}",
+            x=random.gauss(-9530, 30),
+            y=random.gauss(-910, 10),
+            z=random.gauss(19808, 30),
+        )
+
+
+def brute_force_within(point, radius):
+    return sorted(
+        (distance, system)
+        for system in CompactSystemModel.registry.values()
+        if (distance := math.dist(system.coordinates, point)) <= radius
+    )
+
+
+def brute_force_nearest(point, k):
+    return heapq.nsmallest(
+        k,
+        (
+            (math.dist(system.coordinates, point), system.name)
+            for system in CompactSystemModel.registry.values()
+        ),
+    )
+
+
+def measure(name: str, func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(*query)
+    print(
+        f"{name:<40} {(time.perf_counter() - start) / len(queries) * 1000:>10.3f} ms per query"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    start = time.perf_counter()
+    populate(count)
+    print(f"{count} systems created in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    index = SpatialIndex(CompactSystemModel, cell_size=20)
+    print(
+        f"{'building the index':<40} {(time.perf_counter() - start) * 1000:>10.1f} ms"
+    )
+
+    random.seed(1)
+    points = [
+        (random.gauss(0, 100), random.gauss(0, 40), random.gauss(0, 100))
+        for _ in range(20)
+    ]
+    measure(
+        "within 15 ly, brute force", brute_force_within, [(p, 15) for p in points[:3]]
+    )
+    measure("within 15 ly, index", index.within, [(p, 15) for p in points])
+    measure(
+        "nearest 10, brute force", brute_force_nearest, [(p, 10) for p in points[:3]]
+    )
+    measure("nearest 10, index", index.nearest, [(p, 10) for p in points])
+    far = [(4000.0, 0.0, 4000.0)]
+    measure("nearest 10 in the void, index", index.nearest, [(p, 10) for p in far])
+    colonia = [(-9530.0, -910.0, 19808.0)]
+    measure("nearest 10 in Colonia, index", index.nearest, [(p, 10) for p in colonia])
+    measure("nearest 40 from Colonia, index", index.nearest, [(p, 40) for p in colonia])
+    measure("within 1500 ly, index", index.within, [(p, 1500) for p in points[:3]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares station services kept as StationServices (a bitmask) with the list of StationService members used before:
+parsing API data, checking for services and filtering many stations.
+
+Usage: python benchmarks/bench_station_services.py [stations]
+"""
+
+import random
+import sys
+import time
+
+from edclasses import enums
+from edclasses.enums import StationService, StationServices
+
+try:
+    from edclasses.analytics import service_masks
+except ImportError:
+    service_masks = None
+
+WANTED = [StationService.REPAIR, StationService.REFUEL, StationService.SHIPYARD]
+
+
+def measure(name: str, func, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<45} {best * 1000:>10.2f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(0)
+    all_services = list(StationService)
+    api_services = [
+        [
+            {"name": service.value.title(), "name_lower": service.value}
+            for service in random.sample(all_services, random.randint(5, 25))
+        ]
+        for _ in range(count)
+    ]
+    print(f"{count} stations")
+
+    measure(
+        "parsing, list of enums",
+        lambda: [
+            [StationService(service["name_lower"]) for service in services]
+            for services in api_services
+        ],
+    )
+    measure(
+        "parsing, StationServices",
+        lambda: [
+            StationServices.from_values(service["name_lower"] for service in services)
+            for services in api_services
+        ],
+    )
+
+    lists = [
+        [StationService(service["name_lower"]) for service in services]
+        for services in api_services
+    ]
+    bitmasks = [StationServices(services) for services in lists]
+
+    measure(
+        "has MISSIONS, list of enums",
+        lambda: [StationService.MISSIONS in services for services in lists],
+    )
+    measure(
+        "has MISSIONS, StationServices",
+        lambda: [StationService.MISSIONS in services for services in bitmasks],
+    )
+    measure(
+        "has all of 3, list of enums",
+        lambda: [all(service in services for service in WANTED) for services in lists],
+    )
+    wanted_mask = enums.services_mask(WANTED)
+    measure(
+        "has all of 3, StationServices",
+        lambda: [services.mask & wanted_mask == wanted_mask for services in bitmasks],
+    )
+
+    if service_masks is not None:
+
+        class Station:
+            __slots__ = ("services",)
+
+            def __init__(self, services):
+                self.services = services
+
+        masks = service_masks([Station(services) for services in bitmasks])
+        measure(
+            "has all of 3, numpy over the masks",
+            lambda: masks & wanted_mask == wanted_mask,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Columnar influence store with vectorized analytics. Needs NumPy - install elite-dangerous-classes-library[analytics].
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError as error:  # pragma: no cover
+    raise ImportError(
+        "edclasses.analytics needs numpy - install elite-dangerous-classes-library[analytics]."
+    ) from error
+
+from . import enums
+from .indexes import peek_value
+from .models import FactionBranchModel
+
+
+def _to_float(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+class InfluenceStore:
+    """
+    Influence of every faction branch in NumPy arrays, one row per branch, with systems and factions as integer ids.
+
+    The store attaches itself to the registry of the faction branch class, so it's kept in sync as branches are
+    created, deleted, or get a new influence. Galaxy-wide questions are then answered with array operations instead of
+    Python loops:
+
+    >>> store = InfluenceStore()
+    >>> store.conflict_risks(threshold=0.03)
+    [Faction 'Sol Workers' Party' in System 'Sol', ...]
+
+    Influence is a fraction (0.35 means 35%). Branches without influence loaded are left out of the analytics.
+    """
+
+    def __init__(self, faction_branch_class=FactionBranchModel, capacity: int = 1024):
+        self.faction_branch_class = faction_branch_class
+        self.systems = []
+        self.factions = []
+        self._system_ids = {}
+        self._faction_ids = {}
+        self.branches = []
+        self._rows = {}
+        self.system_id = np.empty(capacity, dtype=np.int32)
+        self.faction_id = np.empty(capacity, dtype=np.int32)
+        self.influence = np.empty(capacity, dtype=np.float64)
+        faction_branch_class.attach_index("influence", self)
+
+    def detach(self):
+        self.faction_branch_class.detach_index("influence")
+
+    def __len__(self):
+        return len(self.branches)
+
+    @staticmethod
+    def _get_id(obj, ids: dict, objects: list) -> int:
+        obj_id = ids.get(obj)
+        if obj_id is None:
+            obj_id = ids[obj] = len(objects)
+            objects.append(obj)
+        return obj_id
+
+    def _grow(self):
+        capacity = max(2 * len(self.influence), 1)
+        for name in ("system_id", "faction_id", "influence"):
+            column = getattr(self, name)
+            new_column = np.empty(capacity, dtype=column.dtype)
+            new_column[: len(self.branches)] = column[: len(self.branches)]
+            setattr(self, name, new_column)
+
+    # index interface, called by the registry
+
+    def add(self, faction_branch, influence):
+        if faction_branch in self._rows:
+            self.update(faction_branch, influence)
+            return
+        row = len(self.branches)
+        if row == len(self.influence):
+            self._grow()
+        self.system_id[row] = self._get_id(
+            faction_branch.system, self._system_ids, self.systems
+        )
+        self.faction_id[row] = self._get_id(
+            faction_branch.faction, self._faction_ids, self.factions
+        )
+        self.influence[row] = _to_float(influence)
+        self._rows[faction_branch] = row
+        self.branches.append(faction_branch)
+
+    def remove(self, faction_branch):
+        row = self._rows.pop(faction_branch, None)
+        if row is None:
+            return
+        # the last row takes the place of the removed one
+        last_row = len(self.branches) - 1
+        last_branch = self.branches.pop()
+        if row != last_row:
+            self.branches[row] = last_branch
+            self._rows[last_branch] = row
+            for column in (self.system_id, self.faction_id, self.influence):
+                column[row] = column[last_row]
+
+    def update(self, faction_branch, influence):
+        row = self._rows.get(faction_branch)
+        if row is not None:
+            self.influence[row] = _to_float(influence)
+
+    def get(self, influence) -> dict:
+        rows = np.flatnonzero(self._columns()[2] == _to_float(influence))
+        return dict.fromkeys(self.branches[row] for row in rows)
+
+    # analytics
+
+    def _columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        size = len(self.branches)
+        return self.system_id[:size], self.faction_id[:size], self.influence[:size]
+
+    def _ranked(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns rows with influence, sorted by system and then by influence (highest first), the system ids of those
+        rows and the index of the first row of every system.
+        """
+        system_id, _, influence = self._columns()
+        rows = np.flatnonzero(~np.isnan(influence))
+        rows = rows[np.lexsort((-influence[rows], system_id[rows]))]
+        sorted_system_id = system_id[rows]
+        is_first = np.ones(len(rows), dtype=bool)
+        is_first[1:] = sorted_system_id[1:] != sorted_system_id[:-1]
+        return rows, sorted_system_id, np.flatnonzero(is_first)
+
+    def conflict_risks(self, threshold: float = 0.03) -> List:
+        """
+        Returns branches which aren't the strongest in their system, but are within threshold of its influence.
+        """
+        rows, _, first_rows = self._ranked()
+        influence = self.influence[rows]
+        group_sizes = np.diff(np.append(first_rows, len(rows)))
+        leader_influence = np.repeat(influence[first_rows], group_sizes)
+        is_leader = np.zeros(len(rows), dtype=bool)
+        is_leader[first_rows] = True
+        at_risk = ~is_leader & (leader_influence - influence <= threshold)
+        return [self.branches[row] for row in rows[at_risk]]
+
+    def ties(self, tolerance: float = 0.0) -> List:
+        """
+        Returns systems where the two strongest factions have the same influence (give or take tolerance).
+        """
+        rows, sorted_system_id, first_rows = self._ranked()
+        second_rows = first_rows + 1
+        has_second = second_rows < len(rows)
+        first_rows, second_rows = first_rows[has_second], second_rows[has_second]
+        has_second = sorted_system_id[second_rows] == sorted_system_id[first_rows]
+        first_rows, second_rows = first_rows[has_second], second_rows[has_second]
+        influence = self.influence[rows]
+        is_tied = influence[first_rows] - influence[second_rows] <= tolerance
+        return [
+            self.systems[system_id]
+            for system_id in sorted_system_id[first_rows[is_tied]]
+        ]
+
+    def top(self, n: int = 10, system=None, faction=None) -> List:
+        """
+        Returns up to n branches with the highest influence, optionally only in given system or of given faction.
+        """
+        system_id, faction_id, influence = self._columns()
+        mask = ~np.isnan(influence)
+        if system is not None:
+            mask &= system_id == self._system_ids.get(system, -1)
+        if faction is not None:
+            mask &= faction_id == self._faction_ids.get(faction, -1)
+        rows = np.flatnonzero(mask)
+        if len(rows) > n:
+            rows = rows[np.argpartition(-influence[rows], n - 1)[:n]]
+        rows = rows[np.argsort(-influence[rows], kind="stable")]
+        return [self.branches[row] for row in rows]
+
+    def system_aggregates(self) -> Dict[str, np.ndarray]:
+        """
+        Returns per-system statistics as arrays indexed by the system id - store.systems[i] is the system of row i.
+        Systems without any influence loaded have count 0 and NaN elsewhere.
+        """
+        system_id, _, influence = self._columns()
+        has_influence = ~np.isnan(influence)
+        system_id, influence = system_id[has_influence], influence[has_influence]
+        systems_count = len(self.systems)
+
+        count = np.bincount(system_id, minlength=systems_count)
+        total = np.bincount(system_id, weights=influence, minlength=systems_count)
+        maximum = np.full(systems_count, -np.inf)
+        np.maximum.at(maximum, system_id, influence)
+        minimum = np.full(systems_count, np.inf)
+        np.minimum.at(minimum, system_id, influence)
+
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        for column in (maximum, minimum, mean):
+            column[empty] = np.nan
+        return {
+            "count": count,
+            "total": total,
+            "mean": mean,
+            "max": maximum,
+            "min": minimum,
+        }
+
+    def influence_of(self, faction_branch) -> Optional[float]:
+        row = self._rows.get(faction_branch)
+        if row is None or np.isnan(self.influence[row]):
+            return None
+        return float(self.influence[row])
+
+
+def service_masks(stations: Sequence) -> np.ndarray:
+    """
+    Returns service bitmasks (see StationServices) of the stations as an array. Services not loaded count as none.
+    """
+    return np.fromiter(
+        (
+            services.mask if services is not None else 0
+            for services in (peek_value(station, "services") for station in stations)
+        ),
+        dtype=np.uint64,
+        count=len(stations),
+    )
+
+
+def with_services(stations: Sequence, services: Iterable[enums.StationService]) -> List:
+    """
+    Returns the stations having all given services, checked for all stations at once.
+    """
+    mask = np.uint64(enums.services_mask(services))
+    masks = service_masks(stations)
+    return [stations[i] for i in np.flatnonzero(masks & mask == mask)]
@@ -1,10 +1,21 @@
+import asyncio
+from collections import defaultdict
 from decimal import Decimal
-from typing import List, Optional
-
-from .utils import get_orbital_station, get_faction_branch, get_faction, get_system
+from typing import Iterator, List, Optional, Tuple
+
+from .utils import (
+    get_orbital_station,
+    get_faction_branch,
+    get_faction,
+    get_system,
+    find_orbital_station,
+    find_faction_branch,
+    find_system,
+)
 from .. import enums
-from ..api_clients import EliteBgsClient
-from ..utils import return_first_match
+from ..history import Timestamp, parse_elite_bgs_time, to_epoch_seconds
+from ..api_clients import EliteBgsClient, AsyncEliteBgsClient
+from ..utils import thread_safety_enabled
 
 ELITE_BGS_CLIENT = EliteBgsClient()
 
@@ -39,53 +50,112 @@ class EliteBgsAdapterBase:
     def _get_factions_from_response(response: dict) -> List:
         return response.get("docs", [])
 
+    def requests_for(self, obj, field: str) -> List[Tuple[str, dict]]:
+        """
+        Returns the list of (path, params) requests the adapter makes to refresh given field of the object. It lets
+        callers fetch the data for many objects up front, with every distinct request made only once.
+        """
+        return []
+
+    def iter_all(self, **filters) -> Iterator:
+        """
+        Yields objects for all docs matching the filters, following the pagination of the API.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support iterating over all objects."
+        )
+
+    async def aload(self, obj, field: str):
+        """
+        Asynchronous version of calling the adapter method for given field. The requests it needs are fetched without
+        blocking the event loop, after that the regular adapter method is served from the client cache.
+
+        With thread safety enabled (see enable_thread_safety), the adapter method runs in the executor, so parsing the
+        responses and hydrating the objects doesn't block the loop either. Without it, it runs on the loop, as the
+        registries and relations mustn't be changed from many threads at once.
+        """
+        async_client = AsyncEliteBgsClient.for_client(self.client)
+        await async_client.prefetch(self.requests_for(obj, field))
+        method = getattr(self, field)
+        if not thread_safety_enabled():
+            return method(obj)
+        return await asyncio.get_running_loop().run_in_executor(None, method, obj)
+
 
 class EliteBgsFactionBranchAdapter(EliteBgsAdapterBase):
+    def requests_for(self, obj, field: str) -> List[Tuple[str, dict]]:
+        if field == "stations":
+            return [("stations", {"system": obj.system.name})]
+        return [("factions", {"system": obj.system.name})]
+
+    def iter_all(self, **filters) -> Iterator["FactionBranch"]:
+        """
+        Yields branches of all factions matching the filters (e.g. system="Sol" yields the branches of the factions
+        present in Sol, in all their systems).
+        """
+        for faction_data in self.client.iter_factions(**filters):
+            for faction_presence in faction_data["faction_presence"]:
+                faction_branch = self._convert_faction_presence_dict_to_obj(
+                    faction_presence, faction_data["name"]
+                )
+                if faction_branch.adapter is self:
+                    faction_branch.hydrate(
+                        **self.get_faction_branch_fields(faction_presence)
+                    )
+                yield faction_branch
+
+    def _get_faction_presence(self, faction_branch: "FactionBranch") -> dict:
+        system = faction_branch.system
+        data = self.client.get_indexed("factions", system=system.name)
+        if data.mark_hydrated("faction_branches"):
+            self._hydrate_faction_branches(data, system)
+        return data.faction_presence(faction_branch.faction.name, system.name)
+
+    def _hydrate_faction_branches(self, data, system: "System"):
+        # the response has the data of every faction in the system, so all their branches can be filled at once
+        for faction, faction_presence in data.factions_in_system(system.name):
+            faction_branch = find_faction_branch(faction["name"], system)
+            if getattr(faction_branch, "adapter", None) is not self:
+                continue
+            faction_branch.hydrate(**self.get_faction_branch_fields(faction_presence))
+
+    def get_faction_branch_fields(self, faction_presence: dict) -> dict:
+        """
+        Returns values of the refreshed fields found in the faction presence data.
+        """
+        return {
+            "influence": self._get_influence(faction_presence),
+            "active_states": self._get_states(faction_presence, "active_states"),
+            "pending_states": self._get_states(faction_presence, "pending_states"),
+            "recovering_states": self._get_states(
+                faction_presence, "recovering_states"
+            ),
+        }
+
     @staticmethod
-    def _get_faction_data_from_response(response: dict, faction_name: str):
-        factions = response.get("docs", [])
-        faction_data = return_first_match(
-            lambda fact: fact["name"].lower() == faction_name.lower(), factions
-        )
-        return faction_data
+    def _get_influence(faction_presence: dict) -> Decimal:
+        return Decimal(faction_presence["influence"])
 
     @staticmethod
-    def _get_faction_presence_from_faction_data(faction_data: dict, system_name: str):
-        faction_presence_list = faction_data["faction_presence"]
-        faction_presence = return_first_match(
-            lambda fact: fact["system_name_lower"] == system_name.lower(),
-            faction_presence_list,
-        )
-        return faction_presence
+    def _get_states(faction_presence: dict, states_key: str) -> List[enums.State]:
+        states = faction_presence.get(states_key, [])
+        return [enums.State(state["state"]) for state in states]
 
     def influence(self, faction_branch: "FactionBranch") -> Decimal:
-        faction_name = faction_branch.faction.name
-        data = self.client.factions(system=faction_branch.system.name)
-
-        factions = data["docs"]
-        faction = return_first_match(
-            lambda fact: fact["name"].lower() == faction_name.lower(), factions
-        )
-        faction_presence_list = faction["faction_presence"]
-        faction_presence = return_first_match(
-            lambda fact: fact["system_name_lower"]
-            == faction_branch.system.name.lower(),
-            faction_presence_list,
-        )
-
-        return Decimal(faction_presence["influence"])
+        faction_presence = self._get_faction_presence(faction_branch)
+        return self._get_influence(faction_presence)
 
     def stations(self, faction_branch: "FactionBranch") -> List["OrbitalStation"]:
-        faction_name = faction_branch.faction.name
-        system_name = faction_branch.system.name
-        data = self.client.stations(system=system_name)
-        stations = data["docs"]
-
-        faction_stations = filter(
-            lambda station: station["controlling_minor_faction"].lower()
-            == faction_name.lower(),
-            stations,
-        )
+        system = faction_branch.system
+        data = self.client.get_indexed("stations", system=system.name)
+        if data.mark_hydrated("faction_branch_stations"):
+            for sibling in system._faction_branches_getter():
+                if getattr(sibling, "adapter", None) is self:
+                    sibling.hydrate(stations=self._get_stations(data, sibling))
+        return self._get_stations(data, faction_branch)
+
+    def _get_stations(self, data, faction_branch: "FactionBranch"):
+        faction_stations = data.stations_controlled_by(faction_branch.faction.name)
 
         station_objects = []
         for station in faction_stations:
@@ -94,41 +164,31 @@ class EliteBgsFactionBranchAdapter(EliteBgsAdapterBase):
 
         return station_objects
 
-    def _get_states(self, faction_branch, states_key):
-        faction_name = faction_branch.faction.name
-        system_name = faction_branch.system.name
-        response = self.client.factions(system=system_name)
-        faction_data = self._get_faction_data_from_response(response, faction_name)
-        faction_presence = self._get_faction_presence_from_faction_data(faction_data, system_name)
-        active_states = faction_presence.get(states_key, [])
-        return [
-            enums.State(state["state"])
-            for state in active_states
-        ]
-
     def active_states(self, obj):
-        return self._get_states(obj, "active_states")
+        return self._get_states(self._get_faction_presence(obj), "active_states")
 
     def pending_states(self, obj):
-        return self._get_states(obj, "pending_states")
+        return self._get_states(self._get_faction_presence(obj), "pending_states")
 
     def recovering_states(self, obj):
-        return self._get_states(obj, "recovering_states")
+        return self._get_states(self._get_faction_presence(obj), "recovering_states")
+
 
 class EliteBgsSystemAdapter(EliteBgsAdapterBase):
+    def requests_for(self, obj, field: str) -> List[Tuple[str, dict]]:
+        if field == "faction_branches":
+            return [("factions", {"system": obj.name})]
+        if field == "stations":
+            return [("stations", {"system": obj.name})]
+        return [("systems", {"name": obj.name})]
+
     def faction_branches(self, system: "System"):
-        system_name_lower = system.name.lower()
         # TODO: to save requests, it would be better to use client.system with factionDetails=True instead of factions,
         # because it's also used in system.eddb_id
-        data = self.client.factions(system=system.name)
-        factions = data["docs"]
+        data = self.client.get_indexed("factions", system=system.name)
 
         faction_branches = []
-        for faction in factions:
-            faction_in_this_system = return_first_match(
-                lambda fact: fact["system_name_lower"] == system_name_lower,
-                faction["faction_presence"],
-            )
+        for faction, faction_in_this_system in data.factions_in_system(system.name):
             faction_branch_obj = self._convert_faction_presence_dict_to_obj(
                 faction_presence_dict=faction_in_this_system,
                 faction_name=faction["name"],
@@ -138,44 +198,146 @@ class EliteBgsSystemAdapter(EliteBgsAdapterBase):
         return faction_branches
 
     def stations(self, system: "System") -> List["OrbitalStations"]:
-        data = self.client.stations(system=system.name)
-        stations = data["docs"]
+        data = self.client.get_indexed("stations", system=system.name)
 
         station_objects = []
-        for station in stations:
+        for station in data.docs:
             station_obj = self._convert_station_dict_to_obj(station)
             station_objects.append(station_obj)
 
         return station_objects
 
-    def eddb_id(self, system: "System") -> Optional[int]:
+    def iter_all(self, **filters) -> Iterator["System"]:
+        for system_data in self.client.iter_systems(**filters):
+            system = get_system(name=system_data["name"])
+            if system.adapter is self:
+                system.hydrate(**self.get_system_fields(system_data))
+            yield system
+
+    @staticmethod
+    def get_system_fields(system_data: dict) -> dict:
+        """
+        Returns values of the refreshed fields found in the system data.
+        """
+        return {
+            "eddb_id": system_data["eddb_id"],
+            **{
+                axis: EliteBgsSystemAdapter._get_coordinate(system_data, axis)
+                for axis in ("x", "y", "z")
+            },
+        }
+
+    @staticmethod
+    def _get_coordinate(system_data: dict, axis: str) -> Optional[float]:
+        value = system_data.get(axis)
+        return float(value) if value is not None else None
+
+    def _get_this_system_data(self, system: "System") -> Optional[dict]:
         # TODO: this could be taken from self.client.factions or stations - this way we would get more data.
-        data = self.client.systems(name=system.name)
-        systems = data["docs"]
-        system_data = return_first_match(
-            lambda syst: syst["name_lower"] == system.name.lower(),
-            systems,
-        )
+        data = self.client.get_indexed("systems", name=system.name)
+        system_data = data.get(system.name)
+        if system_data and data.mark_hydrated("systems") and system.adapter is self:
+            # the other fields of the system come in the same response
+            system.hydrate(**self.get_system_fields(system_data))
+        return system_data
+
+    def eddb_id(self, system: "System") -> Optional[int]:
+        system_data = self._get_this_system_data(system)
         if system_data:
             return system_data["eddb_id"]
         return None
 
+    def x(self, system: "System") -> Optional[float]:
+        return self._get_coordinate(self._get_this_system_data(system) or {}, "x")
+
+    def y(self, system: "System") -> Optional[float]:
+        return self._get_coordinate(self._get_this_system_data(system) or {}, "y")
+
+    def z(self, system: "System") -> Optional[float]:
+        return self._get_coordinate(self._get_this_system_data(system) or {}, "z")
+
 
 class EliteBgsFactionAdapter(EliteBgsAdapterBase):
+    def requests_for(self, obj, field: str) -> List[Tuple[str, dict]]:
+        return [("factions", {"name": obj.name})]
+
+    def iter_all(self, **filters) -> Iterator["Faction"]:
+        for faction_data in self.client.iter_factions(**filters):
+            faction = get_faction(name=faction_data["name"])
+            faction_branches = self._get_faction_branches(faction_data, faction.name)
+            if faction.adapter is self:
+                faction.hydrate(faction_branches=faction_branches)
+
+            for faction_branch, faction_presence in zip(
+                faction_branches, faction_data["faction_presence"]
+            ):
+                faction_branch_adapter = faction_branch.adapter
+                if isinstance(faction_branch_adapter, EliteBgsFactionBranchAdapter):
+                    faction_branch.hydrate(
+                        **faction_branch_adapter.get_faction_branch_fields(
+                            faction_presence
+                        )
+                    )
+            yield faction
+
     def faction_branches(self, faction_obj):
-        data = self.client.factions(name=faction_obj.name)
-        factions = data["docs"]
+        data = self.client.get_indexed("factions", name=faction_obj.name)
+        return self._get_faction_branches(data.get(faction_obj.name), faction_obj.name)
+
+    def load_history(
+        self, faction_obj, time_min: Timestamp, time_max: Timestamp
+    ) -> List["FactionBranch"]:
+        """
+        Fills the history of every branch of the faction with the samples from time_min to time_max (datetimes or epoch
+        seconds). The whole history comes in one response, it's not cached. Returns the faction branches filled.
+
+        Only branches which already exist are filled - no branches are created for systems the faction has left, so
+        the history doesn't change the current presence of the faction.
+        """
+        samples = defaultdict(list)
+        for faction_data in self.client.iter_factions(
+            name=faction_obj.name,
+            timeMin=to_epoch_seconds(time_min) * 1000,
+            timeMax=to_epoch_seconds(time_max) * 1000,
+        ):
+            for record in faction_data.get("history", []):
+                samples[record["system"]].append(
+                    (
+                        parse_elite_bgs_time(record["updated_at"]),
+                        record["influence"],
+                        EliteBgsFactionBranchAdapter._get_states(
+                            record, "active_states"
+                        ),
+                        EliteBgsFactionBranchAdapter._get_states(
+                            record, "pending_states"
+                        ),
+                        EliteBgsFactionBranchAdapter._get_states(
+                            record, "recovering_states"
+                        ),
+                    )
+                )
 
         faction_branches = []
+        for system_name, system_samples in samples.items():
+            system = find_system(system_name)
+            faction_branch = (
+                find_faction_branch(faction_obj.name, system) if system else None
+            )
+            if faction_branch is None:
+                continue
+            faction_branch.history.extend(system_samples)
+            faction_branches.append(faction_branch)
+        return faction_branches
 
-        faction_data = return_first_match(
-            lambda fact: fact["name"].lower() == faction_obj.name.lower(), factions
-        )
+    def _get_faction_branches(
+        self, faction_data: dict, faction_name: str
+    ) -> List["FactionBranch"]:
+        faction_branches = []
 
         for faction_presence in faction_data["faction_presence"]:
             faction_branch_obj = self._convert_faction_presence_dict_to_obj(
                 faction_presence_dict=faction_presence,
-                faction_name=faction_obj.name,
+                faction_name=faction_name,
             )
             faction_branches.append(faction_branch_obj)
 
@@ -183,44 +345,75 @@ class EliteBgsFactionAdapter(EliteBgsAdapterBase):
 
 
 class EliteBgsStationAdapter(EliteBgsAdapterBase):
-    def distance_to_arrival(self, obj):
-        distance_to_arrival = self._get_this_station_data(
-            obj=obj, key="distance_from_star"
-        )
+    def requests_for(self, obj, field: str) -> List[Tuple[str, dict]]:
+        return [("stations", {"system": obj.system.name})]
 
-        if distance_to_arrival is not None:
-            return Decimal(distance_to_arrival)
-        return None
+    def distance_to_arrival(self, obj):
+        return self._get_distance_to_arrival(self._get_this_station_data(obj))
 
     def services(self, obj):
-        services_data = self._get_this_station_data(obj=obj, key="services")
-
-        services = [
-            enums.StationService(service_dict["name_lower"])
-            for service_dict in services_data
-        ]
-        return services
+        return self._get_services(self._get_this_station_data(obj))
 
     def controlling_faction(self, obj):
-        controlling_faction_name = self._get_this_station_data(
-            obj=obj, key="controlling_minor_faction_cased"
+        return self._get_controlling_faction(
+            self._get_this_station_data(obj), obj.system
         )
-        faction = get_faction(controlling_faction_name)
-        faction_branch = get_faction_branch(faction, obj.system)
-
-        return faction_branch
 
     def state(self, obj):
-        state_data = self._get_this_station_data(obj=obj, key="state")
-        state = enums.State(state_data) if state_data != "none" else None
-        return state
+        return self._get_state(self._get_this_station_data(obj))
 
-    def _get_this_station_data(self, obj: "OrbitalStation", key: str):
-        data = self.client.stations(system=obj.system.name)
+    @staticmethod
+    def _get_distance_to_arrival(station_data: dict) -> Optional[Decimal]:
+        distance_to_arrival = station_data["distance_from_star"]
+        if distance_to_arrival is not None:
+            return Decimal(distance_to_arrival)
+        return None
 
-        stations = data["docs"]
-        this_station_data = return_first_match(
-            lambda station: station["name"].lower() == obj.name.lower(), stations
+    @staticmethod
+    def _get_services(station_data: dict) -> enums.StationServices:
+        return enums.StationServices.from_values(
+            service_dict["name_lower"] for service_dict in station_data["services"]
         )
-        return this_station_data[key]
 
+    @staticmethod
+    def _get_controlling_faction(station_data: dict, system: "System"):
+        faction = get_faction(station_data["controlling_minor_faction_cased"])
+        return get_faction_branch(faction, system)
+
+    @staticmethod
+    def _get_state(station_data: dict) -> Optional[enums.State]:
+        state_data = station_data["state"]
+        return enums.State(state_data) if state_data != "none" else None
+
+    def _get_this_station_data(self, obj: "OrbitalStation") -> dict:
+        system = obj.system
+        data = self.client.get_indexed("stations", system=system.name)
+        if data.mark_hydrated("stations"):
+            self._hydrate_stations(data, system)
+        return data.get(obj.name)
+
+    def _hydrate_stations(self, data, system: "System"):
+        # the response has the data of every station in the system, so all of them can be filled at once
+        for station_data in data.docs:
+            station = find_orbital_station(station_data["name"], system)
+            if getattr(station, "adapter", None) is not self:
+                continue
+            station.hydrate(**self.get_station_fields(station_data, system))
+
+    def get_station_fields(self, station_data: dict, system: "System") -> dict:
+        """
+        Returns values of the refreshed fields found in the station data.
+        """
+        return {
+            "distance_to_arrival": self._get_distance_to_arrival(station_data),
+            "services": self._get_services(station_data),
+            "controlling_faction": self._get_controlling_faction(station_data, system),
+            "state": self._get_state(station_data),
+        }
+
+    def iter_all(self, **filters) -> Iterator["OrbitalStation"]:
+        for station_data in self.client.iter_stations(**filters):
+            station = self._convert_station_dict_to_obj(station_data)
+            if station.adapter is self:
+                station.hydrate(**self.get_station_fields(station_data, station.system))
+            yield station
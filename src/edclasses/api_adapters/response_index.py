@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict, defaultdict
+from typing import List, Optional, Tuple
+
+
+def _lower_name(doc: dict, key: str = "name") -> str:
+    return doc.get(f"{key}_lower") or doc[key].lower()
+
+
+class IndexedResponse:
+    """
+    Elite BGS response parsed once into dictionaries keyed by lowercased names, so the adapters don't have to scan the
+    docs on every lookup.
+
+    - docs are indexed by name,
+    - faction presences are indexed by (faction name, system name),
+    - stations are indexed by the controlling faction.
+
+    Indexes are built on first use. Pages of one response can be given together, their docs are merged.
+    """
+
+    def __init__(self, *pages):
+        self.docs = [
+            doc
+            for page in pages
+            if isinstance(page, dict)
+            for doc in page.get("docs", [])
+        ]
+        self._by_name = None
+        self._faction_presence = None
+        self._by_controlling_faction = None
+        self._hydrated = set()
+
+    def mark_hydrated(self, name: str) -> bool:
+        """
+        Returns True the first time it's called with given name, so objects are hydrated from the response only once.
+        """
+        if name in self._hydrated:
+            return False
+        self._hydrated.add(name)
+        return True
+
+    def get(self, name: str) -> Optional[dict]:
+        if self._by_name is None:
+            self._by_name = {_lower_name(doc): doc for doc in self.docs}
+        return self._by_name.get(name.lower())
+
+    def _get_faction_presence_index(self) -> dict:
+        if self._faction_presence is None:
+            self._faction_presence = {}
+            for doc in self.docs:
+                faction_name_lower = _lower_name(doc)
+                for faction_presence in doc.get("faction_presence", []):
+                    system_name_lower = _lower_name(faction_presence, "system_name")
+                    self._faction_presence[(faction_name_lower, system_name_lower)] = (
+                        faction_presence
+                    )
+        return self._faction_presence
+
+    def faction_presence(self, faction_name: str, system_name: str) -> Optional[dict]:
+        return self._get_faction_presence_index().get(
+            (faction_name.lower(), system_name.lower())
+        )
+
+    def factions_in_system(self, system_name: str) -> List[Tuple[dict, dict]]:
+        """
+        Returns (faction doc, faction presence) pairs of every faction present in given system.
+        """
+        faction_presence_index = self._get_faction_presence_index()
+        system_name_lower = system_name.lower()
+        factions = []
+        for doc in self.docs:
+            faction_presence = faction_presence_index.get(
+                (_lower_name(doc), system_name_lower)
+            )
+            if faction_presence is not None:
+                factions.append((doc, faction_presence))
+        return factions
+
+    def stations_controlled_by(self, faction_name: str) -> List[dict]:
+        if self._by_controlling_faction is None:
+            self._by_controlling_faction = defaultdict(list)
+            for doc in self.docs:
+                controlling_faction = doc.get("controlling_minor_faction")
+                if controlling_faction:
+                    self._by_controlling_faction[controlling_faction.lower()].append(
+                        doc
+                    )
+        return self._by_controlling_faction.get(faction_name.lower(), [])
+
+
+class ResponseIndexStore:
+    """
+    Keeps IndexedResponse objects for the most recently used requests.
+
+    An index is reused for as long as its version stays the same - the client gives a new version to every response it
+    fetches. Without a version, it's reused for as long as the very same response objects (all pages of the response)
+    are given. on_evict is called with the version of every index dropped or replaced.
+
+    The store can be used from many threads.
+    """
+
+    def __init__(self, max_entries: int = 128, on_evict=None):
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: str, *pages, version=None) -> IndexedResponse:
+        with self._lock:
+            entry = self._indexes.get(cache_key)
+            if entry is not None and self._is_current(entry, pages, version):
+                self._indexes.move_to_end(cache_key)
+                return entry[2]
+
+        # parsed without the lock, so a big response doesn't hold up lookups of the others
+        indexed_response = IndexedResponse(*pages)
+        with self._lock:
+            dropped = [self._indexes.pop(cache_key, None)]
+            self._indexes[cache_key] = (version, pages, indexed_response)
+            while len(self._indexes) > self.max_entries:
+                dropped.append(self._indexes.popitem(last=False)[1])
+        self._evicted(dropped)
+        return indexed_response
+
+    def _evicted(self, entries):
+        if self.on_evict is None:
+            return
+        for entry in entries:
+            if entry is not None and entry[0] is not None:
+                self.on_evict(entry[0])
+
+    @staticmethod
+    def _is_current(entry, pages, version) -> bool:
+        indexed_version, indexed_pages, _ = entry
+        if version is not None:
+            return indexed_version == version
+        return len(indexed_pages) == len(pages) and all(
+            indexed is page for indexed, page in zip(indexed_pages, pages)
+        )
+
+    def clear(self):
+        with self._lock:
+            dropped = list(self._indexes.values())
+            self._indexes.clear()
+        self._evicted(dropped)
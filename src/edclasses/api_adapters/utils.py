@@ -51,3 +51,33 @@ def get_system(name):
     from edclasses import System
 
     return System.create(name=name)
+
+
+def find_system(name):
+    """
+    Returns the system if it has already been created, None otherwise.
+    """
+    from edclasses import System
+
+    return System.get_from_registry(name=name)
+
+
+def find_orbital_station(name, system):
+    """
+    Returns the station if it has already been created, None otherwise.
+    """
+    from edclasses import OrbitalStation
+
+    return OrbitalStation.get_from_registry(name=name, system=system)
+
+
+def find_faction_branch(faction_name, system):
+    """
+    Returns the faction branch if it has already been created, None otherwise.
+    """
+    from edclasses import Faction, FactionBranch
+
+    faction = Faction.get_from_registry(name=faction_name)
+    if faction is None:
+        return None
+    return FactionBranch.get_from_registry(faction=faction, system=system)
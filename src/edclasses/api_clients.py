@@ -1,29 +1,275 @@
-from urllib import parse
+import asyncio
+import collections
+import contextlib
+import functools
+import itertools
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-
-import requests
-from functools import lru_cache
-
-from ratelimit import limits
+from . import metrics
+from .api_adapters.response_index import IndexedResponse, ResponseIndexStore
+from .commons.caching_utils import MemoryCache, ResponseCache, make_cache_key, NOT_SET
+from .commons.rate_scheduler import DeadlineExceeded, Priority, RateScheduler
+from .commons.transports import HttpTransport, Transport
 
 
 class EliteBgsClient:
     API_URL = "https://elitebgs.app/api/ebgs/v5/"
 
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(
+        self,
+        cache: ResponseCache = None,
+        api_url: str = None,
+        scheduler: RateScheduler = None,
+        transport: Transport = None,
+    ):
+        self.transport = transport if transport is not None else HttpTransport()
+        self.cache = cache if cache is not None else MemoryCache()
+        self.api_url = api_url or self.API_URL
+        self.scheduler = (
+            scheduler if scheduler is not None else RateScheduler(calls=20, period=60)
+        )
+        self._local = threading.local()
+        self.response_indexes = ResponseIndexStore(on_evict=self._forget_versions)
+        # counts of "requests" sent to the API, "cache_hits" and "coalesced" calls which waited for another call
+        self.stats = collections.Counter()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        # cache key -> version of the pages of the responses in response_indexes, dropped when the page is fetched
+        # again (the next get_indexed gives it a new one) or when its index leaves the store
+        self._response_versions = {}
+        self._version_counter = itertools.count()
+
+    @property
+    def session(self):
+        return getattr(self.transport, "session", None)
+
+    def _fetch(self, path="", **kwargs):
+        return self.transport.get(self.api_url, path, kwargs)
+
+    def _get_request(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        if priority is None:
+            priority = getattr(self._local, "priority", Priority.INTERACTIVE)
+        if self.transport.rate_limited:
+            self.scheduler.acquire(priority=priority, timeout=timeout)
+        return self._fetch(path, **kwargs)
+
+    def _send(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Sends the request, recording it in the metrics when they're enabled.
+        """
+        metrics_registry = metrics.registry
+        if metrics_registry is None:
+            return self._get_request(path, priority=priority, timeout=timeout, **kwargs)
+
+        endpoint = metrics.endpoint_of(path)
+        metrics_registry.requests.inc(endpoint)
+        metrics_registry.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return self._get_request(path, priority=priority, timeout=timeout, **kwargs)
+        except BaseException:
+            metrics_registry.request_errors.inc(endpoint)
+            raise
+        finally:
+            metrics_registry.request_seconds.observe(
+                time.perf_counter() - start, endpoint
+            )
+            metrics_registry.in_flight.dec()
+
+    @contextlib.contextmanager
+    def use_priority(self, priority: int):
+        """
+        Requests sent by the current thread inside the block get given priority, e.g. background refreshes:
+
+        >>> with client.use_priority(Priority.BACKGROUND):
+        ...     system.stations
+        """
+        previous_priority = getattr(self._local, "priority", Priority.INTERACTIVE)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous_priority
+
+    @contextlib.contextmanager
+    def pinned(self, responses: dict):
+        """
+        Serves given responses (cache key -> response) to the current thread inside the block, whatever the cache
+        keeps meanwhile - e.g. the responses of a batch, which could be evicted before all of them are read.
+        """
+        previous_pinned = getattr(self._local, "pinned", None)
+        self._local.pinned = (
+            {**previous_pinned, **responses} if previous_pinned else responses
+        )
+        try:
+            yield
+        finally:
+            self._local.pinned = previous_pinned
+
+    def get_request(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Returns the response from the cache, or sends the request when it's not there. When the rate limit is reached,
+        the request waits in the scheduler queue according to its priority. If timeout (in seconds) is given and the
+        request can't be sent in time, DeadlineExceeded is raised - also when the same request is being sent by another
+        caller and its response doesn't come in time.
+        """
+        cache_key = make_cache_key(path, kwargs)
+        pinned = getattr(self._local, "pinned", None)
+        if pinned:
+            response = pinned.get(cache_key, NOT_SET)
+            if response is not NOT_SET:
+                return response
+
+        response = self.cache.get(cache_key)
+        if response is not NOT_SET:
+            self._count_cache_hit(path)
+            return response
 
-    @limits(calls=20, period=60)
-    def _get_request(self, path="", **kwargs):
-        url = parse.urljoin(self.API_URL, path)
-        response = self.session.get(url, params=kwargs)
-        return response.json()
+        # single flight - when the same request is already being sent by another thread, wait for its response
+        in_flight, is_sender = self._join_in_flight(cache_key, path)
+        if not is_sender:
+            try:
+                return in_flight.result(timeout)
+            except FutureTimeoutError:
+                if in_flight.done():
+                    # the sender failed with a timeout of its own
+                    raise
+                raise DeadlineExceeded(
+                    f"Response to {cache_key} didn't come within {timeout} s."
+                ) from None
 
-    @lru_cache  # TODO: replace this with a proper cache:
-    # we should have a time expiring cache, would be best if we would save single objects from API response
-    # (e.g. object representing faction presence) and then reuse that.
-    def get_request(self, path="", **kwargs):
-        return self._get_request(path, **kwargs)
+        try:
+            # the previous sender could have finished between the cache lookup and taking the lock
+            response = self.cache.get(cache_key)
+            if response is NOT_SET:
+                self._count("requests")
+                response = self._send(
+                    path, priority=priority, timeout=timeout, **kwargs
+                )
+                self._store(cache_key, response)
+            in_flight.set_result(response)
+            return response
+        except BaseException as e:
+            in_flight.set_exception(e)
+            raise
+        finally:
+            self._leave_in_flight(cache_key)
+
+    def _count(self, stat: str):
+        with self._in_flight_lock:
+            self.stats[stat] += 1
+
+    def _count_cache_hit(self, path: str):
+        self._count("cache_hits")
+        if metrics.registry is not None:
+            metrics.registry.cache_hits.inc(metrics.endpoint_of(path))
+
+    def _join_in_flight(self, cache_key: str, path: str) -> Tuple[Future, bool]:
+        """
+        Returns the future of the response to given request and whether the caller is the one who has to send it (and
+        call _leave_in_flight afterwards). Sync and async calls share the futures, so a request is sent only once.
+        """
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(cache_key)
+            if in_flight is None:
+                in_flight = self._in_flight[cache_key] = Future()
+                return in_flight, True
+            self.stats["coalesced"] += 1
+        if metrics.registry is not None:
+            metrics.registry.coalesced.inc(metrics.endpoint_of(path))
+        return in_flight, False
+
+    def _leave_in_flight(self, cache_key: str):
+        with self._in_flight_lock:
+            self._in_flight.pop(cache_key, None)
+
+    def _store(self, cache_key: str, response):
+        self.cache.set(cache_key, response)
+        self._response_versions.pop(cache_key, None)
+
+    def _response_version(self, cache_key: str) -> int:
+        version = self._response_versions.get(cache_key)
+        if version is None:
+            version = self._response_versions.setdefault(
+                cache_key, next(self._version_counter)
+            )
+        return version
+
+    def _forget_versions(self, version: tuple):
+        for cache_key, page_version in version:
+            if self._response_versions.get(cache_key) == page_version:
+                self._response_versions.pop(cache_key, None)
+
+    def get_pages(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Dict[str, dict]:
+        """
+        Returns every page of the response (cache key -> page), following hasNextPage. Each page is a separate
+        get_request call, so the pages are cached and the first one is the same request as get_request(path, **kwargs).
+        """
+        pages = {}
+        response = self.get_request(path, priority=priority, timeout=timeout, **kwargs)
+        pages[make_cache_key(path, kwargs)] = response
+        while isinstance(response, dict) and response.get("hasNextPage"):
+            page_kwargs = {**kwargs, "page": response.get("nextPage") or len(pages) + 1}
+            response = self.get_request(
+                path, priority=priority, timeout=timeout, **page_kwargs
+            )
+            pages[make_cache_key(path, page_kwargs)] = response
+        return pages
+
+    def forget_pages(self, path="", **kwargs):
+        """
+        Removes every cached page of the response from the cache, so the next get_pages fetches all of them again.
+        """
+        cache_key = make_cache_key(path, kwargs)
+        page = 1
+        while True:
+            response = self.cache.get(cache_key)
+            self.cache.delete(cache_key)
+            self._response_versions.pop(cache_key, None)
+            if not (isinstance(response, dict) and response.get("hasNextPage")):
+                return
+            page = response.get("nextPage") or page + 1
+            cache_key = make_cache_key(path, {**kwargs, "page": page})
+
+    def get_indexed(self, path="", **kwargs) -> IndexedResponse:
+        """
+        Same as get_pages, but the docs of all pages are returned indexed by names. The index is built once per
+        response - it's kept until any of the pages is fetched again, even with a cache returning new objects on every
+        get.
+        """
+        pages = self.get_pages(path, **kwargs)
+        return self.response_indexes.get(
+            make_cache_key(path, kwargs),
+            *pages.values(),
+            version=tuple((key, self._response_version(key)) for key in pages),
+        )
 
     def factions(self, **kwargs):
         return self.get_request("factions", **kwargs)
@@ -36,3 +282,194 @@ class EliteBgsClient:
 
     def ticks(self, **kwargs):
         return self.get_request("ticks", **kwargs)
+
+    def iter_pages(
+        self, path="", priority: Optional[int] = None, **kwargs
+    ) -> Iterator[dict]:
+        """
+        Yields consecutive pages of the response, starting from page given in kwargs (first by default). Pages are
+        fetched lazily and are not cached, so only one page is kept in memory at a time.
+        """
+        page = kwargs.pop("page", 1)
+        while page:
+            response = self._send(path, priority=priority, page=page, **kwargs)
+            yield response
+            if not response.get("hasNextPage"):
+                return
+            page = response.get("nextPage") or page + 1
+
+    def iter_docs(self, path="", **kwargs) -> Iterator[dict]:
+        for response in self.iter_pages(path, **kwargs):
+            yield from response.get("docs", [])
+
+    def iter_factions(self, **kwargs) -> Iterator[dict]:
+        return self.iter_docs("factions", **kwargs)
+
+    def iter_stations(self, **kwargs) -> Iterator[dict]:
+        return self.iter_docs("stations", **kwargs)
+
+    def iter_systems(self, **kwargs) -> Iterator[dict]:
+        return self.iter_docs("systems", **kwargs)
+
+    def latest_tick(self):
+        """
+        Returns the time of the latest BGS tick. Always asks the API, the response is never cached.
+        """
+        ticks = self._send("ticks")
+        if not ticks:
+            return None
+        return max(tick["time"] for tick in ticks)
+
+
+class AsyncEliteBgsClient:
+    """
+    Asyncio counterpart of EliteBgsClient.
+
+    It shares the cache of the wrapped synchronous client, so whatever is fetched here is visible to the adapters (and
+    the other way round). Up to max_concurrency requests are sent at the same time, within the rate limit of the API -
+    the requests wait in the scheduler of the wrapped client, so the sync and async calls share one budget.
+    Concurrent calls for the same request wait for a single response, whether they're made here or by the wrapped
+    client.
+
+    Usage:
+    >>> client = AsyncEliteBgsClient(EliteBgsClient())
+    >>> sol, achenar = await asyncio.gather(client.factions(system="Sol"), client.factions(system="Achenar"))
+    """
+
+    def __init__(
+        self,
+        client: EliteBgsClient = None,
+        max_concurrency: int = 4,
+    ):
+        self.client = client if client is not None else EliteBgsClient()
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+        # tasks sending requests, kept so they aren't garbage collected before they finish
+        self._senders = set()
+
+    @classmethod
+    def for_client(cls, client: EliteBgsClient) -> "AsyncEliteBgsClient":
+        """
+        Returns the async client wrapping given client, so all async calls made for it share one rate limit.
+        """
+        async_client = getattr(client, "_async_client", None)
+        if async_client is None:
+            async_client = cls(client)
+            client._async_client = async_client
+        return async_client
+
+    async def get_request(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        cache_key = make_cache_key(path, kwargs)
+        response = self.client.cache.get(cache_key)
+        if response is not NOT_SET:
+            self.client._count_cache_hit(path)
+            return response
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        in_flight, is_sender = self.client._join_in_flight(cache_key, path)
+        if is_sender:
+            sender = asyncio.ensure_future(
+                self._send_in_flight(
+                    in_flight, cache_key, path, priority, timeout, kwargs
+                )
+            )
+            self._senders.add(sender)
+            sender.add_done_callback(self._senders.discard)
+        try:
+            # shielded, so a cancelled call doesn't cancel the response the other calls wait for
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(in_flight)), timeout
+            )
+        except asyncio.TimeoutError:
+            if in_flight.done():
+                raise
+            raise DeadlineExceeded(
+                f"Response to {cache_key} didn't come within {timeout} s."
+            ) from None
+
+    async def _send_in_flight(
+        self, in_flight: Future, cache_key, path, priority, timeout, kwargs
+    ):
+        try:
+            # the previous sender could have finished between the cache lookup and joining
+            response = self.client.cache.get(cache_key)
+            if response is NOT_SET:
+                response = await self._get_request(
+                    path, priority=priority, timeout=timeout, **kwargs
+                )
+            in_flight.set_result(response)
+        except BaseException as e:
+            in_flight.set_exception(e)
+        finally:
+            self.client._leave_in_flight(cache_key)
+
+    async def _get_request(self, path="", priority=None, timeout=None, **kwargs):
+        async with self._semaphore:
+            self.client._count("requests")
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.client._send,
+                    path,
+                    priority=priority,
+                    timeout=timeout,
+                    **kwargs,
+                ),
+            )
+        self.client._store(make_cache_key(path, kwargs), response)
+        return response
+
+    async def get_pages(
+        self,
+        path="",
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Dict[str, dict]:
+        """
+        Asynchronous version of EliteBgsClient.get_pages.
+        """
+        pages = {}
+        response = await self.get_request(
+            path, priority=priority, timeout=timeout, **kwargs
+        )
+        pages[make_cache_key(path, kwargs)] = response
+        while isinstance(response, dict) and response.get("hasNextPage"):
+            page_kwargs = {**kwargs, "page": response.get("nextPage") or len(pages) + 1}
+            response = await self.get_request(
+                path, priority=priority, timeout=timeout, **page_kwargs
+            )
+            pages[make_cache_key(path, page_kwargs)] = response
+        return pages
+
+    async def prefetch(self, planned_requests: Iterable[Tuple[str, dict]]) -> List:
+        """
+        Fetches all pages of given (path, params) requests, the requests concurrently.
+        """
+        return await asyncio.gather(
+            *(self.get_pages(path, **params) for path, params in planned_requests)
+        )
+
+    async def factions(self, **kwargs):
+        return await self.get_request("factions", **kwargs)
+
+    async def stations(self, **kwargs):
+        return await self.get_request("stations", **kwargs)
+
+    async def systems(self, **kwargs):
+        return await self.get_request("systems", **kwargs)
+
+    async def ticks(self, **kwargs):
+        return await self.get_request("ticks", **kwargs)
@@ -14,6 +14,9 @@ class System(AutoRefreshMixin, SystemModel):
         "faction_branches",
         "stations",
         "eddb_id",
+        "x",
+        "y",
+        "z",
     )
 
 
@@ -1,5 +1,11 @@
 import datetime
-from typing import Optional, Any
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+from urllib import parse
 
 _NEVER_EXPIRE = 0  # TODO: this could be obj()
 NOT_SET = object()
@@ -108,3 +114,233 @@ class ExpiringCachedPropertyMixin:
             __dict__[expiration_key] = _NEVER_EXPIRE
 
         return super().__setattr__(key, value)
+
+
+def make_cache_key(path: str, params: dict) -> str:
+    """
+    Normalizes request path and params into a single cache key, so that the same request made with differently ordered
+    keyword arguments hits the same cache entry.
+    """
+    normalized_path = path.strip("/").lower()
+    normalized_params = sorted((str(key), str(value)) for key, value in params.items())
+    return f"{normalized_path}?{parse.urlencode(normalized_params)}"
+
+
+class ResponseCache:
+    """
+    Base class for caches storing api responses.
+
+    Subclasses have to implement get, set, delete and clear. get returns NOT_SET if there is no valid entry for the key.
+    Caches which know when their entries expire should also implement get_entry, so that TieredCache can keep the
+    expiration time when it copies an entry to another tier.
+    """
+
+    ttl_seconds: Optional[float] = None
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def get_entry(self, key: str) -> Tuple[Any, Optional[float]]:
+        """
+        Returns the value together with its expiration timestamp (None if it never expires).
+        """
+        return self.get(key), None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-memory LRU cache with optional expiration time. It's the default cache of the api clients.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self.get_entry(key)[0]
+
+    def get_entry(self, key: str) -> Tuple[Any, Optional[float]]:
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+            except KeyError:
+                return NOT_SET, None
+
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return NOT_SET, None
+
+            self._entries.move_to_end(key)
+            return value, expires_at
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCache(ResponseCache):
+    """
+    Persistent cache keeping responses in a SQLite database, so they survive process restarts.
+
+    Every entry has its own expiration time. When the cache grows over max_entries, the least recently used entries are
+    evicted.
+    """
+
+    DEFAULT_TTL_SECONDS = 60 * 60
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        max_entries: int = 10000,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+
+    def get(self, key: str) -> Any:
+        return self.get_entry(key)[0]
+
+    def get_entry(self, key: str) -> Tuple[Any, Optional[float]]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return NOT_SET, None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return NOT_SET, None
+
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(value), expires_at
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl_seconds if ttl_seconds is not None else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        )
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+        return count
+
+
+class TieredCache(ResponseCache):
+    """
+    Chains several caches, e.g. a small MemoryCache in front of a SqliteCache. Lookups go through the tiers in order and
+    a hit in a lower tier is copied to the tiers above it. The copy expires no later than the entry it was copied from.
+    """
+
+    def __init__(self, *tiers: ResponseCache):
+        self.tiers = tiers
+
+    def get(self, key: str) -> Any:
+        return self.get_entry(key)[0]
+
+    def get_entry(self, key: str) -> Tuple[Any, Optional[float]]:
+        for index, tier in enumerate(self.tiers):
+            value, expires_at = tier.get_entry(key)
+            if value is not NOT_SET:
+                for upper_tier in self.tiers[:index]:
+                    upper_tier.set(
+                        key, value, ttl_seconds=self._ttl_for(upper_tier, expires_at)
+                    )
+                return value, expires_at
+        return NOT_SET, None
+
+    @staticmethod
+    def _ttl_for(tier: ResponseCache, expires_at: Optional[float]) -> Optional[float]:
+        if expires_at is None:
+            return None
+        remaining = expires_at - time.time()
+        if tier.ttl_seconds is None:
+            return remaining
+        return min(remaining, tier.ttl_seconds)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        for tier in self.tiers:
+            tier.set(key, value, ttl_seconds=ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Optional
+
+from .. import metrics
+
+
+class Priority(IntEnum):
+    """
+    Lower value goes first.
+    """
+
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class RateScheduler:
+    """
+    Token bucket keeping the requests within the rate limit of an API.
+
+    The bucket holds up to `burst` tokens (by default `calls`) and gets `calls` new tokens per `period` seconds. Every
+    request takes one token. When there are no tokens left, callers wait in a queue instead of getting an exception.
+    The queue is ordered by priority, so interactive lookups overtake background refreshes. A caller can give a timeout
+    - if it doesn't get a token in time, DeadlineExceeded is raised.
+    """
+
+    def __init__(
+        self,
+        calls: int = 20,
+        period: float = 60,
+        burst: Optional[int] = None,
+    ):
+        self.rate = calls / period
+        self.capacity = burst if burst is not None else calls
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self.stats = {
+            "acquired": 0,
+            "deadline_exceeded": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def acquire(
+        self, priority: int = Priority.INTERACTIVE, timeout: Optional[float] = None
+    ) -> float:
+        """
+        Blocks until a token is available. Returns the number of seconds spent waiting.
+        """
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        waiter = (priority, next(self._counter))
+
+        with self._condition:
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_first = self._waiters[0] == waiter
+                    if is_first and self._tokens >= 1:
+                        self._tokens -= 1
+                        return self._record_wait(now - start)
+
+                    if deadline is not None and now >= deadline:
+                        self.stats["deadline_exceeded"] += 1
+                        raise DeadlineExceeded(
+                            f"No request slot available within {timeout} seconds."
+                        )
+
+                    # only the first waiter knows how long to sleep, the rest wait to be woken up
+                    wait_time = (1 - self._tokens) / self.rate if is_first else None
+                    if deadline is not None:
+                        wait_time = min(wait_time or deadline - now, deadline - now)
+                    self._condition.wait(wait_time)
+            finally:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def _record_wait(self, wait_time: float) -> float:
+        self.stats["acquired"] += 1
+        self.stats["total_wait_seconds"] += wait_time
+        self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait_time)
+        if metrics.registry is not None:
+            metrics.registry.scheduler_wait_seconds.observe(wait_time)
+        return wait_time
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "queue_depth": self.queue_depth,
+            "tokens": self._tokens,
+        }
@@ -0,0 +1,198 @@
+import bz2
+import contextlib
+import gzip
+import json
+import lzma
+import threading
+from collections import defaultdict
+from typing import Any
+from urllib import parse
+
+import requests
+
+from .caching_utils import MemoryCache, make_cache_key
+
+CASSETTE_VERSION = 1
+
+# compression of a cassette is picked by its extension, gzip by default
+_OPENERS = {".xz": lzma.open, ".bz2": bz2.open}
+
+
+def _open_cassette(path: str, mode: str):
+    for extension, opener in _OPENERS.items():
+        if str(path).endswith(extension):
+            return opener(path, mode, encoding="utf-8")
+    return gzip.open(path, mode, encoding="utf-8")
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+class Transport:
+    """
+    Base class for the ways the api clients get responses. Subclasses have to implement get.
+
+    Requests of a transport which isn't rate_limited don't wait for the rate limit of the client.
+    """
+
+    rate_limited = True
+
+    def get(self, api_url: str, path: str, params: dict) -> Any:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class HttpTransport(Transport):
+    """
+    Sends the requests to the API. It's the default transport of the api clients.
+    """
+
+    def __init__(self, session: requests.Session = None):
+        self.session = session if session is not None else requests.Session()
+
+    def get(self, api_url: str, path: str, params: dict) -> Any:
+        response = self.session.get(parse.urljoin(api_url, path), params=params)
+        return response.json()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Gets responses from another transport (HttpTransport by default) and writes every request and its response to a
+    cassette - a compressed file with one compact JSON line per request. The file is compressed with gzip, or with lzma
+    or bz2 when its name ends with .xz or .bz2. Close the transport to finish the file.
+    """
+
+    def __init__(self, path: str, transport: Transport = None):
+        self.path = path
+        self.transport = transport if transport is not None else HttpTransport()
+        self.recorded = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def rate_limited(self):
+        return self.transport.rate_limited
+
+    def get(self, api_url: str, path: str, params: dict) -> Any:
+        response = self.transport.get(api_url, path, params)
+        line = json.dumps(
+            [make_cache_key(path, params), response], separators=(",", ":")
+        )
+        with self._lock:
+            if self._file is None:
+                self._file = _open_cassette(self.path, "wt")
+                self._file.write(json.dumps({"cassette": CASSETTE_VERSION}) + "\n")
+            self._file.write(line + "\n")
+            self.recorded += 1
+        return response
+
+    def finish(self) -> None:
+        """
+        Closes the cassette, leaving the wrapped transport open.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self) -> None:
+        self.finish()
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Serves responses from a cassette written by RecordingTransport, without the network and without the rate limit.
+
+    Responses to the same request are served in the order they were recorded, and the last one is repeated after that.
+    A request which isn't in the cassette raises CassetteMiss.
+    """
+
+    rate_limited = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self._responses = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        with _open_cassette(path, "rt") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("cassette") != CASSETTE_VERSION:
+                raise ValueError(f"{path} is not a cassette.")
+            for line in file:
+                key, response = json.loads(line)
+                self._responses[key].append(response)
+
+    def __len__(self):
+        return sum(len(responses) for responses in self._responses.values())
+
+    def get(self, api_url: str, path: str, params: dict) -> Any:
+        key = make_cache_key(path, params)
+        responses = self._responses.get(key)
+        if not responses:
+            raise CassetteMiss(f"Request {key} is not in cassette {self.path}.")
+        with self._lock:
+            served = self._served[key]
+            self._served[key] = served + 1
+        return responses[min(served, len(responses) - 1)]
+
+    def rewind(self):
+        """
+        Starts serving the responses from the beginning again.
+        """
+        with self._lock:
+            self._served.clear()
+
+
+@contextlib.contextmanager
+def _transport_and_cache(client, transport: Transport):
+    # the block gets a cache of its own, so responses cached earlier don't bypass the transport and responses got in
+    # the block don't outlive it - the original cache is put back untouched
+    previous_transport, previous_cache = client.transport, client.cache
+    client.transport, client.cache = transport, MemoryCache()
+    try:
+        yield transport
+    finally:
+        client.transport, client.cache = previous_transport, previous_cache
+
+
+@contextlib.contextmanager
+def recording(client, path: str):
+    """
+    Records the responses the client gets inside the block to a cassette. The block starts with an empty cache of its
+    own, so responses fetched earlier get into the cassette too; the cache of the client is restored afterwards.
+
+    >>> with recording(ELITE_BGS_CLIENT, "session.jsonl.gz"):
+    ...     run_analysis()
+    """
+    transport = RecordingTransport(path, client.transport)
+    try:
+        with _transport_and_cache(client, transport):
+            yield transport
+    finally:
+        transport.finish()
+
+
+@contextlib.contextmanager
+def replaying(client, path: str):
+    """
+    Serves the responses the client gets inside the block from a cassette. The block gets an empty cache of its own,
+    so the responses really come from the cassette and none of them stays in the cache of the client afterwards.
+
+    >>> with replaying(ELITE_BGS_CLIENT, "session.jsonl.gz"):
+    ...     run_analysis()
+    """
+    with _transport_and_cache(client, ReplayTransport(path)) as transport:
+        yield transport
@@ -1,4 +1,7 @@
-from enum import Enum
+import functools
+from collections.abc import Sequence
+from enum import Enum, IntFlag
+from typing import Iterable, Union
 
 
 class StationType(Enum):
@@ -66,6 +69,117 @@ class StationService(Enum):
     ON_DOCK_MISSION = "ondockmission"
 
 
+# one bit per StationService, in the order of definition
+StationServiceFlag = IntFlag(
+    "StationServiceFlag",
+    {service.name: 1 << bit for bit, service in enumerate(StationService)},
+)
+
+_SERVICE_BITS = {service: 1 << bit for bit, service in enumerate(StationService)}
+_SERVICE_BITS_BY_VALUE = {service.value: bit for service, bit in _SERVICE_BITS.items()}
+
+
+@functools.lru_cache(maxsize=4096)
+def _services_of_mask(mask: int) -> tuple:
+    return tuple(service for service, bit in _SERVICE_BITS.items() if mask & bit)
+
+
+def services_mask(services: Union[Iterable[StationService], int]) -> int:
+    """
+    Returns the bitmask of given services - StationService members, StationServices or a StationServiceFlag.
+    """
+    if isinstance(services, StationServices):
+        return services.mask
+    if isinstance(services, int):
+        return int(services)
+    mask = 0
+    for service in services:
+        mask |= _SERVICE_BITS[service]
+    return mask
+
+
+class StationServices(Sequence):
+    """
+    Services of a station, kept as a bitmask of StationServiceFlag bits.
+
+    It behaves like the list of StationService members it used to be (in the order of their definition), but checking
+    for a service or a set of services is a single integer operation:
+
+    >>> StationService.MISSIONS in station.services
+    True
+    >>> station.services.has_all([StationService.REFUEL, StationService.REPAIR])
+    False
+
+    It compares equal to a list, tuple or set with the same services, in any order.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, services: Union[Iterable[StationService], int] = ()):
+        self.mask = services_mask(services or ())
+
+    @classmethod
+    def from_values(cls, values: Iterable[str]) -> "StationServices":
+        """
+        Builds the services from their values, e.g. "name_lower" of services in Elite BGS API.
+        """
+        mask = 0
+        for value in values:
+            try:
+                mask |= _SERVICE_BITS_BY_VALUE[value]
+            except KeyError:
+                raise ValueError(
+                    f"{value!r} is not a valid {StationService.__qualname__}"
+                ) from None
+        services = cls.__new__(cls)
+        services.mask = mask
+        return services
+
+    @property
+    def flags(self) -> StationServiceFlag:
+        return StationServiceFlag(self.mask)
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __getitem__(self, index):
+        return _services_of_mask(self.mask)[index]
+
+    def __iter__(self):
+        return iter(_services_of_mask(self.mask))
+
+    def __contains__(self, service):
+        # looked up by value - hashing enum members goes through Python code
+        if type(service) is not StationService:
+            return False
+        return self.mask & _SERVICE_BITS_BY_VALUE[service._value_] != 0
+
+    def has_all(self, services: Union[Iterable[StationService], int]) -> bool:
+        mask = services_mask(services)
+        return self.mask & mask == mask
+
+    def has_any(self, services: Union[Iterable[StationService], int]) -> bool:
+        return self.mask & services_mask(services) != 0
+
+    def __eq__(self, other):
+        if isinstance(other, StationServices):
+            return self.mask == other.mask
+        if isinstance(other, (list, tuple, set, frozenset)):
+            if not all(isinstance(service, StationService) for service in other):
+                return False
+            return self.mask == services_mask(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class State(Enum):
     EXPANSION = "expansion"
     BOOM = "boom"
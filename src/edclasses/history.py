@@ -0,0 +1,246 @@
+"""
+Influence and state history of faction branches, kept in typed arrays.
+"""
+
+import functools
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from . import enums
+
+Timestamp = Union[datetime, int, float]
+
+_STATES = list(enums.State)
+_STATE_BITS = {state: 1 << bit for bit, state in enumerate(_STATES)}
+# one bit per state, as long as they fit in 32 bits
+_STATES_TYPECODE = "I" if len(_STATES) <= 32 else "Q"
+
+
+def to_epoch_seconds(timestamp: Timestamp) -> int:
+    """
+    Converts a datetime (naive ones are taken as UTC) or epoch seconds to whole epoch seconds.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(timestamp.timestamp())
+    return int(timestamp)
+
+
+def parse_elite_bgs_time(value: str) -> int:
+    """
+    Converts a time from Elite BGS API (e.g. "2022-01-01T12:00:00.000Z") to epoch seconds.
+    """
+    return to_epoch_seconds(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def _pack_states(states: Iterable[enums.State]) -> int:
+    mask = 0
+    for state in states or ():
+        mask |= _STATE_BITS[state]
+    return mask
+
+
+@functools.lru_cache(maxsize=1024)
+def _states_of_mask(mask: int) -> Tuple[enums.State, ...]:
+    return tuple(state for state in _STATES if mask & _STATE_BITS[state])
+
+
+def _unpack_states(mask: int) -> List[enums.State]:
+    return list(_states_of_mask(mask)) if mask else []
+
+
+class HistorySample(NamedTuple):
+    timestamp: datetime
+    influence: Optional[float]
+    active_states: List[enums.State]
+    pending_states: List[enums.State]
+    recovering_states: List[enums.State]
+
+
+class InfluenceHistory:
+    """
+    Samples of influence and states of one faction branch, sorted by time.
+
+    Every sample takes 20 bytes: epoch seconds and influence (as float32) in two arrays, and each of the three state
+    sets as a bitmask. Samples are turned into HistorySample objects only when they're read.
+
+    Usage:
+    >>> faction_branch.history.add(datetime(2022, 1, 1), 0.35, [enums.State.BOOM])
+    >>> faction_branch.history.range(start=datetime(2021, 12, 1))
+    [HistorySample(timestamp=datetime(2022, 1, 1, tzinfo=timezone.utc), influence=0.3499999940395355, ...)]
+
+    Influence is kept as float32, so it comes back rounded to about 7 significant digits.
+    """
+
+    __slots__ = ("timestamps", "influence", "_active", "_pending", "_recovering")
+
+    def __init__(self):
+        self.timestamps = array("I")
+        self.influence = array("f")
+        self._active = array(_STATES_TYPECODE)
+        self._pending = array(_STATES_TYPECODE)
+        self._recovering = array(_STATES_TYPECODE)
+
+    def _columns(self) -> Tuple[array, ...]:
+        return (
+            self.timestamps,
+            self.influence,
+            self._active,
+            self._pending,
+            self._recovering,
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[HistorySample]:
+        return (self._sample(i) for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+    @staticmethod
+    def _packed(
+        timestamp: Timestamp,
+        influence,
+        active_states=(),
+        pending_states=(),
+        recovering_states=(),
+    ) -> tuple:
+        return (
+            to_epoch_seconds(timestamp),
+            float(influence) if influence is not None else math.nan,
+            _pack_states(active_states),
+            _pack_states(pending_states),
+            _pack_states(recovering_states),
+        )
+
+    def _sample(self, i: int) -> HistorySample:
+        influence = self.influence[i]
+        return HistorySample(
+            timestamp=datetime.fromtimestamp(self.timestamps[i], timezone.utc),
+            influence=None if math.isnan(influence) else influence,
+            active_states=_unpack_states(self._active[i]),
+            pending_states=_unpack_states(self._pending[i]),
+            recovering_states=_unpack_states(self._recovering[i]),
+        )
+
+    def add(
+        self,
+        timestamp: Timestamp,
+        influence,
+        active_states: Iterable[enums.State] = (),
+        pending_states: Iterable[enums.State] = (),
+        recovering_states: Iterable[enums.State] = (),
+    ):
+        """
+        Adds a sample. A sample with the same timestamp (to the second) is replaced.
+        """
+        packed = self._packed(
+            timestamp, influence, active_states, pending_states, recovering_states
+        )
+        position = bisect_left(self.timestamps, packed[0])
+        columns = self._columns()
+        if position < len(self) and self.timestamps[position] == packed[0]:
+            for column, value in zip(columns, packed):
+                column[position] = value
+        elif position == len(self):
+            for column, value in zip(columns, packed):
+                column.append(value)
+        else:
+            for column, value in zip(columns, packed):
+                column.insert(position, value)
+
+    def extend(self, samples: Iterable[tuple]):
+        """
+        Adds many samples at once - tuples of the arguments of add. Much faster than calling add for each of them.
+        """
+        packed = [self._packed(*sample) for sample in samples]
+        if not packed:
+            return
+        existing = zip(*self._columns()) if len(self) else ()
+        # sort is stable, so for equal timestamps the new sample comes last and wins
+        merged = sorted((*existing, *packed), key=lambda sample: sample[0])
+        unique = {sample[0]: sample for sample in merged}
+        for column, values in zip(self._columns(), zip(*unique.values())):
+            del column[:]
+            column.extend(values)
+
+    def clear(self):
+        for column in self._columns():
+            del column[:]
+
+    def _slice(self, start: Optional[Timestamp], end: Optional[Timestamp]) -> slice:
+        first = 0
+        if start is not None:
+            first = bisect_left(self.timestamps, to_epoch_seconds(start))
+        last = len(self)
+        if end is not None:
+            last = bisect_right(self.timestamps, to_epoch_seconds(end))
+        return slice(first, last)
+
+    def range(
+        self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None
+    ) -> List[HistorySample]:
+        """
+        Returns samples between start and end (both inclusive, both optional).
+        """
+        return [self._sample(i) for i in range(len(self))[self._slice(start, end)]]
+
+    def series(
+        self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None
+    ) -> Tuple[array, array]:
+        """
+        Returns epoch seconds and influence between start and end as two arrays, e.g. for charting.
+        """
+        samples = self._slice(start, end)
+        return self.timestamps[samples], self.influence[samples]
+
+    def downsample(
+        self,
+        interval: float,
+        start: Optional[Timestamp] = None,
+        end: Optional[Timestamp] = None,
+    ) -> List[HistorySample]:
+        """
+        Returns one sample per interval (in whole seconds) which has any samples. Its timestamp is the start of the
+        interval, the influence is the mean of the influence in it and the states are the ones of the last sample in it.
+        """
+        if interval < 1:
+            raise ValueError(f"Interval must be at least 1 second, got {interval}")
+        samples = self._slice(start, end)
+        interval = int(interval)
+        downsampled = []
+        bucket = None
+        total = count = 0
+        for i, timestamp, influence in zip(
+            range(samples.start, samples.stop),
+            self.timestamps[samples],
+            self.influence[samples],
+        ):
+            sample_bucket = timestamp - timestamp % interval
+            if sample_bucket != bucket:
+                if bucket is not None:
+                    downsampled.append(self._bucket(bucket, total, count, i - 1))
+                bucket, total, count = sample_bucket, 0.0, 0
+            if influence == influence:  # not NaN
+                total += influence
+                count += 1
+        if bucket is not None:
+            downsampled.append(self._bucket(bucket, total, count, samples.stop - 1))
+        return downsampled
+
+    def _bucket(self, bucket: int, total: float, count: int, last: int):
+        last_sample = self._sample(last)
+        return last_sample._replace(
+            timestamp=datetime.fromtimestamp(bucket, timezone.utc),
+            influence=total / count if count else None,
+        )
+
+    def latest(self) -> Optional[HistorySample]:
+        return self._sample(len(self) - 1) if len(self) else None
@@ -0,0 +1,200 @@
+from typing import Dict, Iterable, List, Optional
+
+from .enums import StationServices
+
+LOOKUPS = ("exact", "in", "contains", "gt", "gte", "lt", "lte")
+# lookups which can be answered by an index
+INDEXED_LOOKUPS = ("exact", "in", "contains")
+
+_MULTI_VALUE_TYPES = (list, tuple, set, frozenset, StationServices)
+
+
+def _index_keys(value) -> tuple:
+    if isinstance(value, _MULTI_VALUE_TYPES):
+        return tuple(value)
+    return (value,)
+
+
+class FieldIndex:
+    """
+    Secondary index of one field - maps values to the objects having them. For fields holding many values (like
+    services or states) every value is indexed separately.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self._keys = {}
+
+    def __contains__(self, obj):
+        return obj in self._keys
+
+    def add(self, obj, value):
+        keys = _index_keys(value)
+        self._keys[obj] = keys
+        for key in keys:
+            self._objects.setdefault(key, {})[obj] = None
+
+    def remove(self, obj):
+        for key in self._keys.pop(obj, ()):
+            objects = self._objects.get(key)
+            if objects is None:
+                continue
+            objects.pop(obj, None)
+            if not objects:
+                del self._objects[key]
+
+    def update(self, obj, value):
+        """
+        Re-indexes the object, if it's in the index.
+        """
+        if obj in self._keys:
+            self.remove(obj)
+            self.add(obj, value)
+
+    def get(self, key) -> dict:
+        return self._objects.get(key, {})
+
+
+class IndexedField:
+    """
+    Data descriptor keeping the FieldIndex of the registry up to date when the field is set. Reads go straight to the
+    attribute it replaced (a slot or the instance __dict__).
+    """
+
+    def __init__(self, name: str, inner=None):
+        self.name = name
+        self.inner = inner
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if self.inner is not None:
+            return self.inner.__get__(obj, owner)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        if self.inner is not None:
+            self.inner.__set__(obj, value)
+            # the setter may store the value converted (e.g. flags as StationServices), the index needs what's stored
+            value = self.inner.__get__(obj, type(obj))
+        else:
+            obj.__dict__[self.name] = value
+
+        update_index = getattr(type(obj).registry, "update_index", None)
+        if update_index is not None:
+            update_index(obj, self.name, value)
+
+
+def parse_lookup(lookup: str):
+    field, _, operator = lookup.partition("__")
+    operator = operator or "exact"
+    if operator not in LOOKUPS:
+        raise ValueError(f"Unknown lookup '{operator}' in '{lookup}'.")
+    return field, operator
+
+
+def peek_value(obj, field):
+    """
+    Returns the stored value of the field, without loading it from the adapter.
+    """
+    descriptor = getattr(type(obj), field, None)
+    get_value = getattr(descriptor, "get_value", None)
+    if get_value is not None:
+        try:
+            return get_value(obj)
+        except AttributeError:
+            return None
+    return getattr(obj, field, None)
+
+
+def _matches(value, operator, target) -> bool:
+    if operator == "exact":
+        return value is target or value == target
+    if operator == "in":
+        return value in target
+    if operator == "contains":
+        return value is not None and target in value
+    if value is None:
+        return False
+    if operator == "gt":
+        return value > target
+    if operator == "gte":
+        return value > target or value == target
+    if operator == "lt":
+        return value < target
+    return value < target or value == target
+
+
+def _get_candidates(cls, field, operator, target) -> Optional[Iterable]:
+    """
+    Returns objects which may match the lookup, or None if no index can answer it.
+    """
+    if operator not in INDEXED_LOOKUPS:
+        return None
+
+    # relations to the parent (e.g. station.system) are indexes themselves
+    if field in cls.indexed_relations and operator in ("exact", "in"):
+        relation = getattr(cls, f"_{field}_relation")
+        targets = (target,) if operator == "exact" else target
+        if None in targets:
+            return None
+        return [child for parent in targets for child in relation.get_children(parent)]
+
+    index = getattr(cls.registry, "indexes", {}).get(field)
+    if index is None:
+        return None
+    if operator == "in":
+        candidates = {}
+        for key in target:
+            candidates.update(index.get(key))
+        return candidates
+    if operator == "contains" or not isinstance(target, _MULTI_VALUE_TYPES):
+        return index.get(target)
+    return None
+
+
+def run_query(cls, **lookups) -> List:
+    """
+    Returns objects of the class matching all the lookups. The smallest set of candidates found in the indexes is
+    checked against the remaining lookups; without any usable index the whole registry is scanned.
+    """
+    filters = [(*parse_lookup(lookup), target) for lookup, target in lookups.items()]
+
+    candidates = None
+    for field, operator, target in filters:
+        indexed = _get_candidates(cls, field, operator, target)
+        if indexed is not None and (
+            candidates is None or len(indexed) < len(candidates)
+        ):
+            candidates = indexed
+    if candidates is None:
+        candidates = list(cls.registry.values())
+
+    return [
+        obj
+        for obj in list(candidates)
+        if isinstance(obj, cls)
+        and all(
+            _matches(peek_value(obj, field), operator, target)
+            for field, operator, target in filters
+        )
+    ]
+
+
+def index_object(indexes: Dict[str, FieldIndex], obj, fields: Iterable[str]):
+    """
+    Adds the object to all indexes of the registry, creating FieldIndex for given fields if they don't have one yet.
+    """
+    for field in fields:
+        if field not in indexes:
+            indexes[field] = FieldIndex()
+    for field, index in indexes.items():
+        index.add(obj, peek_value(obj, field))
+
+
+def unindex_object(indexes: Dict[str, FieldIndex], obj):
+    for index in indexes.values():
+        index.remove(obj)
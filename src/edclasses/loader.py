@@ -0,0 +1,247 @@
+"""
+Loading galaxy dumps into the model classes.
+
+A dump is a JSON-lines file (optionally gzipped) with one Elite BGS document per line - the same documents the API
+returns for systems, factions or stations, e.g. saved from EliteBgsClient.iter_docs.
+"""
+
+import gzip
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from .api_adapters.elite_bgs_adapter import (
+    EliteBgsFactionBranchAdapter,
+    EliteBgsStationAdapter,
+    EliteBgsSystemAdapter,
+)
+from . import enums
+from .models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+
+KINDS = ("systems", "factions", "stations")
+
+
+def open_dump(path: str):
+    with open(path, "rb") as file:
+        is_gzipped = file.read(2) == b"\x1f\x8b"
+    if is_gzipped:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _parse_system(doc: dict) -> tuple:
+    return doc["name"], EliteBgsSystemAdapter.get_system_fields(
+        {"eddb_id": None, **doc}
+    )
+
+
+def _parse_faction(doc: dict) -> tuple:
+    branches = [
+        (
+            faction_presence["system_name"],
+            {
+                "influence": EliteBgsFactionBranchAdapter._get_influence(
+                    faction_presence
+                ),
+                **{
+                    key: EliteBgsFactionBranchAdapter._get_states(faction_presence, key)
+                    for key in ("active_states", "pending_states", "recovering_states")
+                },
+            },
+        )
+        for faction_presence in doc.get("faction_presence", [])
+    ]
+    return doc["name"], branches
+
+
+def _parse_station(doc: dict) -> tuple:
+    try:
+        station_type = enums.StationType(doc["type"])
+    except ValueError:
+        station_type = enums.StationType.STATION
+
+    fields = {
+        "distance_to_arrival": EliteBgsStationAdapter._get_distance_to_arrival(doc),
+        "services": EliteBgsStationAdapter._get_services(doc),
+        "state": EliteBgsStationAdapter._get_state(doc),
+    }
+    return (
+        doc["name"],
+        station_type,
+        doc["system"],
+        doc.get("controlling_minor_faction_cased"),
+        fields,
+    )
+
+
+_PARSERS = {
+    "systems": _parse_system,
+    "factions": _parse_faction,
+    "stations": _parse_station,
+}
+
+
+def parse_chunk(kind: str, lines: List[str]) -> List[tuple]:
+    """
+    Turns lines of a dump into plain tuples, ready to be turned into objects. Runs in the worker processes.
+    """
+    parse = _PARSERS[kind]
+    return [parse(json.loads(line)) for line in lines if line.strip()]
+
+
+def _set_fields(obj, fields: dict):
+    if hasattr(obj, "hydrate"):
+        # auto-refreshed objects get the values marked as fresh
+        obj.hydrate(**fields)
+    else:
+        for field, value in fields.items():
+            setattr(obj, field, value)
+
+
+class Loader:
+    """
+    Streams dumps into the model classes, chunk by chunk, so the memory used doesn't depend on the size of the file.
+
+    With processes > 0 parsing the JSON is spread over a process pool, while the objects are created in this process
+    (that's where the registries are). Relations between the objects of a chunk are linked in bulk.
+
+    Usage:
+    >>> loader = Loader(processes=4)
+    >>> loader.load("factions.jsonl.gz", "factions")
+    >>> loader.load("stations.jsonl.gz", "stations")
+    >>> loader.stats
+    {'records': 81234, 'created': 95012, 'updated': 0, 'seconds': 4.2, 'records_per_second': 19341.4}
+    """
+
+    def __init__(
+        self,
+        system_class=SystemModel,
+        faction_class=FactionModel,
+        faction_branch_class=FactionBranchModel,
+        station_class=OrbitalStationModel,
+        processes: int = 0,
+        chunk_size: int = 1000,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ):
+        self.system_class = system_class
+        self.faction_class = faction_class
+        self.faction_branch_class = faction_branch_class
+        self.station_class = station_class
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.stats = {
+            "records": 0,
+            "created": 0,
+            "updated": 0,
+            "seconds": 0.0,
+            "records_per_second": 0.0,
+        }
+
+    def load(self, path: str, kind: str) -> dict:
+        """
+        Loads a dump of given kind ("systems", "factions" or "stations"). Returns the stats.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}', expected one of {KINDS}.")
+
+        build = getattr(self, f"_build_{kind}")
+        start = time.perf_counter()
+        with open_dump(path) as file:
+            for records in self._parse(kind, file):
+                build(records)
+                self.stats["records"] += len(records)
+                self.stats["seconds"] += time.perf_counter() - start
+                start = time.perf_counter()
+                self.stats["records_per_second"] = self.stats["records"] / max(
+                    self.stats["seconds"], 1e-9
+                )
+                if self.on_progress is not None:
+                    self.on_progress(dict(self.stats))
+        return self.stats
+
+    def _chunks(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        lines = iter(lines)
+        while True:
+            chunk = list(islice(lines, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _parse(self, kind: str, lines: Iterable[str]) -> Iterator[List[tuple]]:
+        if not self.processes:
+            for chunk in self._chunks(lines):
+                yield parse_chunk(kind, chunk)
+            return
+
+        # only a few chunks are submitted ahead, so the file is never read into memory as a whole
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            in_flight = deque()
+            for chunk in self._chunks(lines):
+                in_flight.append(executor.submit(parse_chunk, kind, chunk))
+                if len(in_flight) >= self.processes * 2:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _get_or_create(self, cls, fields: dict = None, **keys):
+        obj = cls.get_from_registry(**keys)
+        if obj is None:
+            obj = cls.create(**keys)
+            self.stats["created"] += 1
+        elif fields:
+            self.stats["updated"] += 1
+        if fields:
+            _set_fields(obj, fields)
+        return obj
+
+    def _build_systems(self, records: List[tuple]):
+        for name, fields in records:
+            self._get_or_create(self.system_class, fields, name=name)
+
+    def _build_factions(self, records: List[tuple]):
+        for faction_name, branches in records:
+            faction = self._get_or_create(self.faction_class, name=faction_name)
+            for system_name, fields in branches:
+                system = self._get_or_create(self.system_class, name=system_name)
+                self._get_or_create(
+                    self.faction_branch_class, fields, faction=faction, system=system
+                )
+
+    def _build_stations(self, records: List[tuple]):
+        controlling_factions = []
+        for name, station_type, system_name, faction_name, fields in records:
+            system = self._get_or_create(self.system_class, name=system_name)
+            station = self.station_class.get_from_registry(name=name, system=system)
+            if station is None:
+                station = self.station_class.create(
+                    name=name, station_type=station_type, system=system
+                )
+                self.stats["created"] += 1
+            else:
+                station.station_type = station_type
+                self.stats["updated"] += 1
+            _set_fields(station, fields)
+
+            faction_branch = None
+            if faction_name:
+                faction = self._get_or_create(self.faction_class, name=faction_name)
+                faction_branch = self._get_or_create(
+                    self.faction_branch_class, faction=faction, system=system
+                )
+            controlling_factions.append((faction_branch, station))
+
+        self.station_class._controlling_faction_relation.link_many(controlling_factions)
+        for faction_branch, station in controlling_factions:
+            if hasattr(station, "hydrate"):
+                station.hydrate(controlling_faction=faction_branch)
+
+
+def load(path: str, kind: str, **kwargs) -> dict:
+    """
+    Shortcut for Loader(**kwargs).load(path, kind).
+    """
+    return Loader(**kwargs).load(path, kind)
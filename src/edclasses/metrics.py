@@ -0,0 +1,337 @@
+"""
+Counters, gauges and histograms of what the library does - requests sent, cache hits, fields loaded.
+
+Metrics are off by default and the hooks cost a single None check then. Turn them on with enable:
+
+>>> from edclasses import metrics
+>>> registry = metrics.enable()
+>>> ...
+>>> print(registry.to_prometheus())
+"""
+
+import contextlib
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# the registry hooks record to, None when metrics are disabled
+registry: Optional["MetricsRegistry"] = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _check(self, label_values: tuple):
+        if len(label_values) != len(self.labels):
+            raise ValueError(
+                f"{self.name} takes labels {self.labels}, got {label_values}."
+            )
+
+    def _labels_dict(self, label_values: tuple) -> Dict[str, str]:
+        return dict(zip(self.labels, map(str, label_values)))
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[Sample]:
+        for label_values, value in list(self._values.items()):
+            yield self.name, self._labels_dict(label_values), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        self._check(label_values)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value which goes up and down. Instead of setting it, a function can be given, which is called on every collection.
+    """
+
+    type = "gauge"
+
+    def set(self, value: float, *label_values):
+        self._check(label_values)
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        self._check(label_values)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set_function(self, function: Callable[[], float], *label_values):
+        self.set(function, *label_values)
+
+    def value(self, *label_values) -> float:
+        value = super().value(*label_values)
+        return value() if callable(value) else value
+
+    def samples(self) -> Iterator[Sample]:
+        for name, labels, value in super().samples():
+            yield name, labels, value() if callable(value) else value
+
+
+class Histogram(Metric):
+    """
+    Counts observed values (e.g. seconds) in buckets, and keeps their sum and count.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values):
+        self._check(label_values)
+        with self._lock:
+            observed = self._values.get(label_values)
+            if observed is None:
+                # counts per bucket (the last one is +Inf), sum
+                observed = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            observed[0][bisect_left(self.buckets, value)] += 1
+            observed[1] += value
+
+    def count(self, *label_values) -> int:
+        observed = self._values.get(label_values)
+        return sum(observed[0]) if observed else 0
+
+    def sum(self, *label_values) -> float:
+        observed = self._values.get(label_values)
+        return observed[1] if observed else 0.0
+
+    def value(self, *label_values) -> float:
+        return self.sum(*label_values)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [
+                (label_values, list(counts), total)
+                for label_values, (counts, total) in self._values.items()
+            ]
+        for label_values, counts, total in values:
+            labels = self._labels_dict(label_values)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {
+                    **labels,
+                    "le": _format_value(bound),
+                }, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    Metrics recorded by the library, plus any registered by the user:
+
+    - edclasses_client_requests_total, edclasses_client_request_errors_total and edclasses_client_request_seconds per
+      endpoint - requests sent to the API,
+    - edclasses_client_cache_hits_total and edclasses_client_coalesced_total per endpoint - requests served by the
+      cache or by a request sent by another thread at the same time,
+    - edclasses_client_in_flight_requests - requests being sent right now,
+    - edclasses_scheduler_wait_seconds - time requests waited for the rate limit,
+    - edclasses_field_loads_total, edclasses_field_load_errors_total and edclasses_field_load_seconds per model and
+      field - refreshed fields loaded by the adapters,
+    - edclasses_registry_objects per model - see track_registries.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.requests = self.counter(
+            "edclasses_client_requests_total",
+            "Requests sent to the API.",
+            ["endpoint"],
+        )
+        self.request_errors = self.counter(
+            "edclasses_client_request_errors_total",
+            "Requests to the API which failed.",
+            ["endpoint"],
+        )
+        self.request_seconds = self.histogram(
+            "edclasses_client_request_seconds",
+            "Time of requests to the API, waiting for the rate limit included.",
+            ["endpoint"],
+        )
+        self.cache_hits = self.counter(
+            "edclasses_client_cache_hits_total",
+            "Requests served by the client cache.",
+            ["endpoint"],
+        )
+        self.coalesced = self.counter(
+            "edclasses_client_coalesced_total",
+            "Requests which waited for the same request sent by another caller.",
+            ["endpoint"],
+        )
+        self.in_flight = self.gauge(
+            "edclasses_client_in_flight_requests",
+            "Requests being sent to the API.",
+        )
+        self.scheduler_wait_seconds = self.histogram(
+            "edclasses_scheduler_wait_seconds",
+            "Time requests waited for the rate limit.",
+        )
+        self.field_loads = self.counter(
+            "edclasses_field_loads_total",
+            "Refreshed fields loaded by the adapters.",
+            ["model", "field"],
+        )
+        self.field_load_errors = self.counter(
+            "edclasses_field_load_errors_total",
+            "Refreshed fields the adapters failed to load.",
+            ["model", "field"],
+        )
+        self.field_load_seconds = self.histogram(
+            "edclasses_field_load_seconds",
+            "Time the adapters took to load a refreshed field.",
+            ["model", "field"],
+        )
+        self.registry_objects = self.gauge(
+            "edclasses_registry_objects",
+            "Objects in the registry of a model class.",
+            ["model"],
+        )
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labels != metric.labels:
+                raise ValueError(
+                    f"Metric {metric.name} is already registered with another type or labels."
+                )
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    @contextlib.contextmanager
+    def field_load(self, model: str, field: str):
+        """
+        Records the adapter loading a refreshed field inside the block.
+        """
+        self.field_loads.inc(model, field)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.field_load_errors.inc(model, field)
+            raise
+        finally:
+            self.field_load_seconds.observe(time.perf_counter() - start, model, field)
+
+    def track_registries(self, *classes):
+        """
+        Reports the number of objects in the registries of given model classes.
+        """
+        for cls in classes:
+            self.registry_objects.set_function(
+                lambda cls=cls: len(cls.registry), cls.__name__
+            )
+
+    def clear(self):
+        for metric in self.metrics.values():
+            if metric is not self.registry_objects:
+                metric.clear()
+
+    def samples(self) -> Iterator[Sample]:
+        for metric in list(self.metrics.values()):
+            yield from metric.samples()
+
+    def export(self, callback: Callable[[str, Dict[str, str], float], None]):
+        """
+        Calls callback(name, labels, value) for every sample, e.g. to push them to StatsD.
+        """
+        for name, labels, value in self.samples():
+            callback(name, labels, value)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns all metrics in Prometheus text exposition format.
+        """
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    formatted_labels = ",".join(
+                        f'{label}="{_escape(label_value)}"'
+                        for label, label_value in labels.items()
+                    )
+                    name = f"{name}{{{formatted_labels}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def enable(metrics_registry: MetricsRegistry = None) -> MetricsRegistry:
+    """
+    Starts recording metrics to given registry (a new one by default) and returns it.
+    """
+    global registry
+    registry = metrics_registry if metrics_registry is not None else MetricsRegistry()
+    return registry
+
+
+def disable():
+    global registry
+    registry = None
+
+
+def endpoint_of(path: str) -> str:
+    return path.strip("/") or "/"
@@ -1,13 +1,19 @@
+import math
+import sys
+import time
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from . import enums
-from .utils import UniqueInstanceMixin, OneToManyRelation
+from .history import InfluenceHistory
+from .indexes import IndexedField
+from .utils import UniqueInstanceMixin, OneToManyRelation, InstanceRegistry
 
 
-class SystemModel(UniqueInstanceMixin):
+class BaseSystemModel(UniqueInstanceMixin):
+    __slots__ = ("name", "eddb_id", "x", "y", "z")
     keys = ("name",)
-    registry = {}
+    watched_fields = ("x", "y", "z")
     _stations_relation = OneToManyRelation.create(
         parent_class_name="System",
         child_class_name="OrbitalStation",
@@ -23,10 +29,16 @@ class SystemModel(UniqueInstanceMixin):
         stations=None,
         faction_branches=None,
         eddb_id=None,
+        x: float = None,
+        y: float = None,
+        z: float = None,
         **kwargs,
     ):
         self.eddb_id = eddb_id
         self.name = name
+        self.x = x
+        self.y = y
+        self.z = z
         self.stations = stations or []
         self.faction_branches = faction_branches or []
         super().__init__()
@@ -34,6 +46,19 @@ class SystemModel(UniqueInstanceMixin):
     def __repr__(self):
         return f"System '{self.name}'"
 
+    @property
+    def coordinates(self) -> Optional[Tuple[float, float, float]]:
+        """
+        Galactic coordinates of the system in light years, None if they aren't known.
+        """
+        x, y, z = self.x, self.y, self.z
+        if x is None or y is None or z is None:
+            return None
+        return x, y, z
+
+    def distance_to(self, other: "BaseSystemModel") -> float:
+        return math.dist(self.coordinates, other.coordinates)
+
     def _stations_setter(self, value):
         self._stations_relation.set_for_parent(self, value)
 
@@ -56,9 +81,9 @@ class SystemModel(UniqueInstanceMixin):
     )
 
 
-class FactionModel(UniqueInstanceMixin):
+class BaseFactionModel(UniqueInstanceMixin):
+    __slots__ = ("name",)
     keys = ("name",)
-    registry = {}
 
     _faction_branches_relation = OneToManyRelation.create(
         parent_class_name="Faction",
@@ -88,12 +113,29 @@ class FactionModel(UniqueInstanceMixin):
     )
 
 
-class FactionBranchModel(UniqueInstanceMixin):
+class BaseFactionBranchModel(UniqueInstanceMixin):
+    __slots__ = (
+        "is_main",
+        "influence",
+        "active_states",
+        "pending_states",
+        "recovering_states",
+        "_history",
+    )
     keys = (
         "faction",
         "system",
     )
-    registry = {}
+    indexed_fields = (
+        "active_states",
+        "pending_states",
+        "recovering_states",
+    )
+    indexed_relations = (
+        "faction",
+        "system",
+    )
+    watched_fields = ("influence",)
 
     _system_relation = OneToManyRelation.create(
         parent_class_name="System",
@@ -110,8 +152,8 @@ class FactionBranchModel(UniqueInstanceMixin):
 
     def __init__(
         self,
-        faction: FactionModel,
-        system: SystemModel,
+        faction: BaseFactionModel,
+        system: BaseSystemModel,
         is_main: bool = False,
         influence: Decimal = None,
         stations: List = None,
@@ -133,6 +175,29 @@ class FactionBranchModel(UniqueInstanceMixin):
     def __repr__(self):
         return f"{self.faction} in {self.system}"
 
+    @property
+    def history(self) -> InfluenceHistory:
+        """
+        Influence and states of the faction branch over time. Empty until samples are added or loaded.
+        """
+        try:
+            return self._history
+        except AttributeError:
+            self._history = InfluenceHistory()
+            return self._history
+
+    def record_history(self, timestamp=None):
+        """
+        Adds the current influence and states to the history, as a sample taken at timestamp (now by default).
+        """
+        self.history.add(
+            timestamp if timestamp is not None else time.time(),
+            self.influence,
+            self.active_states,
+            self.pending_states,
+            self.recovering_states,
+        )
+
     def _system_setter(self, value):
         self._system_relation.set_for_child(self, value)
 
@@ -167,12 +232,26 @@ class FactionBranchModel(UniqueInstanceMixin):
     )
 
 
-class OrbitalStationModel(UniqueInstanceMixin):
+class BaseOrbitalStationModel(UniqueInstanceMixin):
+    __slots__ = (
+        "name",
+        "station_type",
+        "distance_to_arrival",
+        "_services",
+        "state",
+    )
     keys = (
         "name",
         "system",
     )
-    registry = {}
+    indexed_fields = (
+        "station_type",
+        "services",
+    )
+    indexed_relations = (
+        "system",
+        "controlling_faction",
+    )
     _system_relation = OneToManyRelation.create(
         parent_class_name="System",
         child_class_name="OrbitalStation",
@@ -187,7 +266,7 @@ class OrbitalStationModel(UniqueInstanceMixin):
         self,
         name: str,
         station_type: enums.StationType,
-        system: SystemModel,
+        system: BaseSystemModel,
         distance_to_arrival: Optional[Decimal] = None,
         services: Optional[List] = None,
         controlling_faction=None,
@@ -198,7 +277,7 @@ class OrbitalStationModel(UniqueInstanceMixin):
         self.station_type = station_type
         self.system = system
         self.distance_to_arrival = distance_to_arrival
-        self.services = services or []
+        self.services = services
         self.controlling_faction = None or controlling_faction
         self.state = state
         super().__init__()
@@ -206,6 +285,19 @@ class OrbitalStationModel(UniqueInstanceMixin):
     def __repr__(self):
         return f"{self.station_type.value.title()} '{self.name}'"
 
+    def _services_setter(self, value):
+        if not isinstance(value, enums.StationServices):
+            value = enums.StationServices(value)
+        self._services = value
+
+    def _services_getter(self):
+        return self._services
+
+    services = property(
+        fget=_services_getter,
+        fset=_services_setter,
+    )
+
     def _system_setter(self, value):
         self._system_relation.set_for_child(self, value)
 
@@ -242,3 +334,103 @@ class OrbitalStationModel(UniqueInstanceMixin):
     @property
     def max_landing_pad(self):
         return self.landing_pads_map.get(self.station_type, enums.LandingPadSizes.LARGE)
+
+
+class SystemModel(BaseSystemModel):
+    registry = InstanceRegistry()
+
+
+class FactionModel(BaseFactionModel):
+    registry = InstanceRegistry()
+
+
+class FactionBranchModel(BaseFactionBranchModel):
+    registry = InstanceRegistry()
+
+
+class OrbitalStationModel(BaseOrbitalStationModel):
+    registry = InstanceRegistry()
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _to_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _to_tuple(value) -> tuple:
+    return tuple(value or ())
+
+
+class _Converted:
+    """
+    Data descriptor converting values before they are stored, so the compact form is kept whichever way the field is
+    set - by the constructor, a loader or a refresh. It stores them with the descriptor of the base class (a slot or a
+    property), the indexes of the field are added on top of it.
+    """
+
+    def __init__(self, base, name: str, convert):
+        inner = getattr(base, name)
+        self.inner = inner.inner if isinstance(inner, IndexedField) else inner
+        self.convert = convert
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.inner.__get__(obj, owner)
+
+    def __set__(self, obj, value):
+        self.inner.__set__(obj, self.convert(value))
+
+
+class CompactSystemModel(BaseSystemModel):
+    """
+    Memory-saving version of SystemModel - no instance __dict__ and interned names.
+    """
+
+    __slots__ = ()
+    registry = InstanceRegistry()
+    name = _Converted(BaseSystemModel, "name", _intern)
+    x = _Converted(BaseSystemModel, "x", _to_float)
+    y = _Converted(BaseSystemModel, "y", _to_float)
+    z = _Converted(BaseSystemModel, "z", _to_float)
+
+
+class CompactFactionModel(BaseFactionModel):
+    """
+    Memory-saving version of FactionModel - no instance __dict__ and interned names.
+    """
+
+    __slots__ = ()
+    registry = InstanceRegistry()
+    name = _Converted(BaseFactionModel, "name", _intern)
+
+
+class CompactFactionBranchModel(BaseFactionBranchModel):
+    """
+    Memory-saving version of FactionBranchModel - no instance __dict__, influence kept as float and states as tuples.
+    """
+
+    __slots__ = ()
+    registry = InstanceRegistry()
+    influence = _Converted(BaseFactionBranchModel, "influence", _to_float)
+    active_states = _Converted(BaseFactionBranchModel, "active_states", _to_tuple)
+    pending_states = _Converted(BaseFactionBranchModel, "pending_states", _to_tuple)
+    recovering_states = _Converted(
+        BaseFactionBranchModel, "recovering_states", _to_tuple
+    )
+
+
+class CompactOrbitalStationModel(BaseOrbitalStationModel):
+    """
+    Memory-saving version of OrbitalStationModel - no instance __dict__, interned names and distance kept as float.
+    """
+
+    __slots__ = ()
+    registry = InstanceRegistry()
+    name = _Converted(BaseOrbitalStationModel, "name", _intern)
+    distance_to_arrival = _Converted(
+        BaseOrbitalStationModel, "distance_to_arrival", _to_float
+    )
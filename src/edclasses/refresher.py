@@ -0,0 +1,332 @@
+import contextlib
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .commons.caching_utils import make_cache_key
+from .commons.rate_scheduler import Priority
+from .utils import AutoRefreshMixin, enable_thread_safety
+
+
+class _ReadCounter:
+    """
+    Reads of the objects counted by one thread. Only that thread writes to counts, the refresher swaps the dict.
+    """
+
+    __slots__ = ("thread", "counts")
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.counts = {}
+
+
+class BackgroundRefresher:
+    """
+    Refreshes auto-refreshed fields in a background thread, before they expire, so readers never wait for the API.
+
+    Fields are picked from a queue ordered by expiration date. Fields expiring within lead_seconds are refreshed, the
+    most often read objects first. A field which has expired anyway is still returned right away (stale while
+    revalidate) and its object jumps the queue - unless it has been stale for longer than max_stale_seconds (as long as
+    the fields would be fresh without the refresher, by default), then the reader loads it as usual, so a stalled
+    refresher doesn't serve old data forever. Fields never loaded are always loaded by the reader.
+
+    Requests are sent with background priority, so interactive ones overtake them in the rate scheduler, and a cycle
+    sends at most budget_fraction of the requests the client's rate limit allows in interval_seconds.
+
+    The refresher thread changes values and relations while other threads read them, so start turns on the thread
+    safety of the registries and relations (see enable_thread_safety). Reads of fresh fields don't take any lock -
+    every thread counts its reads on its own.
+
+    Usage:
+    >>> refresher = BackgroundRefresher()
+    >>> refresher.start(System, Faction, FactionBranch, OrbitalStation)
+    >>> ...
+    >>> refresher.stop()
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 5,
+        lead_seconds: float = 60,
+        budget_fraction: float = 0.5,
+        max_stale_seconds: Optional[float] = (
+            AutoRefreshMixin.EXPIRATION_TIME_MINUTES * 60
+        ),
+        retry_seconds: float = 30,
+    ):
+        self.interval_seconds = interval_seconds
+        self.lead_seconds = lead_seconds
+        self.budget_fraction = budget_fraction
+        self.max_stale_seconds = max_stale_seconds
+        self.retry_seconds = retry_seconds
+        self.classes = []
+        # (due date, tie breaker, object, field), possibly outdated - checked against _scheduled when popped
+        self._queue = []
+        self._scheduled = {}
+        self._counter = itertools.count()
+        # reads counted by the refresher, halved every cycle, so the priorities follow what's read now
+        self._reads = Counter()
+        # _ReadCounter of every thread which has read a field, and counts taken from them a cycle ago
+        self._read_counters = []
+        self._retired_reads = []
+        self._local = threading.local()
+        self._stale = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.stats = Counter()
+
+    def install(self, *classes):
+        for cls in classes:
+            cls.background_refresher = self
+            if cls not in self.classes:
+                self.classes.append(cls)
+            for obj in list(cls.registry.values()):
+                if isinstance(obj, cls):
+                    for field, expires_at in list(obj._expiration_registry.items()):
+                        if expires_at != math.inf:
+                            self.schedule(obj, field, expires_at)
+
+    def uninstall(self):
+        for cls in self.classes:
+            cls.background_refresher = None
+        self.classes = []
+        with self._lock:
+            self._queue.clear()
+            self._scheduled.clear()
+            self._reads.clear()
+            for read_counter in self._read_counters:
+                read_counter.counts = {}
+            self._retired_reads = []
+            self._stale.clear()
+
+    def start(self, *classes) -> "BackgroundRefresher":
+        enable_thread_safety()
+        self.install(*classes)
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="BackgroundRefresher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.uninstall()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.run_once()
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+
+    # called by AutoRefreshMixin
+
+    def schedule(self, obj, field: str, expires_at: float):
+        with self._lock:
+            self._push(obj, field, expires_at)
+
+    def _push(self, obj, field: str, due_at: float):
+        self._scheduled[obj, field] = due_at
+        heapq.heappush(self._queue, (due_at, next(self._counter), obj, field))
+
+    def is_expired(self, obj, field: str, expires_at: Optional[float]) -> bool:
+        # the hot path - only this thread writes to its counts, so no lock is needed
+        try:
+            counts = self._local.read_counter.counts
+        except AttributeError:
+            counts = self._add_read_counter().counts
+        counts[obj] = counts.get(obj, 0) + 1
+        if expires_at is None:
+            return True
+        now = time.monotonic()
+        if expires_at > now:
+            return False
+        if (
+            self.max_stale_seconds is not None
+            and now - expires_at > self.max_stale_seconds
+        ):
+            return True
+        with self._lock:
+            self.stats["stale_reads"] += 1
+            is_new = obj not in self._stale
+            if is_new:
+                self._stale[obj] = None
+        if is_new:
+            self._wakeup.set()
+        return False
+
+    def _add_read_counter(self) -> _ReadCounter:
+        read_counter = self._local.read_counter = _ReadCounter()
+        with self._lock:
+            self._read_counters.append(read_counter)
+        return read_counter
+
+    def _read_count(self, obj) -> int:
+        """
+        Returns the number of recent reads of the object, counting those not collected from the threads yet.
+        """
+        with self._lock:
+            read_counters = list(self._read_counters)
+        return (
+            self._reads[obj]
+            + sum(counts.get(obj, 0) for counts in self._retired_reads)
+            + sum(read_counter.counts.get(obj, 0) for read_counter in read_counters)
+        )
+
+    def _collect_reads(self):
+        """
+        Adds up the reads counted by the threads, halving the older ones first. Counts of the threads are swapped for
+        new dicts and added up a cycle later, when no reader which got the old dict just before the swap writes to it.
+        """
+        with self._lock:
+            read_counters = list(self._read_counters)
+            # threads which are gone don't count anymore, their last counts are retired below
+            self._read_counters = [
+                read_counter
+                for read_counter in read_counters
+                if read_counter.thread.is_alive()
+            ]
+        for obj, reads in list(self._reads.items()):
+            if reads > 1:
+                self._reads[obj] = reads // 2
+            else:
+                del self._reads[obj]
+        for counts in self._retired_reads:
+            self._reads.update(counts)
+        self._retired_reads = []
+        for read_counter in read_counters:
+            self._retired_reads.append(read_counter.counts)
+            read_counter.counts = {}
+
+    # refreshing
+
+    def _budget(self, client) -> int:
+        scheduler = client.scheduler
+        return max(
+            1, int(scheduler.rate * self.interval_seconds * self.budget_fraction)
+        )
+
+    def _take_due(self) -> Dict[object, List[Tuple[float, str]]]:
+        """
+        Pops fields expiring soon from the queue, grouped by object.
+        """
+        due = {}
+        horizon = time.monotonic() + self.lead_seconds
+        with self._lock:
+            while self._queue and self._queue[0][0] <= horizon:
+                due_at, _, obj, field = heapq.heappop(self._queue)
+                if self._scheduled.get((obj, field)) != due_at:
+                    # scheduled again since
+                    continue
+                del self._scheduled[obj, field]
+                registry = type(obj).registry
+                if (
+                    field not in obj._expiration_registry
+                    or registry.get(obj._registry_key) is not obj
+                ):
+                    # expired by hand (the reader loads it) or deleted
+                    continue
+                due.setdefault(obj, []).append((due_at, field))
+        return due
+
+    def _prioritized(self, due: dict) -> List:
+        with self._lock:
+            stale = set(self._stale)
+        reads = {obj: self._read_count(obj) for obj in due}
+        return sorted(
+            due,
+            key=lambda obj: (
+                obj not in stale,
+                -reads[obj],
+                min(due_at for due_at, _ in due[obj]),
+            ),
+        )
+
+    def _refresh(self, obj, fields: List[str]):
+        for field in fields:
+            try:
+                value = obj._load_refreshed_value(field)
+            except Exception:
+                self.stats["errors"] += 1
+                self.schedule(obj, field, time.monotonic() + self.retry_seconds)
+                continue
+            # _set_refreshed_value schedules the next refresh
+            obj._set_refreshed_value(field, value)
+            self.stats["refreshed_fields"] += 1
+        with self._lock:
+            self._stale.pop(obj, None)
+
+    def run_once(self) -> int:
+        """
+        Refreshes fields due now, as far as the budget allows. Returns the number of requests sent.
+        """
+        due = self._take_due()
+        budgets = {}
+        planned_requests = {}
+        to_refresh = []
+        postponed = []
+
+        for obj in self._prioritized(due):
+            fields = [field for _, field in due[obj]]
+            client = obj.adapter.client
+            budget = budgets.setdefault(id(client), self._budget(client))
+            requests = {
+                (id(client), make_cache_key(path, params)): (client, path, params)
+                for field in fields
+                for path, params in obj.adapter.requests_for(obj, field)
+            }
+            new_requests = [key for key in requests if key not in planned_requests]
+            if len(new_requests) > budget:
+                postponed.append(obj)
+                continue
+            budgets[id(client)] = budget - len(new_requests)
+            planned_requests.update(requests)
+            to_refresh.append((obj, fields))
+
+        responses = defaultdict(dict)
+        for client, path, params in planned_requests.values():
+            # the cached response is the one being refreshed
+            client.forget_pages(path, **params)
+            try:
+                responses[client].update(
+                    client.get_pages(path, priority=Priority.BACKGROUND, **params)
+                )
+            except Exception:
+                self.stats["errors"] += 1
+
+        with contextlib.ExitStack() as stack:
+            # the responses are kept for the cycle, the cache could evict them before all fields are refreshed
+            for client, client_responses in responses.items():
+                stack.enter_context(client.pinned(client_responses))
+            for obj, fields in to_refresh:
+                self._refresh(obj, fields)
+
+        with self._lock:
+            for obj in postponed:
+                for due_at, field in due[obj]:
+                    self._push(obj, field, due_at)
+        self._collect_reads()
+
+        self.stats["cycles"] += 1
+        self.stats["requests"] += len(planned_requests)
+        return len(planned_requests)
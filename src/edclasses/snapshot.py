@@ -0,0 +1,443 @@
+"""
+Saving the whole model graph to a file and loading it back, so a process can start with warm registries instead of
+rebuilding them from the API or from dumps.
+
+File layout (little endian):
+- header: magic, version, number of strings, number of tables,
+- string table: (count + 1) u64 offsets followed by UTF-8 data - every name, enum and class path is stored once,
+- tables, one per class: class path, field names, the tick of the class's tick watcher (a tagged value, none without
+  a watcher), (rows + 1) u64 offsets followed by the rows.
+
+Each row holds the tagged values of the fields and the expiration dates of loaded refreshed fields (as wall-clock
+timestamps, so they survive the restart). Fields valid until the next tick are only kept fresh if the same tick is
+still the latest one when they're loaded. Offsets let a row be decoded straight from the memory-mapped file, without
+parsing anything before it.
+
+Classes named in a snapshot are only looked up in the modules already imported, and have to be model classes (or
+enums, for the values) - loading a snapshot never imports or calls anything else. Values of other types can't be
+saved.
+"""
+
+import math
+import mmap
+import struct
+import sys
+import time
+from decimal import Decimal
+from enum import Enum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .enums import StationServices
+from .indexes import peek_value
+from .models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+from .utils import UniqueInstanceMixin
+
+MAGIC = b"EDCSNAP1"
+VERSION = 2
+DEFAULT_CLASSES = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+_HEADER = struct.Struct("<8sIII")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_REF = struct.Struct("<II")
+_EXPIRATION = struct.Struct("<Id")
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _DECIMAL, _STR, _ENUM, _LIST, _TUPLE, _REF_TAG = (
+    range(11)
+)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class Reference(NamedTuple):
+    """
+    Reference to a row of another table, returned when rows are read without building the objects.
+    """
+
+    table: int
+    row: int
+
+
+def _class_path(cls) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_class(path: str, base: type):
+    """
+    Returns the class with given path, which has to be a subclass of base defined in an imported module - a snapshot
+    can't make the reader import or call anything else.
+    """
+    module_name, _, qualname = path.partition(":")
+    obj = sys.modules.get(module_name)
+    if obj is None:
+        raise SnapshotError(f"Module {module_name} of {path} is not imported.")
+    for name in qualname.split("."):
+        obj = getattr(obj, name, None)
+    if not isinstance(obj, type) or not issubclass(obj, base):
+        raise SnapshotError(f"{path} is not a subclass of {base.__name__}.")
+    return obj
+
+
+def _saved_fields(cls) -> List[str]:
+    """
+    Returns the fields needed to rebuild objects of the class: the keys, the public slots, the indexed fields and the
+    parents of relations. Children of relations are rebuilt from the parent side.
+    """
+    fields = list(cls.keys)
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        for slot in (slots,) if isinstance(slots, str) else slots:
+            # private slots are kept by the registries and the mixins, or hide behind properties
+            if slot.startswith("_") or slot in fields:
+                continue
+            fields.append(slot)
+    for field in (
+        *getattr(cls, "indexed_fields", ()),
+        *getattr(cls, "indexed_relations", ()),
+    ):
+        if field not in fields:
+            fields.append(field)
+    return fields
+
+
+class _Writer:
+    def __init__(self):
+        self.strings = {}
+
+    def string(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def encode(self, value, refs: Dict[int, Tuple[int, int]], out: bytearray):
+        if value is None:
+            out.append(_NONE)
+        elif value is True or value is False:
+            out.append(_TRUE if value else _FALSE)
+        elif isinstance(value, Enum):
+            out.append(_ENUM)
+            out += _U32.pack(self.string(_class_path(type(value))))
+            self.encode(value.value, refs, out)
+        elif isinstance(value, int):
+            out.append(_INT)
+            out += _I64.pack(value)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, Decimal):
+            out.append(_DECIMAL)
+            out += _U32.pack(self.string(str(value)))
+        elif isinstance(value, str):
+            out.append(_STR)
+            out += _U32.pack(self.string(value))
+        elif isinstance(value, (list, tuple, StationServices)):
+            out.append(_LIST if isinstance(value, list) else _TUPLE)
+            out += _U32.pack(len(value))
+            for item in value:
+                self.encode(item, refs, out)
+        elif id(value) in refs:
+            out.append(_REF_TAG)
+            out += _REF.pack(*refs[id(value)])
+        elif isinstance(value, UniqueInstanceMixin):
+            # an object which isn't saved (e.g. evicted from its registry) can't be referenced
+            out.append(_NONE)
+        else:
+            raise SnapshotError(
+                f"Values of type {type(value).__name__} can't be saved."
+            )
+
+
+def _wall_clock_expirations(obj) -> List[Tuple[str, float]]:
+    expiration_registry = getattr(obj, "_expiration_registry", None) or {}
+    now_monotonic, now = time.monotonic(), time.time()
+    return [
+        (
+            field,
+            math.inf if math.isinf(expires_at) else now + expires_at - now_monotonic,
+        )
+        for field, expires_at in expiration_registry.items()
+    ]
+
+
+def _current_tick(cls):
+    tick_watcher = getattr(cls, "tick_watcher", None)
+    return tick_watcher.current_tick if tick_watcher is not None else None
+
+
+def save(path: str, classes: Iterable = DEFAULT_CLASSES) -> int:
+    """
+    Saves all objects registered in the registries of given classes. Objects may only reference objects of classes
+    listed before them. Returns the number of saved objects.
+    """
+    classes = list(classes)
+    writer = _Writer()
+
+    # grouped by the actual class of each object, so System and SystemModel sharing a registry are both kept
+    tables = []
+    refs = {}
+    seen_registries = set()
+    for cls in classes:
+        if id(cls.registry) in seen_registries:
+            continue
+        seen_registries.add(id(cls.registry))
+        by_class = {}
+        for obj in list(cls.registry.values()):
+            by_class.setdefault(type(obj), []).append(obj)
+        for obj_class, objects in by_class.items():
+            table_index = len(tables)
+            for row, obj in enumerate(objects):
+                refs[id(obj)] = (table_index, row)
+            tables.append((obj_class, _saved_fields(obj_class), objects))
+
+    encoded_tables = []
+    for obj_class, fields, objects in tables:
+        offsets = [0]
+        data = bytearray()
+        for obj in objects:
+            for field in fields:
+                try:
+                    writer.encode(peek_value(obj, field), refs, data)
+                except SnapshotError as e:
+                    raise SnapshotError(f"{obj_class.__name__}.{field}: {e}") from None
+            expirations = _wall_clock_expirations(obj)
+            data += _U16.pack(len(expirations))
+            for field, expires_at in expirations:
+                data += _EXPIRATION.pack(writer.string(field), expires_at)
+            offsets.append(len(data))
+        header = bytearray()
+        header += _U32.pack(writer.string(_class_path(obj_class)))
+        header += _U32.pack(len(fields))
+        for field in fields:
+            header += _U32.pack(writer.string(field))
+        writer.encode(_current_tick(obj_class), refs, header)
+        header += _U32.pack(len(objects))
+        encoded_tables.append((header, offsets, data))
+
+    strings = [value.encode("utf-8") for value in writer.strings]
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(strings), len(encoded_tables)))
+        position = 0
+        string_offsets = [0]
+        for value in strings:
+            position += len(value)
+            string_offsets.append(position)
+        file.write(b"".join(_U64.pack(offset) for offset in string_offsets))
+        file.write(b"".join(strings))
+        for header, offsets, data in encoded_tables:
+            file.write(header)
+            file.write(b"".join(_U64.pack(offset) for offset in offsets))
+            file.write(data)
+
+    return sum(len(objects) for _, _, objects in tables)
+
+
+class _Table:
+    def __init__(
+        self, cls, fields: List[str], tick, rows: int, offsets, data_start: int
+    ):
+        self.cls = cls
+        self.fields = fields
+        # the latest tick when the table was saved, None if the class had no tick watcher
+        self.tick = tick
+        self.rows = rows
+        self.offsets = offsets
+        self.data_start = data_start
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot from a memory-mapped file. Only the table headers are parsed up front; rows and strings are
+    decoded when they're needed.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, strings_count, tables_count = _HEADER.unpack_from(
+            self._buffer, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError(f"{path} is not a snapshot of version {VERSION}.")
+
+        position = _HEADER.size
+        self._string_offsets = struct.unpack_from(
+            f"<{strings_count + 1}Q", self._buffer, position
+        )
+        position += (strings_count + 1) * _U64.size
+        self._strings_start = position
+        self._strings = [None] * strings_count
+        position += self._string_offsets[-1]
+
+        self.tables = []
+        self._classes = {}
+        try:
+            self._read_tables(position, tables_count)
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_tables(self, position: int, tables_count: int):
+        for _ in range(tables_count):
+            (class_index,) = _U32.unpack_from(self._buffer, position)
+            (fields_count,) = _U32.unpack_from(self._buffer, position + 4)
+            position += 8
+            fields = [
+                self.string(index)
+                for index in struct.unpack_from(
+                    f"<{fields_count}I", self._buffer, position
+                )
+            ]
+            position += fields_count * _U32.size
+            tick, position = self._decode(position, None)
+            (rows,) = _U32.unpack_from(self._buffer, position)
+            position += _U32.size
+            offsets = struct.unpack_from(f"<{rows + 1}Q", self._buffer, position)
+            position += (rows + 1) * _U64.size
+            self.tables.append(
+                _Table(
+                    self.get_class(class_index, UniqueInstanceMixin),
+                    fields,
+                    tick,
+                    rows,
+                    offsets,
+                    position,
+                )
+            )
+            position += offsets[-1]
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def string(self, index: int) -> str:
+        value = self._strings[index]
+        if value is None:
+            start = self._strings_start + self._string_offsets[index]
+            end = self._strings_start + self._string_offsets[index + 1]
+            value = self._strings[index] = self._buffer[start:end].decode("utf-8")
+        return value
+
+    def get_class(self, string_index: int, base: type = object):
+        """
+        Returns the class named by given string, which has to be a subclass of base.
+        """
+        cls = self._classes.get((string_index, base))
+        if cls is None:
+            cls = self._classes[string_index, base] = _import_class(
+                self.string(string_index), base
+            )
+        return cls
+
+    def _decode(self, position: int, objects: Optional[List[List]]):
+        buffer = self._buffer
+        tag = buffer[position]
+        position += 1
+        if tag == _NONE:
+            return None, position
+        if tag == _FALSE or tag == _TRUE:
+            return tag == _TRUE, position
+        if tag == _INT:
+            return _I64.unpack_from(buffer, position)[0], position + 8
+        if tag == _FLOAT:
+            return _F64.unpack_from(buffer, position)[0], position + 8
+        if tag == _DECIMAL:
+            (index,) = _U32.unpack_from(buffer, position)
+            return Decimal(self.string(index)), position + 4
+        if tag == _STR:
+            (index,) = _U32.unpack_from(buffer, position)
+            return self.string(index), position + 4
+        if tag == _ENUM:
+            (index,) = _U32.unpack_from(buffer, position)
+            value, position = self._decode(position + 4, objects)
+            return self.get_class(index, Enum)(value), position
+        if tag == _LIST or tag == _TUPLE:
+            (length,) = _U32.unpack_from(buffer, position)
+            position += 4
+            items = []
+            for _ in range(length):
+                item, position = self._decode(position, objects)
+                items.append(item)
+            return (items if tag == _LIST else tuple(items)), position
+        if tag == _REF_TAG:
+            table_index, row = _REF.unpack_from(buffer, position)
+            if objects is None:
+                return Reference(table_index, row), position + _REF.size
+            try:
+                return objects[table_index][row], position + _REF.size
+            except IndexError:
+                raise SnapshotError(
+                    "Objects can only reference objects of classes saved before them."
+                ) from None
+        raise SnapshotError(f"Unknown value tag {tag}.")
+
+    def row(self, table: _Table, row: int, objects: Optional[List[List]] = None):
+        """
+        Returns field values and wall-clock expiration dates of one row. References to other objects are taken from
+        objects (lists of already built objects, per table) or returned as Reference if it's not given.
+        """
+        position = table.data_start + table.offsets[row]
+        values = {}
+        for field in table.fields:
+            values[field], position = self._decode(position, objects)
+        (count,) = _U16.unpack_from(self._buffer, position)
+        position += _U16.size
+        expirations = {}
+        for _ in range(count):
+            field_index, expires_at = _EXPIRATION.unpack_from(self._buffer, position)
+            position += _EXPIRATION.size
+            expirations[self.string(field_index)] = expires_at
+        return values, expirations
+
+
+def _restore_expirations(obj, expirations: Dict[str, float], same_tick: bool):
+    if not expirations or not hasattr(obj, "_expiration_registry"):
+        return
+    now_monotonic, now = time.monotonic(), time.time()
+    for field, expires_at in expirations.items():
+        if math.isinf(expires_at):
+            # valid until the next tick, which may have come since the snapshot was saved
+            if same_tick:
+                obj._expiration_registry[field] = expires_at
+        elif expires_at > now:
+            obj._expiration_registry[field] = now_monotonic + expires_at - now
+
+
+def load(path: str) -> int:
+    """
+    Recreates the objects saved in the snapshot. Objects which already exist are updated. Refreshed fields which
+    haven't expired in the meantime are not loaded again - fields valid until the next tick only if the tick watcher
+    of the class knows the same latest tick as when the snapshot was saved. Returns the number of loaded objects.
+    """
+    objects = []
+    with SnapshotReader(path) as reader:
+        for table in reader.tables:
+            table_objects = []
+            objects.append(table_objects)
+            current_tick = _current_tick(table.cls)
+            same_tick = current_tick is not None and current_tick == table.tick
+            for row in range(table.rows):
+                values, expirations = reader.row(table, row, objects)
+                keys = {key: values[key] for key in table.cls.keys}
+                obj = table.cls.get_from_registry(**keys)
+                if obj is None:
+                    obj = table.cls.create(**values)
+                else:
+                    for field, value in values.items():
+                        if field not in keys:
+                            setattr(obj, field, value)
+                _restore_expirations(obj, expirations, same_tick)
+                table_objects.append(obj)
+    return sum(len(table_objects) for table_objects in objects)
@@ -0,0 +1,274 @@
+"""
+Spatial index of systems, for radius and nearest neighbour queries.
+"""
+
+import heapq
+import math
+from typing import Dict, Iterator, List, Tuple, Union
+
+from .indexes import peek_value
+from .models import BaseSystemModel, SystemModel
+
+Point = Tuple[float, float, float]
+AXES = ("x", "y", "z")
+
+
+class _AxisWatcher:
+    """
+    Index interface for one coordinate - the registry calls it when x, y or z of a system changes.
+    """
+
+    def __init__(self, spatial_index: "SpatialIndex", axis: str):
+        self.spatial_index = spatial_index
+        self.axis = axis
+
+    def add(self, system, value):
+        # called once for every axis, the first call with all coordinates known places the system
+        if system not in self.spatial_index:
+            self.spatial_index.place(system)
+
+    def remove(self, system):
+        self.spatial_index.remove(system)
+
+    def update(self, system, value):
+        # a system gets into the index once it has all three coordinates, so registered ones are placed too
+        registry_key = getattr(system, "_registry_key", None)
+        if (
+            system in self.spatial_index
+            or type(system).registry.get(registry_key) is system
+        ):
+            self.spatial_index.place(system)
+
+    def get(self, value) -> dict:
+        return dict.fromkeys(
+            system
+            for system, point in self.spatial_index.points.items()
+            if point[AXES.index(self.axis)] == value
+        )
+
+
+class SpatialIndex:
+    """
+    Uniform grid over system coordinates: every system is kept in the cube of cell_size light years it's in, so a
+    query only looks at the systems in the cells around the point. It follows the registry of the system class, just
+    like the indexes used by query. Systems without coordinates are left out.
+
+    Usage:
+    >>> index = SpatialIndex(System)
+    >>> index.within(System.create(name="Sol"), radius=15)
+    [(System 'Sol', 0.0), (System 'Alpha Centauri', 4.38), ...]
+    >>> index.nearest(System.create(name="Sol"), k=3)
+    [(System 'Alpha Centauri', 4.38), (System "Barnard's Star", 5.95), (System 'Luhman 16', 6.57)]
+    """
+
+    def __init__(self, system_class=SystemModel, cell_size: float = 20):
+        self.system_class = system_class
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int, int], Dict[BaseSystemModel, Point]] = {}
+        self.points: Dict[BaseSystemModel, Point] = {}
+        self._cell_of = {}
+        # bounds of the cells ever occupied, so nearest knows when to stop looking
+        self._low = [math.inf] * 3
+        self._high = [-math.inf] * 3
+        for axis in AXES:
+            system_class.attach_index(axis, _AxisWatcher(self, axis))
+
+    def detach(self):
+        for axis in AXES:
+            self.system_class.detach_index(axis)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, system):
+        return system in self._cell_of
+
+    def _cell(self, point: Point) -> Tuple[int, int, int]:
+        cell_size = self.cell_size
+        return (
+            math.floor(point[0] / cell_size),
+            math.floor(point[1] / cell_size),
+            math.floor(point[2] / cell_size),
+        )
+
+    def place(self, system):
+        """
+        Puts the system in the cell of its current coordinates (or takes it out, when it has none).
+        """
+        x, y, z = (
+            peek_value(system, "x"),
+            peek_value(system, "y"),
+            peek_value(system, "z"),
+        )
+        if system in self._cell_of:
+            self.remove(system)
+        if x is None or y is None or z is None:
+            return
+        point = (float(x), float(y), float(z))
+        cell = self._cell(point)
+        systems = self.cells.get(cell)
+        if systems is None:
+            systems = self.cells[cell] = {}
+            low, high = self._low, self._high
+            for axis in range(3):
+                low[axis] = min(low[axis], cell[axis])
+                high[axis] = max(high[axis], cell[axis])
+        systems[system] = point
+        self._cell_of[system] = cell
+        self.points[system] = point
+
+    def remove(self, system):
+        cell = self._cell_of.pop(system, None)
+        if cell is None:
+            return
+        del self.points[system]
+        systems = self.cells[cell]
+        del systems[system]
+        if not systems:
+            del self.cells[cell]
+
+    def _resolve(self, center: Union[BaseSystemModel, Point]) -> Tuple[Point, object]:
+        if isinstance(center, BaseSystemModel):
+            point = self.points.get(center)
+            if point is None:
+                raise ValueError(f"Coordinates of {center} are not known.")
+            return point, center
+        return tuple(float(coordinate) for coordinate in center), None
+
+    def _clamped_box(
+        self, cell: Tuple[int, int, int], n: int
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Returns the low and high corner of the cube of cells up to n cells away from given cell, cut down to the
+        bounds of the occupied cells. The box is empty when some low coordinate is above the high one.
+        """
+        return (
+            [max(cell[axis] - n, self._low[axis]) for axis in range(3)],
+            [min(cell[axis] + n, self._high[axis]) for axis in range(3)],
+        )
+
+    @staticmethod
+    def _box_size(low: List[int], high: List[int]) -> int:
+        return math.prod(max(0, high[axis] - low[axis] + 1) for axis in range(3))
+
+    def _shell_size(self, cell: Tuple[int, int, int], n: int) -> int:
+        """
+        Returns the number of cells at Chebyshev distance n from given cell which are within the occupied bounds.
+        """
+        size = self._box_size(*self._clamped_box(cell, n))
+        if n:
+            size -= self._box_size(*self._clamped_box(cell, n - 1))
+        return size
+
+    def _shell(self, cell: Tuple[int, int, int], n: int) -> Iterator[dict]:
+        """
+        Yields the occupied cells at Chebyshev distance n from given cell. Only the part of the shell within the
+        bounds of the occupied cells is walked.
+        """
+        cx, cy, cz = cell
+        (low_x, low_y, low_z), (high_x, high_y, high_z) = self._clamped_box(cell, n)
+        cells = self.cells
+        for ix in range(low_x, high_x + 1):
+            x_on_shell = abs(ix - cx) == n
+            for iy in range(low_y, high_y + 1):
+                if x_on_shell or abs(iy - cy) == n:
+                    izs = range(low_z, high_z + 1)
+                else:
+                    izs = [iz for iz in {cz - n, cz + n} if low_z <= iz <= high_z]
+                for iz in izs:
+                    systems = cells.get((ix, iy, iz))
+                    if systems:
+                        yield systems
+
+    def within(
+        self, center: Union[BaseSystemModel, Point], radius: float
+    ) -> List[Tuple[BaseSystemModel, float]]:
+        """
+        Returns (system, distance) pairs for the systems within radius light years of the center (a system or x, y, z
+        coordinates), closest first. The center system is included.
+        """
+        point, _ = self._resolve(center)
+        px, py, pz = point
+        low = self._cell((px - radius, py - radius, pz - radius))
+        high = self._cell((px + radius, py + radius, pz + radius))
+        low = [max(low[axis], self._low[axis]) for axis in range(3)]
+        high = [min(high[axis], self._high[axis]) for axis in range(3)]
+        radius_squared = radius * radius
+
+        cells = self.cells
+        if self._box_size(low, high) > len(cells):
+            # a big radius - looking at the occupied cells is cheaper than at every cell of the box
+            candidates = cells.values()
+        else:
+            candidates = (
+                systems
+                for ix in range(low[0], high[0] + 1)
+                for iy in range(low[1], high[1] + 1)
+                for iz in range(low[2], high[2] + 1)
+                if (systems := cells.get((ix, iy, iz)))
+            )
+
+        found = []
+        for systems in candidates:
+            for system, (x, y, z) in systems.items():
+                distance_squared = (
+                    (x - px) * (x - px) + (y - py) * (y - py) + (z - pz) * (z - pz)
+                )
+                if distance_squared <= radius_squared:
+                    found.append((distance_squared, system))
+        found.sort(key=lambda pair: pair[0])
+        return [(system, math.sqrt(distance)) for distance, system in found]
+
+    def nearest(
+        self, center: Union[BaseSystemModel, Point], k: int = 1
+    ) -> List[Tuple[BaseSystemModel, float]]:
+        """
+        Returns (system, distance) pairs for the k systems closest to the center (a system or x, y, z coordinates),
+        closest first. The center system itself is skipped.
+        """
+        point, skipped = self._resolve(center)
+        if k <= 0 or not self.cells:
+            return []
+        px, py, pz = point
+        cell = self._cell(point)
+        max_shell = max(
+            max(cell[axis] - self._low[axis], self._high[axis] - cell[axis])
+            for axis in range(3)
+        )
+
+        # max-heap of the best k so far, as (-distance squared, tie breaker, system)
+        best = []
+        for n in range(max_shell + 1):
+            # once a shell has more cells than the grid holds, the rest of the occupied cells is looked at directly
+            seen_all = self._shell_size(cell, n) > len(self.cells)
+            if seen_all:
+                shells = (
+                    systems
+                    for other_cell, systems in self.cells.items()
+                    if max(abs(other_cell[axis] - cell[axis]) for axis in range(3)) >= n
+                )
+            else:
+                shells = self._shell(cell, n)
+            for systems in shells:
+                for system, (x, y, z) in systems.items():
+                    if system is skipped:
+                        continue
+                    distance_squared = (
+                        (x - px) * (x - px) + (y - py) * (y - py) + (z - pz) * (z - pz)
+                    )
+                    entry = (-distance_squared, id(system), system)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif distance_squared < -best[0][0]:
+                        heapq.heapreplace(best, entry)
+            if seen_all:
+                break
+            # everything closer than n cells has been seen, so the result can't change anymore
+            covered = n * self.cell_size
+            if len(best) == k and -best[0][0] <= covered * covered:
+                break
+
+        return [
+            (system, math.sqrt(-distance))
+            for distance, _, system in sorted(best, reverse=True)
+        ]
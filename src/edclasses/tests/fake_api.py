@@ -0,0 +1,304 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+from ..api_clients import EliteBgsClient
+from ..commons.transports import Transport
+
+
+class FakeEliteBgsApi:
+    """
+    Serves synthetic Elite BGS payloads for a small generated galaxy.
+
+    Every system has factions_per_system factions present and stations_per_system stations. Faction names are shared
+    between systems, so a faction has presence in many of them. Every doc gets padding_bytes of filler, standing in for
+    the fields of the real API the library doesn't read.
+    """
+
+    def __init__(
+        self,
+        prefix="Fake",
+        systems=3,
+        factions_per_system=3,
+        stations_per_system=4,
+        padding_bytes=0,
+    ):
+        self.systems = [f"{prefix} System {i}" for i in range(systems)]
+        self.factions = [f"{prefix} Faction {i}" for i in range(factions_per_system)]
+        self.stations_per_system = stations_per_system
+        self.tick = "2022-01-01T12:00:00.000Z"
+        self.page_size = 10
+        self.influence_shift = 0
+        # seconds between history records, when history is asked for with timeMin and timeMax
+        self.history_interval = 24 * 60 * 60
+        self.padding_bytes = padding_bytes
+
+    def get(self, path, **params):
+        response = getattr(self, f"_{path.strip('/')}")(**params)
+        if self.padding_bytes and isinstance(response, dict):
+            for doc in response.get("docs", []):
+                doc["padding"] = "x" * self.padding_bytes
+        return response
+
+    def _faction_presence(self, faction_index, system_name):
+        influence = (faction_index + 1 + self.influence_shift) / 10
+        return {
+            "system_name": system_name,
+            "system_name_lower": system_name.lower(),
+            "influence": influence,
+            "state": "boom",
+            "active_states": [{"state": "boom"}],
+            "pending_states": [{"state": "expansion"}] if faction_index == 0 else [],
+            "recovering_states": [],
+        }
+
+    def _faction_doc(self, faction_index, systems, time_min=None, time_max=None):
+        name = self.factions[faction_index]
+        doc = {
+            "name": name,
+            "name_lower": name.lower(),
+            "faction_presence": [
+                self._faction_presence(faction_index, system_name)
+                for system_name in systems
+            ],
+        }
+        if time_min is not None and time_max is not None:
+            doc["history"] = self._history(faction_index, systems, time_min, time_max)
+        return doc
+
+    def _history(self, faction_index, systems, time_min, time_max):
+        """
+        One record per history_interval for every system, with the influence going up by 0.01 each time.
+        """
+        history = []
+        start = -(-int(time_min) // 1000)
+        for step, timestamp in enumerate(
+            range(start, int(time_max) // 1000 + 1, self.history_interval)
+        ):
+            for system_name in systems:
+                record = self._faction_presence(faction_index, system_name)
+                record.pop("system_name")
+                record.pop("system_name_lower")
+                record["influence"] = round(record["influence"] + step / 100, 4)
+                history.append(
+                    {
+                        "system": system_name,
+                        "system_lower": system_name.lower(),
+                        "updated_at": time.strftime(
+                            "%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(timestamp)
+                        ),
+                        **record,
+                    }
+                )
+        return history
+
+    def _station_docs(self, system_name):
+        docs = []
+        for i in range(self.stations_per_system):
+            faction_name = self.factions[i % len(self.factions)]
+            docs.append(
+                {
+                    "name": f"{system_name} Station {i}",
+                    "name_lower": f"{system_name} station {i}".lower(),
+                    "type": "coriolis" if i % 2 else "outpost",
+                    "system": system_name,
+                    "system_lower": system_name.lower(),
+                    "distance_from_star": 100 * (i + 1),
+                    "controlling_minor_faction": faction_name.lower(),
+                    "controlling_minor_faction_cased": faction_name,
+                    "services": [
+                        {"name": "Dock", "name_lower": "dock"},
+                        {"name": "Missions", "name_lower": "missions"},
+                    ],
+                    "state": "boom" if i % 2 else "none",
+                }
+            )
+        return docs
+
+    def _find_system(self, name):
+        return next(
+            system_name
+            for system_name in self.systems
+            if system_name.lower() == name.lower()
+        )
+
+    def _paginate(self, docs, page=1):
+        """
+        Splits the docs into pages of page_size, with pagination fields the same as in Elite BGS API.
+        """
+        page = int(page)
+        pages = max(1, -(-len(docs) // self.page_size))
+        start = (page - 1) * self.page_size
+        return {
+            "docs": docs[start : start + self.page_size],
+            "total": len(docs),
+            "limit": self.page_size,
+            "page": page,
+            "pages": pages,
+            "hasNextPage": page < pages,
+            "nextPage": page + 1 if page < pages else None,
+        }
+
+    def _factions(self, system=None, name=None, page=1, **params):
+        if system is not None:
+            system_name = self._find_system(system)
+            docs = [
+                self._faction_doc(i, [system_name]) for i in range(len(self.factions))
+            ]
+        elif name is not None:
+            faction_index = [faction.lower() for faction in self.factions].index(
+                name.lower()
+            )
+            docs = [
+                self._faction_doc(
+                    faction_index,
+                    self.systems,
+                    params.get("timeMin"),
+                    params.get("timeMax"),
+                )
+            ]
+        else:
+            docs = [
+                self._faction_doc(i, self.systems) for i in range(len(self.factions))
+            ]
+        return self._paginate(docs, page)
+
+    def _stations(self, system=None, page=1, **params):
+        systems = [self._find_system(system)] if system is not None else self.systems
+        docs = [
+            doc for system_name in systems for doc in self._station_docs(system_name)
+        ]
+        return self._paginate(docs, page)
+
+    def _system_doc(self, system_name):
+        return {
+            "name": system_name,
+            "name_lower": system_name.lower(),
+            "eddb_id": self.systems.index(system_name) + 1,
+            "x": 10.0 * self.systems.index(system_name),
+            "y": 0.0,
+            "z": -5.0,
+        }
+
+    def _systems(self, name=None, page=1, **params):
+        systems = [self._find_system(name)] if name is not None else self.systems
+        return self._paginate(
+            [self._system_doc(system_name) for system_name in systems], page
+        )
+
+    def _ticks(self, **params):
+        return [{"time": self.tick}]
+
+
+class FakeEliteBgsClient(EliteBgsClient):
+    """
+    Client answering from FakeEliteBgsApi instead of the network. Every request which would be sent is recorded.
+    """
+
+    def __init__(self, api=None, cache=None, scheduler=None):
+        super().__init__(cache=cache, scheduler=scheduler)
+        self.api = api if api is not None else FakeEliteBgsApi()
+        self.requests_made = []
+
+    def _fetch(self, path="", **kwargs):
+        self.requests_made.append((path, kwargs))
+        return self.api.get(path, **kwargs)
+
+    def _get_request(self, path="", priority=None, timeout=None, **kwargs):
+        return self._fetch(path, **kwargs)
+
+
+class FakeTransport(Transport):
+    """
+    Transport answering from FakeEliteBgsApi, for testing the real EliteBgsClient without the network.
+    """
+
+    def __init__(self, api=None):
+        self.api = api if api is not None else FakeEliteBgsApi()
+        self.requests_made = []
+
+    def get(self, api_url, path, params):
+        self.requests_made.append((path, params))
+        return self.api.get(path, **params)
+
+
+class FakeEliteBgsServer:
+    """
+    Local HTTP server standing in for the Elite BGS API, serving FakeEliteBgsApi payloads. Every response is delayed by
+    latency seconds. The server counts requests and the highest number of requests handled at the same time.
+
+    Usage:
+    >>> with FakeEliteBgsServer() as server:
+    ...     client = EliteBgsClient(api_url=server.url)
+    """
+
+    def __init__(self, api=None, latency: float = 0):
+        self.api = api if api is not None else FakeEliteBgsApi()
+        self.latency = latency
+        self.requests_made = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api/ebgs/v5/"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = parse.urlparse(self.path)
+                path = url.path.rsplit("/", 1)[-1]
+                params = dict(parse.parse_qsl(url.query))
+                body = json.dumps(server.handle(path, params)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, path, params):
+        with self._lock:
+            self.requests_made.append((path, params))
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(
+                self.max_concurrent_requests, self._concurrent_requests
+            )
+        try:
+            time.sleep(self.latency)
+            return self.api.get(path, **params)
+        finally:
+            with self._lock:
+                self._concurrent_requests -= 1
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,127 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..analytics import InfluenceStore
+from ..models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from ..utils import InstanceRegistry
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def store():
+    store = InfluenceStore(capacity=2)
+    yield store
+    store.detach()
+
+
+def create_branch(faction_name, system_name, influence):
+    return FactionBranchModel.create(
+        faction=FactionModel.create(name=faction_name),
+        system=SystemModel.create(name=system_name),
+        influence=influence,
+    )
+
+
+class TestInfluenceStore:
+    def test_existing_branches_are_added_when_attached(self):
+        branch = create_branch("Mother Gaia", "Sol", 0.4)
+        store = InfluenceStore()
+        try:
+            assert store.influence_of(branch) == 0.4
+        finally:
+            store.detach()
+
+    def test_store_follows_the_registry(self, store):
+        branches = [create_branch(f"Faction {i}", "Sol", i / 10) for i in range(5)]
+        assert len(store) == 5
+
+        branches[4].influence = 0.9
+        assert store.influence_of(branches[4]) == 0.9
+
+        branches[1].delete()
+        assert len(store) == 4
+        assert store.influence_of(branches[1]) is None
+        assert store.influence_of(branches[4]) == 0.9
+        assert store.top(n=10) == [branches[4], branches[3], branches[2], branches[0]]
+
+    def test_store_is_detached(self, store):
+        store.detach()
+        create_branch("Mother Gaia", "Sol", 0.4)
+        assert len(store) == 0
+
+    def test_query_uses_the_store(self, store):
+        branch = create_branch("Mother Gaia", "Sol", 0.4)
+        create_branch("Sol Workers' Party", "Sol", 0.3)
+        assert FactionBranchModel.query(influence=0.4) == [branch]
+
+    def test_conflict_risks(self, store):
+        leader = create_branch("Mother Gaia", "Sol", 0.40)
+        close = create_branch("Sol Workers' Party", "Sol", 0.38)
+        create_branch("Sol Constitution Party", "Sol", 0.10)
+        create_branch("Mother Gaia", "Achenar", 0.60)
+        create_branch("Empire League", "Achenar", 0.20)
+
+        assert store.conflict_risks(threshold=0.03) == [close]
+        assert leader not in store.conflict_risks(threshold=1)
+
+    def test_ties(self, store):
+        create_branch("Mother Gaia", "Sol", 0.40)
+        create_branch("Sol Workers' Party", "Sol", 0.40)
+        create_branch("Mother Gaia", "Achenar", 0.60)
+        create_branch("Empire League", "Achenar", 0.20)
+        create_branch("Mother Gaia", "Lave", 1.0)
+
+        assert store.ties() == [SystemModel.create(name="Sol")]
+        assert len(store.ties(tolerance=0.5)) == 2
+
+    def test_top_filters(self, store):
+        sol_gaia = create_branch("Mother Gaia", "Sol", 0.40)
+        create_branch("Sol Workers' Party", "Sol", 0.30)
+        achenar_gaia = create_branch("Mother Gaia", "Achenar", 0.60)
+
+        assert store.top(n=1) == [achenar_gaia]
+        assert store.top(system=SystemModel.create(name="Sol"), n=1) == [sol_gaia]
+        assert store.top(faction=FactionModel.create(name="Mother Gaia")) == [
+            achenar_gaia,
+            sol_gaia,
+        ]
+        assert store.top(faction=FactionModel.create(name="Nobody")) == []
+
+    def test_branches_without_influence_are_skipped(self, store):
+        create_branch("Mother Gaia", "Sol", None)
+        create_branch("Sol Workers' Party", "Sol", 0.3)
+        create_branch("Empire League", "Achenar", None)
+
+        aggregates = store.system_aggregates()
+        sol, achenar = store.systems
+
+        assert sol.name == "Sol" and achenar.name == "Achenar"
+        assert list(aggregates["count"]) == [1, 0]
+        assert aggregates["max"][0] == 0.3
+        assert math.isnan(aggregates["mean"][1])
+        assert store.conflict_risks(threshold=1) == []
+
+    def test_system_aggregates(self, store):
+        create_branch("Mother Gaia", "Sol", 0.5)
+        create_branch("Sol Workers' Party", "Sol", 0.3)
+        create_branch("Empire League", "Achenar", 0.2)
+
+        aggregates = store.system_aggregates()
+
+        assert list(aggregates["count"]) == [2, 1]
+        assert aggregates["total"] == pytest.approx([0.8, 0.2])
+        assert aggregates["mean"] == pytest.approx([0.4, 0.2])
+        assert aggregates["min"] == pytest.approx([0.3, 0.2])
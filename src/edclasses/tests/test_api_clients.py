@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ..commons.rate_scheduler import DeadlineExceeded
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+class SlowClient(FakeEliteBgsClient):
+    def __init__(self, latency):
+        super().__init__(api=FakeEliteBgsApi(prefix="Client"))
+        self.latency = latency
+
+    def _fetch(self, path="", **kwargs):
+        time.sleep(self.latency)
+        return super()._fetch(path, **kwargs)
+
+
+class FailingClient(SlowClient):
+    def _fetch(self, path="", **kwargs):
+        time.sleep(self.latency)
+        raise ConnectionError("API is down")
+
+
+def call_concurrently(func, times):
+    barrier = threading.Barrier(times)
+
+    def call():
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=times) as executor:
+        futures = [executor.submit(call) for _ in range(times)]
+    return futures
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_for_the_same_request_are_coalesced(self):
+        client = SlowClient(latency=0.2)
+
+        futures = call_concurrently(
+            lambda: client.factions(system="Client System 0"), times=8
+        )
+
+        responses = [future.result() for future in futures]
+        assert len(client.requests_made) == 1
+        assert all(response is responses[0] for response in responses)
+        assert client.stats["requests"] == 1
+        assert client.stats["coalesced"] + client.stats["cache_hits"] == 7
+        assert client.stats["coalesced"] > 0
+
+    def test_different_requests_are_not_coalesced(self):
+        client = SlowClient(latency=0.1)
+        systems = iter(client.api.systems)
+        lock = threading.Lock()
+
+        def next_system():
+            with lock:
+                return next(systems)
+
+        call_concurrently(lambda: client.stations(system=next_system()), times=3)
+
+        assert len(client.requests_made) == 3
+        assert client.stats["coalesced"] == 0
+
+    def test_error_is_raised_in_all_waiting_calls(self):
+        client = FailingClient(latency=0.2)
+
+        futures = call_concurrently(
+            lambda: client.factions(system="Client System 0"), times=4
+        )
+
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result()
+        assert client._in_flight == {}
+
+    def test_waiting_call_keeps_its_own_timeout(self):
+        client = SlowClient(latency=0.5)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sender = executor.submit(client.factions, system="Client System 0")
+            while not client._in_flight:
+                time.sleep(0.001)
+
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceeded):
+                client.factions(system="Client System 0", timeout=0.05)
+
+            assert time.monotonic() - start < 0.4
+            assert sender.result()["docs"]
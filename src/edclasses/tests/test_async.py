@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from .. import utils, System, Faction, FactionBranch, OrbitalStation
+from ..api_clients import EliteBgsClient, AsyncEliteBgsClient
+from ..commons.rate_scheduler import DeadlineExceeded, RateScheduler
+from ..ticks import TickWatcher
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsServer
+
+
+@pytest.fixture
+def server():
+    with FakeEliteBgsServer(
+        api=FakeEliteBgsApi(prefix="Async"), latency=0.1
+    ) as fake_server:
+        yield fake_server
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    sync_client = EliteBgsClient(api_url=server.url)
+    for cls in (System, Faction, FactionBranch, OrbitalStation):
+        monkeypatch.setattr(cls.adapter, "client", sync_client)
+    return sync_client
+
+
+class TestAsyncEliteBgsClient:
+    def test_requests_are_sent_concurrently(self, server, client):
+        async_client = AsyncEliteBgsClient(client)
+
+        async def fetch():
+            return await asyncio.gather(
+                *(async_client.factions(system=name) for name in server.api.systems)
+            )
+
+        responses = asyncio.run(fetch())
+
+        assert [
+            response["docs"][0]["faction_presence"][0]["system_name"]
+            for response in responses
+        ] == server.api.systems
+        assert len(server.requests_made) == 3
+        assert server.max_concurrent_requests > 1
+
+    def test_same_requests_are_sent_once(self, server, client):
+        async_client = AsyncEliteBgsClient(client)
+
+        async def fetch():
+            return await asyncio.gather(
+                *(async_client.stations(system="Async System 0") for _ in range(5))
+            )
+
+        responses = asyncio.run(fetch())
+
+        assert len(server.requests_made) == 1
+        assert all(response == responses[0] for response in responses)
+
+    def test_responses_are_shared_with_sync_client(self, server, client):
+        async_client = AsyncEliteBgsClient(client)
+
+        asyncio.run(async_client.systems(name="Async System 1"))
+        client.systems(name="Async System 1")
+
+        assert len(server.requests_made) == 1
+
+    def test_request_in_flight_is_shared_with_sync_client(self, server, client):
+        async_client = AsyncEliteBgsClient(client)
+        sync_thread = threading.Thread(
+            target=client.stations, kwargs={"system": "Async System 0"}
+        )
+
+        async def fetch():
+            sync_thread.start()
+            while not client._in_flight:
+                await asyncio.sleep(0.001)
+            return await async_client.stations(system="Async System 0")
+
+        response = asyncio.run(fetch())
+        sync_thread.join()
+
+        assert response["docs"]
+        assert len(server.requests_made) == 1
+        assert client.stats["coalesced"] == 1
+
+    def test_waiting_call_keeps_its_own_timeout(self, server, client):
+        async_client = AsyncEliteBgsClient(client)
+
+        async def fetch():
+            sender = asyncio.ensure_future(async_client.systems(name="Async System 0"))
+            await asyncio.sleep(0)
+            with pytest.raises(DeadlineExceeded):
+                await async_client.systems(name="Async System 0", timeout=0.02)
+            return await sender
+
+        assert asyncio.run(fetch())["docs"]
+        assert len(server.requests_made) == 1
+
+    def test_callers_over_rate_limit_wait(self, server, client):
+        client.scheduler = RateScheduler(calls=2, period=0.5)
+        async_client = AsyncEliteBgsClient(client)
+        server.latency = 0
+
+        async def fetch():
+            await asyncio.gather(
+                *(async_client.systems(name=name) for name in server.api.systems)
+            )
+
+        start = time.monotonic()
+        asyncio.run(fetch())
+
+        assert time.monotonic() - start >= 0.2
+        assert len(server.requests_made) == 3
+
+
+class TestAget:
+    @pytest.fixture(autouse=True)
+    def thread_safety(self, monkeypatch):
+        monkeypatch.setattr(utils, "_thread_safety_enabled", False)
+
+    def test_objects_are_loaded_concurrently(self, server, client):
+        systems = [System.create(name=name) for name in server.api.systems]
+
+        async def load():
+            return await asyncio.gather(
+                *(system.aget("stations") for system in systems)
+            )
+
+        stations = asyncio.run(load())
+
+        assert [len(system_stations) for system_stations in stations] == [4, 4, 4]
+        assert server.max_concurrent_requests > 1
+        requests_made = len(server.requests_made)
+        assert [len(system.stations) for system in systems] == [4, 4, 4]
+        assert len(server.requests_made) == requests_made
+
+    def test_fresh_field_is_not_loaded_again(self, server, client):
+        faction = Faction.create(name="Async Faction 1")
+
+        first = asyncio.run(faction.aget("faction_branches"))
+        second = asyncio.run(faction.aget("faction_branches"))
+
+        assert first == second
+        assert len(server.requests_made) == 1
+
+    def test_not_refreshed_attribute_is_returned(self, server, client):
+        system = System.create(name="Async System 2")
+
+        assert asyncio.run(system.aget("name")) == "Async System 2"
+        assert server.requests_made == []
+
+    @pytest.mark.parametrize("thread_safe", [False, True])
+    def test_responses_are_parsed_off_the_event_loop_when_thread_safe(
+        self, server, client, monkeypatch, thread_safe
+    ):
+        monkeypatch.setattr(utils, "_thread_safety_enabled", thread_safe)
+        system = System.create(name="Async System 0")
+        system.expire("stations")
+        adapter = type(System.adapter)
+        parse_stations = adapter.stations
+        parsing_threads = []
+
+        def stations(self, obj):
+            parsing_threads.append(threading.get_ident())
+            return parse_stations(self, obj)
+
+        monkeypatch.setattr(adapter, "stations", stations)
+
+        async def load():
+            return threading.get_ident(), await system.aget("stations")
+
+        loop_thread, stations = asyncio.run(load())
+
+        assert len(stations) == 4
+        assert len(parsing_threads) == 1
+        assert (parsing_threads[0] != loop_thread) is thread_safe
+        assert utils._thread_safety_enabled is thread_safe
+
+    def test_tick_is_polled_off_the_event_loop(self, server, client, monkeypatch):
+        watcher = TickWatcher(client=client, poll_interval_minutes=0)
+        watcher.install(System)
+        polling_threads = []
+        latest_tick = client.latest_tick
+
+        def record_latest_tick():
+            polling_threads.append(threading.get_ident())
+            return latest_tick()
+
+        monkeypatch.setattr(client, "latest_tick", record_latest_tick)
+        system = System.create(name="Async System 1")
+
+        async def load():
+            loop_thread = threading.get_ident()
+            # the first poll is due right away, the one in _is_expired isn't
+            watcher.poll_interval_minutes = 60
+            watcher._last_poll = None
+            return loop_thread, await system.aget("eddb_id")
+
+        try:
+            loop_thread, eddb_id = asyncio.run(load())
+        finally:
+            watcher.uninstall()
+
+        assert eddb_id is not None
+        assert polling_threads and loop_thread not in polling_threads
@@ -0,0 +1,162 @@
+import pytest
+
+from ..api_clients import EliteBgsClient
+from ..commons.caching_utils import (
+    MemoryCache,
+    SqliteCache,
+    TieredCache,
+    make_cache_key,
+    NOT_SET,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr("edclasses.commons.caching_utils.time.time", fake_clock)
+    return fake_clock
+
+
+class CountingClient(EliteBgsClient):
+    def __init__(self, cache=None):
+        super().__init__(cache=cache)
+        self.requests_made = []
+
+    def _get_request(self, path="", priority=None, timeout=None, **kwargs):
+        self.requests_made.append((path, kwargs))
+        return {"docs": [{"name": kwargs.get("system", path)}]}
+
+
+class TestMakeCacheKey:
+    def test_params_order_does_not_matter(self):
+        assert make_cache_key(
+            "factions", {"system": "Sol", "page": 1}
+        ) == make_cache_key("/factions/", {"page": 1, "system": "Sol"})
+
+    def test_different_params_give_different_keys(self):
+        assert make_cache_key("factions", {"system": "Sol"}) != make_cache_key(
+            "factions", {"system": "Achenar"}
+        )
+
+
+class TestMemoryCache:
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is NOT_SET
+        assert cache.get("c") == 3
+
+    def test_entry_expires(self, clock):
+        cache = MemoryCache(ttl_seconds=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl_seconds=100)
+        clock.now += 50
+
+        assert cache.get("a") is NOT_SET
+        assert cache.get("b") == 2
+
+
+class TestSqliteCache:
+    def test_entries_survive_reopening(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = SqliteCache(path)
+        cache.set("factions?system=Sol", {"docs": [1, 2]})
+        cache.close()
+
+        reopened_cache = SqliteCache(path)
+        assert reopened_cache.get("factions?system=Sol") == {"docs": [1, 2]}
+
+    def test_entry_expires(self, tmp_path, clock):
+        cache = SqliteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl_seconds=100)
+        clock.now += 50
+
+        assert cache.get("a") is NOT_SET
+        assert cache.get("b") == 2
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self, tmp_path, clock):
+        cache = SqliteCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+        cache.set("a", 1)
+        clock.now += 1
+        cache.set("b", 2)
+        clock.now += 1
+        cache.get("a")
+        clock.now += 1
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is NOT_SET
+
+
+class TestTieredCache:
+    def test_lower_tier_hit_is_copied_to_upper_tier(self, tmp_path):
+        memory_cache = MemoryCache()
+        disk_cache = SqliteCache(str(tmp_path / "cache.sqlite"))
+        disk_cache.set("a", 1)
+        cache = TieredCache(memory_cache, disk_cache)
+
+        assert cache.get("a") == 1
+        assert memory_cache.get("a") == 1
+
+    @pytest.mark.parametrize("memory_ttl", [None, 100])
+    def test_copied_entry_keeps_lower_tier_expiration(
+        self, tmp_path, clock, memory_ttl
+    ):
+        memory_cache = MemoryCache(ttl_seconds=memory_ttl)
+        disk_cache = SqliteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+        disk_cache.set("a", 1)
+        cache = TieredCache(memory_cache, disk_cache)
+        clock.now += 50
+
+        assert cache.get("a") == 1
+        clock.now += 20
+        assert memory_cache.get("a") is NOT_SET
+        assert cache.get("a") is NOT_SET
+
+    def test_copied_entry_keeps_upper_tier_ttl_if_shorter(self, tmp_path, clock):
+        memory_cache = MemoryCache(ttl_seconds=10)
+        disk_cache = SqliteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+        disk_cache.set("a", 1)
+        cache = TieredCache(memory_cache, disk_cache)
+
+        assert cache.get("a") == 1
+        clock.now += 20
+        assert memory_cache.get("a") is NOT_SET
+        assert cache.get("a") == 1
+
+
+class TestClientCache:
+    def test_same_request_is_made_once(self):
+        client = CountingClient()
+
+        client.factions(system="Sol")
+        client.factions(system="Sol")
+
+        assert client.requests_made == [("factions", {"system": "Sol"})]
+
+    def test_warm_restart_is_served_from_disk(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        client = CountingClient(cache=SqliteCache(path))
+        response = client.stations(system="Sol")
+        client.cache.close()
+
+        restarted_client = CountingClient(cache=SqliteCache(path))
+
+        assert restarted_client.stations(system="Sol") == response
+        assert restarted_client.requests_made == []
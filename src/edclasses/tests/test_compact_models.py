@@ -0,0 +1,132 @@
+import sys
+from decimal import Decimal
+
+import pytest
+
+from .. import enums
+from ..models import (
+    CompactSystemModel,
+    CompactFactionModel,
+    CompactFactionBranchModel,
+    CompactOrbitalStationModel,
+    SystemModel,
+)
+from ..utils import AutoRefreshMixin, InstanceRegistry
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (
+        CompactSystemModel,
+        CompactFactionModel,
+        CompactFactionBranchModel,
+        CompactOrbitalStationModel,
+    ):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.calls = 0
+
+    def eddb_id(self, obj):
+        self.calls += 1
+        return 123
+
+
+class CompactRefreshedSystem(AutoRefreshMixin, CompactSystemModel):
+    __slots__ = ("_expiration_registry",)
+    adapter = FakeAdapter()
+    refreshed_fields = ("eddb_id",)
+
+
+class TestCompactModels:
+    def test_instances_have_no_dict(self):
+        system = CompactSystemModel.create(name="Sol")
+        faction = CompactFactionModel.create(name="Mother Gaia")
+        faction_branch = CompactFactionBranchModel.create(
+            faction=faction, system=system
+        )
+        station = CompactOrbitalStationModel.create(
+            name="Daedalus", station_type=enums.StationType.ORBIS, system=system
+        )
+
+        for obj in (system, faction, faction_branch, station):
+            assert not hasattr(obj, "__dict__")
+            with pytest.raises(AttributeError):
+                obj.some_attribute = 1
+
+    def test_relations_are_kept(self):
+        system = CompactSystemModel.create(name="Sol")
+        faction = CompactFactionModel.create(name="Mother Gaia")
+        faction_branch = CompactFactionBranchModel.create(
+            faction=faction, system=system
+        )
+        station = CompactOrbitalStationModel.create(
+            name="Daedalus",
+            station_type=enums.StationType.ORBIS,
+            system=system,
+            controlling_faction=faction_branch,
+        )
+
+        assert system.faction_branches == [faction_branch]
+        assert faction.faction_branches == [faction_branch]
+        assert system.stations == [station]
+        assert faction_branch.stations == [station]
+        assert CompactSystemModel.create(name="Sol") is system
+
+    def test_values_are_stored_compactly(self):
+        system = CompactSystemModel.create(name="".join(["S", "ol"]))
+        faction_branch = CompactFactionBranchModel.create(
+            faction=CompactFactionModel.create(name="Mother Gaia"),
+            system=system,
+            influence=Decimal("0.25"),
+        )
+        station = CompactOrbitalStationModel.create(
+            name="Daedalus",
+            station_type=enums.StationType.ORBIS,
+            system=system,
+            distance_to_arrival=Decimal("212"),
+            services=[enums.StationService.DOCK],
+        )
+
+        assert system.name is sys.intern("Sol")
+        assert faction_branch.influence == 0.25
+        assert faction_branch.active_states == ()
+        assert station.distance_to_arrival == 212.0
+        assert station.distance_to_arrival_rounded == 200
+        assert station.services == (enums.StationService.DOCK,)
+
+    def test_values_set_after_creation_are_stored_compactly(self):
+        system = CompactSystemModel.create(name="Sol")
+        faction_branch = CompactFactionBranchModel.create(
+            faction=CompactFactionModel.create(name="Mother Gaia"), system=system
+        )
+
+        faction_branch.influence = Decimal("0.5")
+        faction_branch.active_states = [enums.State.BOOM]
+        system.x = Decimal("1.5")
+
+        assert type(faction_branch.influence) is float
+        assert faction_branch.active_states == (enums.State.BOOM,)
+        assert system.x == 1.5 and type(system.x) is float
+        assert CompactFactionBranchModel.query(
+            active_states__contains=enums.State.BOOM
+        ) == [faction_branch]
+
+    def test_compact_registry_is_separate(self):
+        compact_system = CompactSystemModel.create(name="Sol")
+
+        assert SystemModel.get_from_registry(name="Sol") is not compact_system
+
+
+class TestCompactAutoRefresh:
+    def test_refreshed_field_is_loaded_from_adapter(self):
+        system = CompactRefreshedSystem.create(name="Sol")
+        CompactRefreshedSystem.adapter.calls = 0
+
+        assert system.eddb_id == 123
+        assert system.eddb_id == 123
+        assert CompactRefreshedSystem.adapter.calls == 1
+        assert system.loaded_fields() == ["eddb_id"]
+        assert not hasattr(system, "__dict__")
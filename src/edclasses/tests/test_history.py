@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from .. import enums, Faction, FactionBranch, System
+from ..history import InfluenceHistory
+from ..models import SystemModel, FactionModel, FactionBranchModel
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+DAY = 24 * 60 * 60
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+def make_history(days=10) -> InfluenceHistory:
+    history = InfluenceHistory()
+    history.extend(
+        (START + timedelta(days=day), day / 100, [enums.State.BOOM])
+        for day in range(days)
+    )
+    return history
+
+
+class TestInfluenceHistory:
+    def test_samples_are_read_back(self):
+        history = InfluenceHistory()
+        history.add(
+            START,
+            0.25,
+            active_states=[enums.State.BOOM, enums.State.ELECTION],
+            pending_states=[enums.State.EXPANSION],
+        )
+
+        sample = history.latest()
+
+        assert sample.timestamp == START
+        assert sample.influence == 0.25
+        assert sample.active_states == [enums.State.BOOM, enums.State.ELECTION]
+        assert sample.pending_states == [enums.State.EXPANSION]
+        assert sample.recovering_states == []
+
+    def test_samples_are_kept_sorted_and_unique(self):
+        history = InfluenceHistory()
+        history.add(START + timedelta(days=2), 0.3)
+        history.add(START, 0.1)
+        history.add(START + timedelta(days=1), 0.2)
+        history.add(START + timedelta(days=1), 0.5)
+
+        assert [sample.influence for sample in history] == pytest.approx(
+            [0.1, 0.5, 0.3]
+        )
+
+    def test_extend_merges_with_existing_samples(self):
+        history = make_history(days=3)
+        history.extend(
+            [(START + timedelta(days=1), 0.9), (START - timedelta(days=1), 0)]
+        )
+
+        assert len(history) == 4
+        assert [sample.influence for sample in history] == pytest.approx(
+            [0, 0, 0.9, 0.02]
+        )
+
+    def test_missing_influence(self):
+        history = InfluenceHistory()
+        history.add(START, None)
+        assert history.latest().influence is None
+
+    def test_range(self):
+        history = make_history()
+
+        samples = history.range(
+            start=START + timedelta(days=2), end=START + timedelta(days=4)
+        )
+
+        assert [sample.timestamp.day for sample in samples] == [3, 4, 5]
+        assert len(history.range(end=START)) == 1
+        assert len(history.range(start=START + timedelta(days=100))) == 0
+
+    def test_series(self):
+        timestamps, influence = make_history().series(start=START + timedelta(days=8))
+
+        assert list(timestamps) == [
+            START.timestamp() + 8 * DAY,
+            START.timestamp() + 9 * DAY,
+        ]
+        assert list(influence) == pytest.approx([0.08, 0.09])
+
+    def test_downsample(self):
+        history = make_history()
+        history.add(START + timedelta(days=9), 0.5, [enums.State.WAR])
+
+        weeks = history.downsample(7 * DAY)
+
+        # buckets are aligned to the epoch, which started on a Thursday
+        assert [week.timestamp for week in weeks] == [
+            datetime(2021, 12, 30, tzinfo=timezone.utc),
+            datetime(2022, 1, 6, tzinfo=timezone.utc),
+        ]
+        assert weeks[0].influence == pytest.approx(sum(range(0, 5)) / 100 / 5)
+        assert weeks[1].influence == pytest.approx(
+            (0.05 + 0.06 + 0.07 + 0.08 + 0.5) / 5
+        )
+        assert weeks[1].active_states == [enums.State.WAR]
+
+    @pytest.mark.parametrize("interval", [0, 0.5, -DAY])
+    def test_downsample_needs_interval_of_at_least_a_second(self, interval):
+        with pytest.raises(ValueError):
+            make_history().downsample(interval)
+
+    def test_sample_is_compact(self):
+        assert make_history(days=1000).nbytes == 1000 * 20
+
+
+class TestFactionBranchHistory:
+    def test_history_is_kept_per_faction_branch(self):
+        faction = FactionModel.create(name="Mother Gaia")
+        sol = FactionBranchModel.create(
+            faction=faction, system=SystemModel.create(name="Sol")
+        )
+        achenar = FactionBranchModel.create(
+            faction=faction, system=SystemModel.create(name="Achenar")
+        )
+
+        sol.history.add(START, 0.4)
+
+        assert len(sol.history) == 1
+        assert len(achenar.history) == 0
+
+    def test_record_history(self):
+        faction_branch = FactionBranchModel.create(
+            faction=FactionModel.create(name="Mother Gaia"),
+            system=SystemModel.create(name="Sol"),
+            influence=0.4,
+            active_states=[enums.State.BOOM],
+        )
+
+        faction_branch.record_history(START)
+
+        assert faction_branch.history.latest() == (
+            START,
+            pytest.approx(0.4),
+            [enums.State.BOOM],
+            [],
+            [],
+        )
+
+
+class TestLoadHistory:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        fake_client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="History"))
+        for cls in (System, Faction, FactionBranch):
+            monkeypatch.setattr(cls.adapter, "client", fake_client)
+        return fake_client
+
+    def test_history_of_all_branches_is_loaded_at_once(self, client):
+        faction = Faction.create(name="History Faction 1")
+        faction.faction_branches
+        client.requests_made.clear()
+
+        faction_branches = faction.adapter.load_history(
+            faction, START, START + timedelta(days=6)
+        )
+
+        assert client.requests_made == [
+            (
+                "factions",
+                {
+                    "name": "History Faction 1",
+                    "timeMin": START.timestamp() * 1000,
+                    "timeMax": (START.timestamp() + 6 * DAY) * 1000,
+                    "page": 1,
+                },
+            )
+        ]
+        assert {faction_branch.system.name for faction_branch in faction_branches} == {
+            "History System 0",
+            "History System 1",
+            "History System 2",
+        }
+        history = faction_branches[0].history
+        assert len(history) == 7
+        assert history.latest().timestamp == START + timedelta(days=6)
+        assert history.latest().influence == pytest.approx(0.26)
+        assert history.latest().active_states == [enums.State.BOOM]
+
+    def test_branches_are_not_created_for_systems_the_faction_left(self, client):
+        faction = Faction.create(name="History Faction 2")
+        left_branch, *current_branches = faction.faction_branches
+        left_system = left_branch.system
+        left_branch.delete()
+
+        faction_branches = faction.adapter.load_history(
+            faction, START, START + timedelta(days=6)
+        )
+
+        assert faction_branches == current_branches
+        assert faction.faction_branches == current_branches
+        assert (
+            FactionBranch.get_from_registry(faction=faction, system=left_branch.system)
+            is None
+        )
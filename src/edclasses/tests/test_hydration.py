@@ -0,0 +1,69 @@
+import pytest
+
+from .. import System, Faction, FactionBranch, OrbitalStation
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Hydration"))
+    for cls in (System, Faction, FactionBranch, OrbitalStation):
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+class TestSiblingHydration:
+    def test_loading_one_station_field_fills_all_stations(self, client):
+        system = System.create(name="Hydration System 0")
+        stations = system.stations
+
+        stations[0].services
+
+        for station in stations:
+            assert sorted(station.loaded_fields()) == [
+                "controlling_faction",
+                "distance_to_arrival",
+                "services",
+                "state",
+            ]
+        client.cache.clear()
+        client.requests_made.clear()
+        assert stations[1].state.value == "boom"
+        assert stations[3].controlling_faction.faction.name == "Hydration Faction 0"
+        assert client.requests_made == []
+
+    def test_loading_influence_fills_all_faction_branches(self, client):
+        system = System.create(name="Hydration System 1")
+        faction_branches = system.faction_branches
+
+        faction_branches[0].influence
+
+        for faction_branch in faction_branches:
+            assert sorted(faction_branch.loaded_fields()) == [
+                "active_states",
+                "influence",
+                "pending_states",
+                "recovering_states",
+            ]
+        client.cache.clear()
+        client.requests_made.clear()
+        assert [
+            float(faction_branch.influence) for faction_branch in faction_branches
+        ] == [0.1, 0.2, 0.3]
+        assert [state.value for state in faction_branches[0].pending_states] == [
+            "expansion"
+        ]
+        assert client.requests_made == []
+
+    def test_loading_stations_of_one_faction_branch_fills_all_branches(self, client):
+        system = System.create(name="Hydration System 2")
+        faction_branches = system.faction_branches
+
+        faction_branches[0].stations
+
+        client.cache.clear()
+        client.requests_made.clear()
+        assert [
+            len(faction_branch.stations) for faction_branch in faction_branches
+        ] == [2, 1, 1]
+        assert client.requests_made == []
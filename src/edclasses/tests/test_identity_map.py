@@ -0,0 +1,182 @@
+import gc
+import weakref
+
+import pytest
+
+from .. import enums
+from ..models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from ..utils import InstanceRegistry
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+def create_station(name, system):
+    return OrbitalStationModel.create(
+        name=name, station_type=enums.StationType.CORIOLIS, system=system
+    )
+
+
+class TestBoundedRegistry:
+    def test_least_recently_used_object_is_evicted(self):
+        SystemModel.set_max_instances(2)
+        sol = SystemModel.create(name="Sol")
+        SystemModel.create(name="Achenar")
+        SystemModel.create(name="Sol")
+
+        SystemModel.create(name="Lave")
+
+        assert SystemModel.get_from_registry(name="Sol") is sol
+        assert SystemModel.get_from_registry(name="Achenar") is None
+        assert len(SystemModel.registry) == 2
+
+    def test_lowering_the_limit_evicts_objects(self):
+        for i in range(5):
+            SystemModel.create(name=f"System {i}")
+
+        SystemModel.set_max_instances(3)
+
+        assert [system.name for system in SystemModel.registry.values()] == [
+            "System 2",
+            "System 3",
+            "System 4",
+        ]
+
+    def test_no_limit_by_default(self):
+        for i in range(50):
+            SystemModel.create(name=f"System {i}")
+
+        assert len(SystemModel.registry) == 50
+
+
+class TestEviction:
+    def test_held_object_survives_eviction(self):
+        SystemModel.set_max_instances(1)
+        sol = SystemModel.create(name="Sol")
+        daedalus = create_station("Daedalus", sol)
+
+        SystemModel.create(name="Achenar")
+
+        assert SystemModel.get_from_registry(name="Achenar") is not None
+        assert daedalus.system is sol
+        assert sol.stations == [daedalus]
+
+    def test_evicted_object_still_alive_is_not_created_again(self):
+        SystemModel.set_max_instances(1)
+        sol = SystemModel.create(name="Sol")
+        daedalus = create_station("Daedalus", sol)
+        SystemModel.create(name="Achenar")
+
+        assert SystemModel.create(name="Sol") is sol
+        assert sol.stations == [daedalus]
+        assert SystemModel.get_from_registry(name="Achenar") is None
+        assert len(SystemModel.registry) == 1
+
+    def test_evicted_object_is_freed_when_not_referenced(self):
+        SystemModel.set_max_instances(1)
+        sol = SystemModel.create(name="Sol")
+        create_station("Daedalus", sol)
+        sol_ref = weakref.ref(sol)
+        del sol
+
+        SystemModel.create(name="Achenar")
+        OrbitalStationModel.set_max_instances(0)
+        gc.collect()
+
+        assert sol_ref() is None
+
+    def test_evicted_object_leaves_the_indexes(self):
+        OrbitalStationModel.set_max_instances(1)
+        system = SystemModel.create(name="Sol")
+        abraham_lincoln = create_station("Abraham Lincoln", system)
+        abraham_lincoln.state = enums.State.BOOM
+
+        create_station("Daedalus", system)
+
+        assert OrbitalStationModel.query(state=enums.State.BOOM) == []
+        assert abraham_lincoln.system is system
+        assert (
+            OrbitalStationModel.get_from_registry(name="Abraham Lincoln", system=system)
+            is abraham_lincoln
+        )
+        assert OrbitalStationModel.query(state=enums.State.BOOM) == [abraham_lincoln]
+
+    def test_evicted_child_leaves_its_parents_until_looked_up(self):
+        OrbitalStationModel.set_max_instances(1)
+        system = SystemModel.create(name="Sol")
+        abraham_lincoln = create_station("Abraham Lincoln", system)
+
+        daedalus = create_station("Daedalus", system)
+
+        assert system.stations == [daedalus]
+        assert abraham_lincoln.system is system
+        assert create_station("Abraham Lincoln", system) is abraham_lincoln
+        assert system.stations == [abraham_lincoln]
+
+    def test_kept_parent_does_not_keep_evicted_children_alive(self):
+        FactionBranchModel.set_max_instances(1)
+        faction = FactionModel.create(name="Mother Gaia")
+        faction_branch_refs = [
+            weakref.ref(
+                FactionBranchModel.create(
+                    faction=faction, system=SystemModel.create(name=f"System {i}")
+                )
+            )
+            for i in range(3)
+        ]
+        gc.collect()
+
+        assert [ref() for ref in faction_branch_refs[:2]] == [None, None]
+        assert faction.faction_branches == [faction_branch_refs[2]()]
+
+
+class TestDelete:
+    def test_deleting_system_deletes_objects_identified_by_it(self):
+        system = SystemModel.create(name="Sol")
+        faction = FactionModel.create(name="Mother Gaia")
+        faction_branch = FactionBranchModel.create(faction=faction, system=system)
+        station = create_station("Daedalus", system)
+        station.controlling_faction = faction_branch
+
+        system.delete()
+
+        assert len(SystemModel.registry) == 0
+        assert len(OrbitalStationModel.registry) == 0
+        assert len(FactionBranchModel.registry) == 0
+        assert faction.faction_branches == []
+        assert station.system is None
+        assert faction_branch.stations == []
+
+    def test_deleting_faction_branch_keeps_stations(self):
+        system = SystemModel.create(name="Sol")
+        faction = FactionModel.create(name="Mother Gaia")
+        faction_branch = FactionBranchModel.create(faction=faction, system=system)
+        station = create_station("Daedalus", system)
+        station.controlling_faction = faction_branch
+
+        faction_branch.delete()
+
+        assert station.controlling_faction is None
+        assert system.stations == [station]
+        assert system.faction_branches == []
+        assert (
+            OrbitalStationModel.get_from_registry(name="Daedalus", system=system)
+            is station
+        )
+
+    def test_deleted_object_can_be_created_again(self):
+        system = SystemModel.create(name="Sol")
+        system.delete()
+
+        new_system = SystemModel.create(name="Sol")
+
+        assert new_system is not system
+        assert SystemModel.get_from_registry(name="Sol") is new_system
@@ -0,0 +1,147 @@
+import gzip
+import json
+from decimal import Decimal
+
+import pytest
+
+from .. import enums
+from ..loader import Loader, load
+from ..models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+    CompactSystemModel,
+    CompactFactionModel,
+    CompactFactionBranchModel,
+    CompactOrbitalStationModel,
+)
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi
+
+COMPACT_CLASSES = dict(
+    system_class=CompactSystemModel,
+    faction_class=CompactFactionModel,
+    faction_branch_class=CompactFactionBranchModel,
+    station_class=CompactOrbitalStationModel,
+)
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (
+        SystemModel,
+        FactionModel,
+        FactionBranchModel,
+        OrbitalStationModel,
+        *COMPACT_CLASSES.values(),
+    ):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    """
+    Writes systems, factions and stations dumps of a generated galaxy, the stations one gzipped.
+    """
+    api = FakeEliteBgsApi(prefix="Loader", systems=20)
+    api.page_size = 1000
+    paths = {}
+    for kind in ("systems", "factions", "stations"):
+        lines = "".join(json.dumps(doc) + "\n" for doc in api.get(kind)["docs"])
+        if kind == "stations":
+            path = tmp_path / f"{kind}.jsonl.gz"
+            with gzip.open(path, "wt") as file:
+                file.write(lines)
+        else:
+            path = tmp_path / f"{kind}.jsonl"
+            path.write_text(lines)
+        paths[kind] = str(path)
+    return paths
+
+
+def load_all(dumps, **kwargs):
+    loader = Loader(**kwargs)
+    for kind in ("systems", "factions", "stations"):
+        loader.load(dumps[kind], kind)
+    return loader
+
+
+class TestLoader:
+    def test_objects_and_relations_are_loaded(self, dumps):
+        loader = load_all(dumps)
+
+        assert len(SystemModel.registry) == 20
+        assert len(FactionModel.registry) == 3
+        assert len(FactionBranchModel.registry) == 60
+        assert len(OrbitalStationModel.registry) == 80
+
+        system = SystemModel.get_from_registry(name="Loader System 5")
+        assert system.eddb_id == 6
+        assert len(system.stations) == 4
+        assert len(system.faction_branches) == 3
+
+        station = OrbitalStationModel.get_from_registry(
+            name="Loader System 5 Station 1", system=system
+        )
+        assert station.station_type == enums.StationType.CORIOLIS
+        assert station.distance_to_arrival == Decimal(200)
+        assert station.services == [
+            enums.StationService.DOCK,
+            enums.StationService.MISSIONS,
+        ]
+        assert station.controlling_faction.faction.name == "Loader Faction 1"
+        assert station in station.controlling_faction.stations
+        assert float(station.controlling_faction.influence) == 0.2
+        assert station.controlling_faction.active_states == [enums.State.BOOM]
+
+        assert loader.stats["records"] == 20 + 3 + 80
+        assert loader.stats["created"] == 20 + 3 + 60 + 80
+        assert loader.stats["updated"] == 0
+
+    def test_loading_again_updates_objects(self, dumps):
+        load_all(dumps)
+
+        loader = Loader()
+        loader.load(dumps["stations"], "stations")
+
+        assert len(OrbitalStationModel.registry) == 80
+        assert loader.stats["created"] == 0
+        assert loader.stats["updated"] == 80
+
+    def test_progress_is_reported_per_chunk(self, dumps):
+        progress = []
+
+        load(dumps["stations"], "stations", chunk_size=25, on_progress=progress.append)
+
+        assert [stats["records"] for stats in progress] == [25, 50, 75, 80]
+        assert progress[-1]["records_per_second"] > 0
+
+    def test_parsing_in_process_pool(self, dumps):
+        load_all(dumps, processes=2, chunk_size=10)
+
+        assert len(OrbitalStationModel.registry) == 80
+        assert len(FactionBranchModel.registry) == 60
+        system = SystemModel.get_from_registry(name="Loader System 19")
+        assert len(system.stations) == 4
+
+    def test_loading_into_compact_models(self, dumps):
+        load_all(dumps, **COMPACT_CLASSES)
+
+        assert len(CompactOrbitalStationModel.registry) == 80
+        assert len(OrbitalStationModel.registry) == 0
+        system = CompactSystemModel.get_from_registry(name="Loader System 0")
+        assert [station.distance_to_arrival for station in system.stations] == [
+            100.0,
+            200.0,
+            300.0,
+            400.0,
+        ]
+        faction_branch = system.faction_branches[0]
+        assert type(faction_branch.influence) is float
+        assert type(faction_branch.active_states) is tuple
+        assert type(system.stations[0].distance_to_arrival) is float
+
+    def test_unknown_kind_raises_error(self, dumps):
+        with pytest.raises(ValueError):
+            Loader().load(dumps["systems"], "planets")
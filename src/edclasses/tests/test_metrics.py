@@ -0,0 +1,159 @@
+import pytest
+
+from .. import metrics, System, Faction, FactionBranch, OrbitalStation
+from ..commons.rate_scheduler import RateScheduler
+from ..metrics import MetricsRegistry
+from ..models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Metrics"))
+    for cls in CLASSES:
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    metrics_registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", metrics_registry)
+    return metrics_registry
+
+
+class TestMetrics:
+    def test_requests_and_cache_hits_are_counted_per_endpoint(self, client, registry):
+        client.get_request("systems", name="Metrics System 0")
+        client.get_request("systems", name="Metrics System 0")
+        client.get_request("factions", system="Metrics System 0")
+
+        assert registry.requests.value("systems") == 1
+        assert registry.requests.value("factions") == 1
+        assert registry.cache_hits.value("systems") == 1
+        assert registry.request_seconds.count("systems") == 1
+        assert registry.in_flight.value() == 0
+
+    def test_failed_requests_are_counted(self, client, registry, monkeypatch):
+        def fail(path, **kwargs):
+            raise RuntimeError("API is down")
+
+        monkeypatch.setattr(client.api, "get", fail)
+
+        with pytest.raises(RuntimeError):
+            client.get_request("ticks")
+
+        assert registry.requests.value("ticks") == 1
+        assert registry.request_errors.value("ticks") == 1
+
+    def test_field_loads_are_counted_per_model_and_field(self, client, registry):
+        system = System.create(name="Metrics System 0")
+        system.eddb_id
+        system.eddb_id
+        for faction_branch in system.faction_branches:
+            faction_branch.influence
+
+        assert registry.field_loads.value("System", "eddb_id") == 1
+        assert registry.field_loads.value("System", "faction_branches") == 1
+        assert registry.field_load_seconds.count("System", "eddb_id") == 1
+        # the first load fills the influence of all branches in the system
+        assert registry.field_loads.value("FactionBranch", "influence") == 1
+
+    def test_failed_field_loads_are_counted(self, client, registry, monkeypatch):
+        def fail(path, **kwargs):
+            raise RuntimeError("API is down")
+
+        monkeypatch.setattr(client.api, "get", fail)
+        system = System.create(name="Metrics System 0")
+
+        with pytest.raises(RuntimeError):
+            system.eddb_id
+
+        assert registry.field_load_errors.value("System", "eddb_id") == 1
+
+    def test_scheduler_wait_is_observed(self, registry):
+        RateScheduler(calls=5, period=10).acquire()
+
+        assert registry.scheduler_wait_seconds.count() == 1
+
+    def test_registry_sizes_are_tracked(self, client, registry):
+        registry.track_registries(System)
+        System.create(name="Metrics System 0")
+
+        assert registry.registry_objects.value("System") == 1
+
+    def test_nothing_is_recorded_when_disabled(self, client, monkeypatch):
+        metrics_registry = MetricsRegistry()
+        monkeypatch.setattr(metrics, "registry", None)
+
+        System.create(name="Metrics System 0").eddb_id
+
+        assert list(metrics_registry.samples()) == []
+
+    def test_enable_and_disable(self, monkeypatch):
+        monkeypatch.setattr(metrics, "registry", None)
+
+        metrics_registry = metrics.enable()
+        assert metrics.registry is metrics_registry
+
+        metrics.disable()
+        assert metrics.registry is None
+
+
+class TestExport:
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        registry.requests.inc("systems", amount=2)
+        registry.request_seconds.observe(0.02, "systems")
+        registry.field_loads.inc('Sys"tem', "eddb_id")
+
+        text = registry.to_prometheus()
+
+        assert "# TYPE edclasses_client_requests_total counter\n" in text
+        assert 'edclasses_client_requests_total{endpoint="systems"} 2\n' in text
+        assert (
+            'edclasses_client_request_seconds_bucket{endpoint="systems",le="0.01"} 0\n'
+            in text
+        )
+        assert (
+            'edclasses_client_request_seconds_bucket{endpoint="systems",le="0.025"} 1\n'
+            in text
+        )
+        assert (
+            'edclasses_client_request_seconds_bucket{endpoint="systems",le="+Inf"} 1\n'
+            in text
+        )
+        assert 'edclasses_client_request_seconds_count{endpoint="systems"} 1\n' in text
+        assert 'model="Sys\\"tem"' in text
+
+    def test_export_calls_back_for_every_sample(self):
+        registry = MetricsRegistry()
+        registry.requests.inc("ticks")
+        registry.in_flight.set(3)
+        samples = []
+
+        registry.export(lambda *sample: samples.append(sample))
+
+        assert samples == [
+            ("edclasses_client_requests_total", {"endpoint": "ticks"}, 1),
+            ("edclasses_client_in_flight_requests", {}, 3),
+        ]
+
+    def test_custom_metrics(self):
+        registry = MetricsRegistry()
+        votes = registry.counter("my_votes_total", "Votes.", ["faction"])
+
+        assert registry.counter("my_votes_total", "Votes.", ["faction"]) is votes
+        with pytest.raises(ValueError):
+            registry.gauge("my_votes_total", "Votes.")
+        with pytest.raises(ValueError):
+            votes.inc()
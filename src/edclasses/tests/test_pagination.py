@@ -0,0 +1,124 @@
+import itertools
+
+import pytest
+
+from .. import System, Faction, FactionBranch, OrbitalStation
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    api = FakeEliteBgsApi(prefix="Pagination", systems=3, factions_per_system=5)
+    api.page_size = 3
+    fake_client = FakeEliteBgsClient(api=api)
+    for cls in (System, Faction, FactionBranch, OrbitalStation):
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+class TestClientIteration:
+    def test_all_pages_are_followed(self, client):
+        stations = list(client.iter_stations())
+
+        assert len(stations) == 12
+        assert [params["page"] for _, params in client.requests_made] == [1, 2, 3, 4]
+
+    def test_pages_are_fetched_lazily(self, client):
+        first_stations = list(itertools.islice(client.iter_stations(), 4))
+
+        assert len(first_stations) == 4
+        assert len(client.requests_made) == 2
+
+    def test_pages_are_not_cached(self, client):
+        list(client.iter_systems())
+
+        assert len(client.cache) == 0
+
+    def test_filters_are_passed_to_every_page(self, client):
+        stations = list(client.iter_stations(system="Pagination System 1"))
+
+        assert len(stations) == 4
+        assert client.requests_made == [
+            ("stations", {"page": 1, "system": "Pagination System 1"}),
+            ("stations", {"page": 2, "system": "Pagination System 1"}),
+        ]
+
+
+class TestRelationsSpanningPages:
+    @pytest.fixture
+    def big_client(self, monkeypatch):
+        api = FakeEliteBgsApi(
+            prefix="Crowded", systems=1, factions_per_system=15, stations_per_system=25
+        )
+        fake_client = FakeEliteBgsClient(api=api)
+        for cls in (System, Faction, FactionBranch, OrbitalStation):
+            monkeypatch.setattr(cls.adapter, "client", fake_client)
+        return fake_client
+
+    def test_all_pages_of_relations_are_merged(self, big_client):
+        system = System.create(name="Crowded System 0")
+
+        assert len(system.stations) == 25
+        assert len(system.faction_branches) == 15
+        assert all(
+            faction_branch.influence is not None
+            for faction_branch in system.faction_branches
+        )
+        assert system.stations[-1].services
+        assert len(big_client.requests_made) == 5
+
+    def test_prefetch_fetches_all_pages(self, big_client):
+        System.prefetch(["Crowded System 0"], related=["stations", "faction_branches"])
+        requests_made = len(big_client.requests_made)
+        system = System.create(name="Crowded System 0")
+
+        assert [station.distance_to_arrival for station in system.stations][-1] == 2500
+        assert len(system.faction_branches) == 15
+        assert len(big_client.requests_made) == requests_made
+
+
+class TestIterAll:
+    def test_faction_branches_are_yielded_with_loaded_fields(self, client):
+        faction_branches = list(FactionBranch.iter_all())
+        requests_made = len(client.requests_made)
+
+        assert len(faction_branches) == 15
+        assert all(
+            faction_branch.influence is not None
+            and faction_branch.active_states is not None
+            for faction_branch in faction_branches
+        )
+        assert len(client.requests_made) == requests_made
+
+    def test_factions_are_yielded_with_loaded_branches(self, client):
+        factions = list(Faction.iter_all())
+        requests_made = len(client.requests_made)
+
+        assert [faction.name for faction in factions] == client.api.factions
+        for faction in factions:
+            assert len(faction.faction_branches) == 3
+            for faction_branch in faction.faction_branches:
+                faction_branch.influence
+                faction_branch.active_states
+        assert len(client.requests_made) == requests_made == 2
+
+    def test_stations_are_yielded_with_loaded_fields(self, client):
+        stations = list(OrbitalStation.iter_all(system="Pagination System 2"))
+        requests_made = len(client.requests_made)
+
+        assert len(stations) == 4
+        assert [station.distance_to_arrival for station in stations] == [
+            100,
+            200,
+            300,
+            400,
+        ]
+        assert all(station.services for station in stations)
+        assert len(client.requests_made) == requests_made
+
+    def test_systems_are_yielded_with_loaded_fields(self, client):
+        systems = list(System.iter_all())
+        requests_made = len(client.requests_made)
+
+        assert [system.eddb_id for system in systems] == [1, 2, 3]
+        assert len(client.requests_made) == requests_made
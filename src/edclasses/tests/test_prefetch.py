@@ -0,0 +1,87 @@
+import pytest
+
+from .. import System, Faction, FactionBranch, OrbitalStation
+from ..commons.caching_utils import MemoryCache
+from ..models import SystemModel
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Prefetch"))
+    for cls in (System, Faction, FactionBranch, OrbitalStation):
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+class TestPrefetch:
+    def test_system_fields_are_loaded_with_one_request_per_system(self, client):
+        systems = System.prefetch(
+            ["Prefetch System 0", "Prefetch System 1"], fields=["stations"]
+        )
+
+        assert client.requests_made == [
+            ("stations", {"system": "Prefetch System 0"}),
+            ("stations", {"system": "Prefetch System 1"}),
+        ]
+        client.requests_made.clear()
+        assert [len(system.stations) for system in systems] == [4, 4]
+        assert client.requests_made == []
+
+    def test_related_fields_are_loaded_for_whole_batch(self, client):
+        factions = Faction.prefetch(
+            ["Prefetch Faction 0", "Prefetch Faction 1"],
+            related=[
+                "faction_branches__stations",
+                "faction_branches__influence",
+                "faction_branches__active_states",
+            ],
+        )
+
+        assert sorted(client.requests_made, key=str) == sorted(
+            [
+                ("factions", {"name": "Prefetch Faction 0"}),
+                ("factions", {"name": "Prefetch Faction 1"}),
+                ("stations", {"system": "Prefetch System 0"}),
+                ("stations", {"system": "Prefetch System 1"}),
+                ("stations", {"system": "Prefetch System 2"}),
+                ("factions", {"system": "Prefetch System 0"}),
+                ("factions", {"system": "Prefetch System 1"}),
+                ("factions", {"system": "Prefetch System 2"}),
+            ],
+            key=str,
+        )
+        client.requests_made.clear()
+        for faction in factions:
+            for faction_branch in faction.faction_branches:
+                faction_branch.stations
+                faction_branch.influence
+                faction_branch.active_states
+        assert client.requests_made == []
+
+    def test_fresh_fields_are_not_loaded_again(self, client):
+        system = System.create(name="Prefetch System 2")
+        system.eddb_id
+        client.requests_made.clear()
+
+        System.prefetch([system], fields=["eddb_id"])
+
+        assert client.requests_made == []
+
+    def test_batch_larger_than_the_cache_sends_every_request_once(self, monkeypatch):
+        monkeypatch.setattr(SystemModel, "registry", InstanceRegistry())
+        fake_client = FakeEliteBgsClient(
+            api=FakeEliteBgsApi(prefix="Batch", systems=200),
+            cache=MemoryCache(max_entries=128),
+        )
+        monkeypatch.setattr(System.adapter, "client", fake_client)
+
+        systems = System.prefetch(
+            fake_client.api.systems, fields=["stations", "eddb_id"]
+        )
+
+        assert len(fake_client.requests_made) == 400
+        fake_client.requests_made.clear()
+        assert all(system.eddb_id is not None for system in systems)
+        assert fake_client.requests_made == []
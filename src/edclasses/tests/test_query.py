@@ -0,0 +1,134 @@
+import pytest
+
+from .. import enums, OrbitalStation, System
+from ..models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+)
+from ..utils import InstanceRegistry
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+def create_station(name, system, station_type=enums.StationType.CORIOLIS, **kwargs):
+    return OrbitalStationModel.create(
+        name=name, station_type=station_type, system=system, **kwargs
+    )
+
+
+class TestQuery:
+    def test_lookup_on_indexed_field(self):
+        sol = SystemModel.create(name="Sol")
+        daedalus = create_station(
+            "Daedalus",
+            sol,
+            services=[enums.StationService.MATERIALTRADER, enums.StationService.DOCK],
+        )
+        create_station("Galileo", sol, services=[enums.StationService.DOCK])
+
+        assert OrbitalStationModel.query(
+            services__contains=enums.StationService.MATERIALTRADER
+        ) == [daedalus]
+
+    def test_lookups_are_combined(self):
+        sol = SystemModel.create(name="Sol")
+        services = [enums.StationService.MATERIALTRADER]
+        create_station("Daedalus", sol, services=services)
+        create_station(
+            "Mars High", sol, station_type=enums.StationType.OUTPOST, services=services
+        )
+        ohm_city = create_station(
+            "Ohm City", SystemModel.create(name="LHS 3447"), services=services
+        )
+
+        stations = OrbitalStationModel.query(
+            services__contains=enums.StationService.MATERIALTRADER,
+            max_landing_pad__gte=enums.LandingPadSizes.LARGE,
+            system__in=[SystemModel.create(name="LHS 3447")],
+        )
+
+        assert stations == [ohm_city]
+
+    def test_lookup_on_relation(self):
+        sol = SystemModel.create(name="Sol")
+        faction = FactionModel.create(name="Mother Gaia")
+        faction_branch = FactionBranchModel.create(
+            faction=faction, system=sol, active_states=[enums.State.BOOM]
+        )
+        FactionBranchModel.create(
+            faction=FactionModel.create(name="Sol Workers' Party"), system=sol
+        )
+
+        assert FactionBranchModel.query(
+            faction=faction, active_states__contains=enums.State.BOOM
+        ) == [faction_branch]
+        assert FactionBranchModel.query(system=sol, faction__in=[faction]) == [
+            faction_branch
+        ]
+
+    def test_index_is_updated_when_field_changes(self):
+        sol = SystemModel.create(name="Sol")
+        station = create_station("Daedalus", sol)
+
+        station.services = [enums.StationService.SHIPYARD]
+
+        assert OrbitalStationModel.query(
+            services__contains=enums.StationService.SHIPYARD
+        ) == [station]
+        station.services = []
+        assert (
+            OrbitalStationModel.query(services__contains=enums.StationService.SHIPYARD)
+            == []
+        )
+
+    def test_stored_value_is_indexed_when_setter_converts_it(self):
+        station = create_station("Daedalus", SystemModel.create(name="Sol"))
+
+        station.services = (
+            enums.StationServiceFlag.MISSIONS | enums.StationServiceFlag.REFUEL
+        )
+
+        for service in (enums.StationService.MISSIONS, enums.StationService.REFUEL):
+            assert OrbitalStationModel.query(services__contains=service) == [station]
+        station.services = None
+        assert (
+            OrbitalStationModel.query(services__contains=enums.StationService.REFUEL)
+            == []
+        )
+
+    def test_deleted_object_is_removed_from_indexes(self):
+        station = create_station("Daedalus", SystemModel.create(name="Sol"))
+
+        station.delete()
+
+        assert OrbitalStationModel.query(station_type=enums.StationType.CORIOLIS) == []
+        assert (
+            OrbitalStationModel.registry.indexes["station_type"].get(
+                enums.StationType.CORIOLIS
+            )
+            == {}
+        )
+
+    def test_unknown_lookup_raises_error(self):
+        with pytest.raises(ValueError):
+            OrbitalStationModel.query(name__startswith="D")
+
+    def test_auto_refreshed_fields_are_not_loaded(self):
+        station = OrbitalStation.create(
+            name="Daedalus",
+            station_type=enums.StationType.CORIOLIS,
+            system=System.create(name="Sol"),
+        )
+        assert OrbitalStation.query(services__contains=enums.StationService.DOCK) == []
+
+        station.hydrate(services=[enums.StationService.DOCK])
+
+        assert OrbitalStation.query(services__contains=enums.StationService.DOCK) == [
+            station
+        ]
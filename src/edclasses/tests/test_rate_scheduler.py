@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from ..commons.rate_scheduler import DeadlineExceeded, Priority, RateScheduler
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+class ScheduledClient(FakeEliteBgsClient):
+    def _get_request(self, path="", priority=None, timeout=None, **kwargs):
+        # skips FakeEliteBgsClient override, so the requests go through the scheduler
+        return super(FakeEliteBgsClient, self)._get_request(
+            path, priority=priority, timeout=timeout, **kwargs
+        )
+
+
+class TestRateScheduler:
+    def test_burst_is_served_without_waiting(self):
+        scheduler = RateScheduler(calls=5, period=10)
+
+        waits = [scheduler.acquire() for _ in range(5)]
+
+        assert max(waits) < 0.05
+        assert scheduler.metrics()["acquired"] == 5
+
+    def test_caller_waits_for_the_next_token_instead_of_failing(self):
+        scheduler = RateScheduler(calls=10, period=1, burst=1)
+        scheduler.acquire()
+
+        wait = scheduler.acquire()
+
+        assert 0.05 <= wait < 0.5
+
+    def test_interactive_requests_overtake_background_ones(self):
+        scheduler = RateScheduler(calls=5, period=1, burst=1)
+        scheduler.acquire()
+        order = []
+
+        def acquire(name, priority):
+            scheduler.acquire(priority=priority)
+            order.append(name)
+
+        background = threading.Thread(
+            target=acquire, args=("background", Priority.BACKGROUND)
+        )
+        background.start()
+        while scheduler.queue_depth < 1:
+            time.sleep(0.001)
+        interactive = threading.Thread(
+            target=acquire, args=("interactive", Priority.INTERACTIVE)
+        )
+        interactive.start()
+        background.join()
+        interactive.join()
+
+        assert order == ["interactive", "background"]
+
+    def test_timeout_raises_deadline_exceeded(self):
+        scheduler = RateScheduler(calls=1, period=60)
+        scheduler.acquire()
+
+        with pytest.raises(DeadlineExceeded):
+            scheduler.acquire(timeout=0.05)
+
+        metrics = scheduler.metrics()
+        assert metrics["deadline_exceeded"] == 1
+        assert metrics["queue_depth"] == 0
+
+
+class TestClientScheduling:
+    def test_requests_over_the_limit_are_delayed_not_rejected(self):
+        client = ScheduledClient(
+            api=FakeEliteBgsApi(prefix="Scheduler", systems=4),
+            scheduler=RateScheduler(calls=20, period=1, burst=2),
+        )
+
+        start = time.monotonic()
+        for system_name in client.api.systems:
+            client.stations(system=system_name)
+
+        assert len(client.requests_made) == 4
+        assert time.monotonic() - start >= 0.09
+        assert client.scheduler.metrics()["acquired"] == 4
+
+    def test_request_timeout_is_passed_to_the_scheduler(self):
+        client = ScheduledClient(
+            api=FakeEliteBgsApi(prefix="Scheduler"),
+            scheduler=RateScheduler(calls=1, period=60),
+        )
+        client.stations(system="Scheduler System 0")
+
+        with pytest.raises(DeadlineExceeded):
+            client.stations(system="Scheduler System 1", timeout=0.01)
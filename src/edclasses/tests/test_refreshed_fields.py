@@ -0,0 +1,91 @@
+import pytest
+
+from ..utils import AutoRefreshMixin, RefreshedField
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr("edclasses.utils.time.monotonic", fake_clock)
+    return fake_clock
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.calls = []
+
+    def price(self, obj):
+        self.calls.append("price")
+        return len(self.calls) * 100
+
+    def hull(self, obj):
+        self.calls.append("hull")
+        return 1.0
+
+
+class ShipModel:
+    def __init__(self, name, price=None, **kwargs):
+        self.name = name
+        self.price = price
+
+
+class Ship(AutoRefreshMixin, ShipModel):
+    refreshed_fields = ("price",)
+
+
+class Warship(Ship):
+    refreshed_fields = ("price", "hull")
+
+
+class TestRefreshedField:
+    def test_value_is_loaded_once_until_it_expires(self, clock):
+        ship = Ship(name="Anaconda", adapter=FakeAdapter())
+
+        assert ship.price == 100
+        assert ship.price == 100
+        clock.now += Ship.EXPIRATION_TIME_MINUTES * 60
+
+        assert ship.price == 200
+        assert ship.adapter.calls == ["price", "price"]
+
+    def test_other_attributes_are_not_intercepted(self):
+        ship = Ship(name="Anaconda", adapter=FakeAdapter())
+
+        assert type(ship).__getattribute__ is object.__getattribute__
+        assert ship.name == "Anaconda"
+        assert ship.adapter.calls == []
+
+    def test_set_value_is_returned_once_hydrated(self):
+        ship = Ship(name="Anaconda", adapter=FakeAdapter())
+
+        ship.hydrate(price=5)
+
+        assert ship.price == 5
+        assert ship.loaded_fields() == ["price"]
+        assert ship.adapter.calls == []
+
+    def test_expired_field_is_reloaded(self):
+        ship = Ship(name="Anaconda", adapter=FakeAdapter())
+        ship.hydrate(price=5)
+
+        ship.expire()
+
+        assert ship.loaded_fields() == []
+        assert ship.price == 100
+
+    def test_subclass_adds_refreshed_fields(self):
+        warship = Warship(name="Federal Corvette", adapter=FakeAdapter())
+
+        assert isinstance(Warship.hull, RefreshedField)
+        assert Warship.price is Ship.price
+        assert warship.hull == 1.0
+        assert warship.price == 200
+        assert warship.adapter.calls == ["hull", "price"]
@@ -0,0 +1,206 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .. import utils, System, Faction, FactionBranch, OrbitalStation
+from ..commons.caching_utils import MemoryCache
+from ..commons.rate_scheduler import RateScheduler
+from ..models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+from ..refresher import BackgroundRefresher
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+EXPIRATION = FactionBranch.EXPIRATION_TIME_MINUTES * 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr("edclasses.utils.time.monotonic", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = FakeEliteBgsClient(
+        api=FakeEliteBgsApi(prefix="Refresher", systems=3),
+        scheduler=RateScheduler(calls=60, period=60),
+    )
+    for cls in CLASSES:
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+@pytest.fixture
+def refresher(client):
+    background_refresher = BackgroundRefresher(interval_seconds=10, lead_seconds=60)
+    background_refresher.install(*CLASSES)
+    yield background_refresher
+    background_refresher.stop()
+
+
+def first_branch(system_number):
+    return System.create(name=f"Refresher System {system_number}").faction_branches[0]
+
+
+class TestBackgroundRefresher:
+    def test_stale_value_is_returned_and_refreshed_in_background(
+        self, clock, client, refresher
+    ):
+        faction_branch = first_branch(0)
+        assert float(faction_branch.influence) == 0.1
+        client.requests_made.clear()
+        client.api.influence_shift = 1
+        clock.now += EXPIRATION + 1
+
+        assert float(faction_branch.influence) == 0.1
+        assert client.requests_made == []
+        assert refresher.stats["stale_reads"] == 1
+
+        refresher.run_once()
+
+        assert client.requests_made == [("factions", {"system": "Refresher System 0"})]
+        assert float(faction_branch.influence) == 0.2
+
+    def test_fields_are_refreshed_before_they_expire(self, clock, client, refresher):
+        faction_branch = first_branch(0)
+        faction_branch.influence
+        client.api.influence_shift = 1
+
+        clock.now += EXPIRATION - 120
+        assert refresher.run_once() == 0
+
+        clock.now += 90
+        assert refresher.run_once() > 0
+        assert float(faction_branch.influence) == 0.2
+        assert refresher.stats["stale_reads"] == 0
+
+    def test_cycle_does_not_fetch_evicted_responses_again(
+        self, clock, client, refresher
+    ):
+        client.cache = MemoryCache(max_entries=1)
+        faction_branches = [first_branch(number) for number in range(3)]
+        for faction_branch in faction_branches:
+            faction_branch.influence
+        client.requests_made.clear()
+
+        clock.now += EXPIRATION - 30
+        sent = refresher.run_once()
+
+        assert sent == 3
+        assert len(client.requests_made) == 3
+
+    def test_fields_never_loaded_are_loaded_by_the_reader(self, client, refresher):
+        system = System.create(name="Refresher System 0")
+
+        assert system.eddb_id is not None
+        assert client.requests_made == [("systems", {"name": "Refresher System 0"})]
+
+    def test_value_stale_for_too_long_is_loaded_by_the_reader(self, clock, client):
+        refresher = BackgroundRefresher(max_stale_seconds=60)
+        refresher.install(*CLASSES)
+        try:
+            faction_branch = first_branch(0)
+            faction_branch.influence
+            clock.now += EXPIRATION + 61
+
+            faction_branch.influence
+
+            assert refresher.stats["stale_reads"] == 0
+            assert faction_branch._expiration_registry["influence"] > clock.now
+        finally:
+            refresher.uninstall()
+
+    def test_values_are_not_stale_forever_by_default(self, clock, client, refresher):
+        faction_branch = first_branch(0)
+        faction_branch.influence
+        clock.now += EXPIRATION + 1
+        faction_branch.influence
+        assert refresher.stats["stale_reads"] == 1
+
+        # the refresher didn't run meanwhile
+        clock.now += EXPIRATION
+        faction_branch.influence
+
+        assert refresher.stats["stale_reads"] == 1
+        assert faction_branch._expiration_registry["influence"] > clock.now
+
+    def test_most_read_objects_go_first_within_budget(self, clock, client):
+        # one request per cycle
+        client.scheduler = RateScheduler(calls=6, period=60)
+        refresher = BackgroundRefresher(interval_seconds=10, budget_fraction=1)
+        refresher.install(*CLASSES)
+        try:
+            faction_branches = [first_branch(i) for i in range(3)]
+            for faction_branch in faction_branches:
+                faction_branch.influence
+            clock.now += EXPIRATION + 1
+            for _ in range(5):
+                faction_branches[2].influence
+            faction_branches[1].influence
+            client.requests_made.clear()
+
+            refresher.run_once()
+            refresher.run_once()
+
+            assert client.requests_made == [
+                ("factions", {"system": "Refresher System 2"}),
+                ("factions", {"system": "Refresher System 1"}),
+            ]
+        finally:
+            refresher.uninstall()
+
+    def test_start_and_stop(self, client, monkeypatch):
+        monkeypatch.setattr(utils, "_thread_safety_enabled", False)
+        refresher = BackgroundRefresher(interval_seconds=0.01, lead_seconds=60)
+        faction_branch = first_branch(0)
+        faction_branch.influence
+        faction_branch._expiration_registry["influence"] = time.monotonic() + 1
+        client.api.influence_shift = 1
+
+        refresher.start(*CLASSES)
+        try:
+            deadline = time.monotonic() + 5
+            while refresher.stats["refreshed_fields"] == 0:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert refresher.is_running
+            assert utils._thread_safety_enabled
+        finally:
+            refresher.stop()
+
+        assert float(faction_branch.influence) == 0.2
+        assert not refresher.is_running
+        assert FactionBranch.background_refresher is None
+
+    def test_reads_from_many_threads_are_all_counted(self, client, refresher):
+        faction_branch = first_branch(0)
+        faction_branch.influence
+
+        def read(_):
+            for _ in range(1000):
+                faction_branch.influence
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(read, range(8)))
+
+        assert refresher._read_count(faction_branch) == 8001
+        refresher._collect_reads()
+        refresher._collect_reads()
+        assert refresher._read_count(faction_branch) == 8001
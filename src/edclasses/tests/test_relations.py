@@ -1,3 +1,5 @@
+import pytest
+
 from ..utils import OneToManyRelation
 
 
@@ -106,3 +108,105 @@ class TestOneToManyRelation:
             assert child2.parent is new_parent
             assert new_parent.children == [child2]
             assert old_parent.children == [child1]
+
+        def test_keeping_some_children_keeps_their_links(self):
+            child1 = Child()
+            child2 = Child()
+            child3 = Child()
+            parent = Parent(children=[child1, child2])
+
+            parent.children = [child2, child3]
+
+            assert child1.parent is None
+            assert child2.parent is parent
+            assert child3.parent is parent
+            assert parent.children == [child2, child3]
+
+        def test_setting_the_same_children_again(self):
+            child1 = Child()
+            child2 = Child()
+            parent = Parent(children=[child1, child2])
+
+            parent.children = parent.children
+
+            assert parent.children == [child1, child2]
+            assert child1.parent is parent
+
+    class TestChildrenView:
+        def test_view_is_read_only(self):
+            parent = Parent(children=[Child()])
+
+            with pytest.raises(AttributeError):
+                parent.children.append(Child())
+            with pytest.raises(TypeError):
+                parent.children[0] = Child()
+
+        def test_view_behaves_like_a_sequence(self):
+            child1 = Child()
+            child2 = Child()
+            parent = Parent(children=[child1, child2])
+
+            assert len(parent.children) == 2
+            assert child2 in parent.children
+            assert parent.children[-1] is child2
+            assert parent.children[:1] == [child1]
+            assert list(reversed(parent.children)) == [child2, child1]
+            assert parent.children == (child1, child2)
+            assert parent.children != [child2, child1]
+
+        def test_view_is_live(self):
+            parent = Parent()
+            children = parent.children
+
+            child = Child(parent=parent)
+            assert children == [child]
+
+            parent.children = []
+            assert children == []
+
+        def test_indexing_sees_changes(self):
+            child1 = Child()
+            child2 = Child()
+            parent = Parent(children=[child1])
+            children = parent.children
+            assert children[0] is child1
+
+            child2.parent = parent
+            assert children[1] is child2
+
+            child1.parent = None
+            assert children[0] is child2
+
+            parent.children = [child1, child2]
+            assert children[0] is child1
+            assert children[-1] is child2
+
+            Child._parent_relation.forget(child2)
+            assert children[:] == [child1]
+            with pytest.raises(IndexError):
+                children[1]
+
+        def test_children_can_be_moved_while_iterating(self):
+            old_parent = Parent(children=[Child(), Child(), Child()])
+            new_parent = Parent()
+
+            for child in old_parent.children:
+                child.parent = new_parent
+
+            assert old_parent.children == []
+            assert len(new_parent.children) == 3
+
+    class TestBulk:
+        def test_link_many_links_all_children(self):
+            old_parent = Parent()
+            new_parent = Parent()
+            child1 = Child(parent=old_parent)
+            child2 = Child()
+
+            Child._parent_relation.link_many(
+                [(new_parent, child1), (new_parent, child2), (None, Child())]
+            )
+
+            assert new_parent.children == [child1, child2]
+            assert old_parent.children == []
+            assert child1.parent is new_parent
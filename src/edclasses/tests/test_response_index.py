@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ..api_adapters.response_index import IndexedResponse, ResponseIndexStore
+from ..commons.caching_utils import SqliteCache
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+class TestIndexedResponse:
+    def test_docs_are_found_by_name_regardless_of_case(self):
+        api = FakeEliteBgsApi(prefix="Index")
+        data = IndexedResponse(api.get("stations", system="Index System 0"))
+
+        assert data.get("INDEX SYSTEM 0 STATION 2")["distance_from_star"] == 300
+        assert data.get("Unknown Station") is None
+
+    def test_faction_presence_is_found_by_faction_and_system(self):
+        api = FakeEliteBgsApi(prefix="Index")
+        data = IndexedResponse(api.get("factions", name="Index Faction 1"))
+
+        faction_presence = data.faction_presence("index faction 1", "Index System 2")
+
+        assert faction_presence["system_name"] == "Index System 2"
+        assert data.faction_presence("Index Faction 0", "Index System 2") is None
+
+    def test_factions_in_system(self):
+        api = FakeEliteBgsApi(prefix="Index")
+        data = IndexedResponse(api.get("factions", system="Index System 1"))
+
+        factions = data.factions_in_system("Index System 1")
+
+        assert [faction["name"] for faction, _ in factions] == api.factions
+
+    def test_stations_controlled_by(self):
+        api = FakeEliteBgsApi(prefix="Index", stations_per_system=6)
+        data = IndexedResponse(api.get("stations", system="Index System 0"))
+
+        stations = data.stations_controlled_by("Index Faction 0")
+
+        assert [station["name"] for station in stations] == [
+            "Index System 0 Station 0",
+            "Index System 0 Station 3",
+        ]
+
+
+class TestResponseIndexStore:
+    def test_index_is_reused_for_the_same_response(self):
+        store = ResponseIndexStore()
+        response = {"docs": []}
+
+        assert store.get("key", response) is store.get("key", response)
+
+    def test_index_is_rebuilt_for_new_response(self):
+        store = ResponseIndexStore()
+
+        assert store.get("key", {"docs": []}) is not store.get("key", {"docs": []})
+
+    def test_index_is_reused_for_the_same_version(self):
+        store = ResponseIndexStore()
+
+        indexed_response = store.get("key", {"docs": []}, version=(1,))
+
+        assert store.get("key", {"docs": []}, version=(1,)) is indexed_response
+        assert store.get("key", {"docs": []}, version=(2,)) is not indexed_response
+
+    def test_store_can_be_used_from_many_threads(self):
+        store = ResponseIndexStore(max_entries=4)
+        evicted = []
+        store.on_evict = evicted.append
+
+        def use(thread):
+            for i in range(500):
+                store.get(f"key {(thread + i) % 8}", {"docs": []}, version=(i,))
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(use, range(8)))
+
+        assert len(store._indexes) == 4
+        assert len(evicted) == 8 * 500 - 4
+
+
+class TestClientIndexes:
+    def test_index_is_reused_with_cache_returning_new_objects(self, tmp_path):
+        client = FakeEliteBgsClient(
+            api=FakeEliteBgsApi(prefix="Index"),
+            cache=SqliteCache(str(tmp_path / "responses.sqlite")),
+        )
+
+        data = client.get_indexed("factions", system="Index System 0")
+
+        assert data.mark_hydrated("faction_branches")
+        assert client.get_indexed("factions", system="Index System 0") is data
+        assert not data.mark_hydrated("faction_branches")
+
+    def test_index_is_rebuilt_when_response_is_fetched_again(self):
+        client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Index"))
+        data = client.get_indexed("factions", system="Index System 0")
+
+        client.forget_pages("factions", system="Index System 0")
+
+        assert client.get_indexed("factions", system="Index System 0") is not data
+
+    def test_versions_are_kept_only_for_stored_indexes(self):
+        client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Index", systems=5))
+        client.response_indexes.max_entries = 2
+
+        for i in range(5):
+            client.get_indexed("factions", system=f"Index System {i}")
+            client.get_request("systems", name=f"Index System {i}")
+
+        assert len(client._response_versions) == 2
+        client.forget_pages("factions", system="Index System 4")
+        assert len(client._response_versions) == 1
@@ -0,0 +1,256 @@
+import enum
+from decimal import Decimal
+
+import pytest
+
+from .. import enums, snapshot, System, OrbitalStation
+from ..models import (
+    SystemModel,
+    FactionModel,
+    FactionBranchModel,
+    OrbitalStationModel,
+    CompactSystemModel,
+    CompactOrbitalStationModel,
+)
+from ..ticks import TickWatcher
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+CLASSES = (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel)
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (*CLASSES, CompactSystemModel, CompactOrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+def clear_registries():
+    for cls in (*CLASSES, CompactSystemModel, CompactOrbitalStationModel):
+        for obj in list(cls.registry.values()):
+            obj.delete()
+
+
+def create_graph():
+    sol = SystemModel.create(name="Sol", eddb_id=17072)
+    faction = FactionModel.create(name="Mother Gaia")
+    faction_branch = FactionBranchModel.create(
+        faction=faction,
+        system=sol,
+        influence=Decimal("0.35"),
+        active_states=[enums.State.BOOM],
+    )
+    OrbitalStationModel.create(
+        name="Daedalus",
+        station_type=enums.StationType.ORBIS,
+        system=sol,
+        distance_to_arrival=Decimal("212.5"),
+        services=[enums.StationService.DOCK, enums.StationService.SHIPYARD],
+        controlling_faction=faction_branch,
+    )
+
+
+calls = []
+
+
+def record_call(*args):
+    calls.append(args)
+
+
+class TestSnapshot:
+    def test_graph_is_restored(self, tmp_path):
+        path = str(tmp_path / "galaxy.snapshot")
+        create_graph()
+        assert snapshot.save(path) == 4
+        clear_registries()
+
+        assert snapshot.load(path) == 4
+
+        sol = SystemModel.get_from_registry(name="Sol")
+        assert sol.eddb_id == 17072
+        faction_branch = sol.faction_branches[0]
+        assert faction_branch.faction.name == "Mother Gaia"
+        assert faction_branch.influence == Decimal("0.35")
+        assert faction_branch.active_states == [enums.State.BOOM]
+        station = sol.stations[0]
+        assert station.name == "Daedalus"
+        assert station.station_type == enums.StationType.ORBIS
+        assert station.distance_to_arrival == Decimal("212.5")
+        assert station.services == [
+            enums.StationService.DOCK,
+            enums.StationService.SHIPYARD,
+        ]
+        assert station.controlling_faction is faction_branch
+        assert faction_branch.stations == [station]
+
+    def test_loading_into_existing_objects(self, tmp_path):
+        path = str(tmp_path / "galaxy.snapshot")
+        create_graph()
+        snapshot.save(path)
+        sol = SystemModel.get_from_registry(name="Sol")
+        sol.eddb_id = None
+
+        snapshot.load(path)
+
+        assert SystemModel.get_from_registry(name="Sol") is sol
+        assert sol.eddb_id == 17072
+        assert len(OrbitalStationModel.registry) == 1
+
+    def test_rows_are_read_from_memory_mapped_file(self, tmp_path):
+        path = str(tmp_path / "galaxy.snapshot")
+        create_graph()
+        snapshot.save(path)
+
+        with snapshot.SnapshotReader(path) as reader:
+            system_table = reader.tables[0]
+            values, expirations = reader.row(system_table, 0)
+            station_values, _ = reader.row(reader.tables[-1], 0)
+
+        assert system_table.cls is SystemModel
+        assert values == {
+            "name": "Sol",
+            "eddb_id": 17072,
+            "x": None,
+            "y": None,
+            "z": None,
+        }
+        assert expirations == {}
+        assert station_values["system"] == snapshot.Reference(0, 0)
+
+    def test_compact_classes(self, tmp_path):
+        path = str(tmp_path / "galaxy.snapshot")
+        sol = CompactSystemModel.create(name="Sol")
+        CompactOrbitalStationModel.create(
+            name="Daedalus",
+            station_type=enums.StationType.ORBIS,
+            system=sol,
+            distance_to_arrival=212.5,
+        )
+        snapshot.save(path, classes=[CompactSystemModel, CompactOrbitalStationModel])
+        clear_registries()
+
+        snapshot.load(path)
+
+        sol = CompactSystemModel.get_from_registry(name="Sol")
+        assert sol.stations[0].distance_to_arrival == 212.5
+        assert sol.stations[0].services == ()
+
+    def test_unsupported_value_is_not_saved(self, tmp_path):
+        SystemModel.create(name="Sol", eddb_id=object())
+
+        with pytest.raises(snapshot.SnapshotError, match="eddb_id.*object"):
+            snapshot.save(str(tmp_path / "galaxy.snapshot"))
+
+    @pytest.mark.parametrize("replaced", [enum.Enum, SystemModel])
+    def test_only_model_and_enum_classes_are_loaded(
+        self, tmp_path, monkeypatch, replaced
+    ):
+        path = str(tmp_path / "galaxy.snapshot")
+        create_graph()
+        class_path = snapshot._class_path
+        monkeypatch.setattr(
+            snapshot,
+            "_class_path",
+            lambda cls: (
+                f"{__name__}:record_call"
+                if issubclass(cls, replaced)
+                else class_path(cls)
+            ),
+        )
+        snapshot.save(path)
+        clear_registries()
+
+        with pytest.raises(snapshot.SnapshotError):
+            snapshot.load(path)
+        assert calls == []
+
+    def test_not_a_snapshot(self, tmp_path):
+        path = tmp_path / "galaxy.snapshot"
+        path.write_bytes(b"definitely not a snapshot")
+
+        with pytest.raises(snapshot.SnapshotError):
+            snapshot.load(str(path))
+
+
+class TestSnapshotOfRefreshedFields:
+    def test_fresh_fields_stay_fresh(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "galaxy.snapshot")
+        sol = System.create(name="Snapshot Sol")
+        sol.hydrate(eddb_id=1)
+        station = OrbitalStation.create(
+            name="Snapshot Station", station_type=enums.StationType.ORBIS, system=sol
+        )
+        station.hydrate(services=[enums.StationService.DOCK])
+        station.expire("services")
+        snapshot.save(path)
+        clear_registries()
+
+        snapshot.load(path)
+
+        sol = System.get_from_registry(name="Snapshot Sol")
+        assert isinstance(sol, System)
+        assert sol.loaded_fields() == ["eddb_id"]
+        assert sol.eddb_id == 1
+        station = OrbitalStation.get_from_registry(name="Snapshot Station", system=sol)
+        assert station.loaded_fields() == []
+
+    def test_expired_while_saved(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "galaxy.snapshot")
+        sol = System.create(name="Snapshot Sol")
+        sol.hydrate(eddb_id=1)
+        snapshot.save(path)
+        clear_registries()
+        monkeypatch.setattr(
+            "edclasses.snapshot.time.time",
+            lambda: 10**10,
+        )
+
+        snapshot.load(path)
+
+        assert System.get_from_registry(name="Snapshot Sol").loaded_fields() == []
+
+
+class TestSnapshotWithTickWatcher:
+    @pytest.fixture
+    def watcher(self):
+        tick_watcher = TickWatcher(
+            client=FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Snapshot")),
+            poll_interval_minutes=60,
+        )
+        tick_watcher.install(System)
+        yield tick_watcher
+        tick_watcher.uninstall()
+
+    def save_system(self, path):
+        System.create(name="Snapshot Sol").hydrate(eddb_id=1)
+        snapshot.save(path)
+        clear_registries()
+
+    def test_fields_stay_fresh_until_the_tick(self, tmp_path, watcher):
+        path = str(tmp_path / "galaxy.snapshot")
+        self.save_system(path)
+
+        snapshot.load(path)
+
+        assert System.get_from_registry(name="Snapshot Sol").loaded_fields() == [
+            "eddb_id"
+        ]
+
+    def test_fields_expire_after_new_tick(self, tmp_path, watcher):
+        path = str(tmp_path / "galaxy.snapshot")
+        self.save_system(path)
+        watcher.client.api.tick = "2022-01-02T12:00:00.000Z"
+        watcher.poll()
+
+        snapshot.load(path)
+
+        assert System.get_from_registry(name="Snapshot Sol").loaded_fields() == []
+
+    def test_fields_expire_without_tick_watcher(self, tmp_path, watcher):
+        path = str(tmp_path / "galaxy.snapshot")
+        self.save_system(path)
+        watcher.uninstall()
+
+        snapshot.load(path)
+
+        assert System.get_from_registry(name="Snapshot Sol").loaded_fields() == []
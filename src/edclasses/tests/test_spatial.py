@@ -0,0 +1,151 @@
+import math
+import random
+
+import pytest
+
+from .. import System
+from ..models import SystemModel, CompactSystemModel
+from ..spatial import SpatialIndex
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, CompactSystemModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def index():
+    index = SpatialIndex(cell_size=10)
+    yield index
+    index.detach()
+
+
+def create_system(name, x, y, z, cls=SystemModel):
+    return cls.create(name=name, x=x, y=y, z=z)
+
+
+def brute_force(systems, point):
+    return sorted((math.dist(system.coordinates, point), system) for system in systems)
+
+
+class TestSystemCoordinates:
+    def test_distance_to(self):
+        sol = create_system("Sol", 0, 0, 0)
+        alpha_centauri = create_system("Alpha Centauri", 3.03125, -0.09375, 3.15625)
+
+        assert sol.distance_to(alpha_centauri) == pytest.approx(4.377, abs=1e-3)
+
+    def test_coordinates_are_none_until_known(self):
+        assert SystemModel.create(name="Sol").coordinates is None
+
+    def test_coordinates_are_loaded_with_eddb_id(self, monkeypatch):
+        client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Spatial"))
+        monkeypatch.setattr(System.adapter, "client", client)
+        system = System.create(name="Spatial System 2")
+
+        assert system.coordinates == (20.0, 0.0, -5.0)
+        assert system.eddb_id == 3
+        assert client.requests_made == [("systems", {"name": "Spatial System 2"})]
+
+
+class TestSpatialIndex:
+    def test_existing_systems_are_indexed(self):
+        sol = create_system("Sol", 0, 0, 0)
+        index = SpatialIndex()
+        try:
+            assert sol in index
+        finally:
+            index.detach()
+
+    def test_index_follows_coordinates(self, index):
+        sol = create_system("Sol", 0, 0, 0)
+        unknown = SystemModel.create(name="Unknown")
+        assert unknown not in index
+
+        sol.x = 100
+        unknown.x, unknown.y, unknown.z = 1, 1, 1
+
+        assert index.within((0, 0, 0), radius=5) == [(unknown, math.sqrt(3))]
+        sol.delete()
+        assert sol not in index
+
+    def test_within(self, index):
+        sol = create_system("Sol", 0, 0, 0)
+        close = create_system("Close", 9, -9, 0)
+        create_system("Far", 15, 0, 0)
+
+        assert index.within(sol, radius=14) == [
+            (sol, 0.0),
+            (close, pytest.approx(math.sqrt(162))),
+        ]
+
+    def test_nearest_skips_the_center(self, index):
+        sol = create_system("Sol", 0, 0, 0)
+        close = create_system("Close", 1, 0, 0)
+        create_system("Far", 500, 0, 0)
+
+        assert index.nearest(sol) == [(close, 1.0)]
+        assert index.nearest((0, 0, 0), k=2) == [(sol, 0.0), (close, 1.0)]
+        assert len(index.nearest(sol, k=10)) == 2
+
+    def test_unknown_center(self, index):
+        with pytest.raises(ValueError):
+            index.nearest(SystemModel.create(name="Unknown"))
+
+    @pytest.mark.parametrize("cls", [SystemModel, CompactSystemModel])
+    def test_results_match_brute_force(self, cls):
+        random.seed(1)
+        systems = [
+            create_system(
+                f"System {i}",
+                random.uniform(-100, 100),
+                random.uniform(-20, 20),
+                random.uniform(-100, 100),
+                cls=cls,
+            )
+            for i in range(500)
+        ]
+        index = SpatialIndex(cls, cell_size=15)
+        try:
+            for point in [(0, 0, 0), (90, 10, -90), (500, 0, 0)]:
+                expected = brute_force(systems, point)
+                assert [system for system, _ in index.nearest(point, k=7)] == [
+                    system for _, system in expected[:7]
+                ]
+                assert [system for system, _ in index.within(point, 30)] == [
+                    system for distance, system in expected if distance <= 30
+                ]
+        finally:
+            index.detach()
+
+    def test_far_apart_clusters(self):
+        # the empty space between the clusters is thousands of cells wide
+        random.seed(2)
+        systems = [
+            create_system(
+                f"System {i}",
+                random.gauss(center[0], 50),
+                random.gauss(0, 20),
+                random.gauss(center[1], 50),
+            )
+            for i, center in enumerate([(0, 0)] * 200 + [(-9530, 19808)] * 30)
+        ]
+        index = SpatialIndex(cell_size=20)
+        try:
+            colonia = systems[-1]
+            expected = brute_force(systems, colonia.coordinates)
+
+            nearest = index.nearest(colonia, k=35)
+            within = index.within(colonia, 25000)
+
+            assert [system for system, _ in nearest] == [
+                system for _, system in expected[1:36]
+            ]
+            assert [system for system, _ in within] == [
+                system for _, system in expected
+            ]
+        finally:
+            index.detach()
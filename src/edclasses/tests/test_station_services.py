@@ -0,0 +1,112 @@
+import pytest
+
+from .. import enums
+from ..enums import StationService, StationServiceFlag, StationServices
+from ..models import SystemModel, OrbitalStationModel, CompactOrbitalStationModel
+from ..utils import InstanceRegistry
+from ..api_adapters.elite_bgs_adapter import EliteBgsStationAdapter
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    for cls in (SystemModel, OrbitalStationModel, CompactOrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+class TestStationServices:
+    def test_behaves_like_a_list(self):
+        services = StationServices([StationService.REPAIR, StationService.DOCK])
+
+        assert len(services) == 2
+        assert list(services) == [StationService.REPAIR, StationService.DOCK]
+        assert services[-1] is StationService.DOCK
+        assert services == [StationService.DOCK, StationService.REPAIR]
+        assert services == (StationService.DOCK, StationService.REPAIR)
+        assert services != [StationService.DOCK]
+        assert services != ["dock", "repair"]
+        assert repr(services) == repr([StationService.REPAIR, StationService.DOCK])
+        assert not StationServices()
+
+    def test_membership_and_subsets(self):
+        services = StationServices([StationService.REPAIR, StationService.REFUEL])
+
+        assert StationService.REPAIR in services
+        assert StationService.SHIPYARD not in services
+        assert "repair" not in services
+        assert services.has_all([StationService.REPAIR, StationService.REFUEL])
+        assert not services.has_all([StationService.REPAIR, StationService.SHIPYARD])
+        assert services.has_any(StationServiceFlag.SHIPYARD | StationServiceFlag.REFUEL)
+
+    def test_flags(self):
+        services = StationServices(
+            StationServiceFlag.DOCK | StationServiceFlag.MISSIONS
+        )
+
+        assert services == [StationService.DOCK, StationService.MISSIONS]
+        assert services.flags == StationServiceFlag.DOCK | StationServiceFlag.MISSIONS
+
+    def test_from_values(self):
+        assert StationServices.from_values(["dock", "missions"]) == [
+            StationService.DOCK,
+            StationService.MISSIONS,
+        ]
+        with pytest.raises(ValueError):
+            StationServices.from_values(["teleporter"])
+
+    def test_adapter_returns_services(self):
+        services = EliteBgsStationAdapter._get_services(
+            {"services": [{"name": "Dock", "name_lower": "dock"}]}
+        )
+        assert isinstance(services, StationServices)
+        assert services == [StationService.DOCK]
+
+
+class TestStationModelServices:
+    @pytest.mark.parametrize("cls", [OrbitalStationModel, CompactOrbitalStationModel])
+    def test_assigned_services_are_converted(self, cls):
+        station = cls.create(
+            name="Daedalus",
+            station_type=enums.StationType.ORBIS,
+            system=SystemModel.create(name="Sol"),
+            services=[StationService.DOCK],
+        )
+        assert isinstance(station.services, StationServices)
+
+        station.services = [StationService.SHIPYARD]
+
+        assert isinstance(station.services, StationServices)
+        assert station.services == [StationService.SHIPYARD]
+        assert cls.query(services__contains=StationService.SHIPYARD) == [station]
+
+
+class TestVectorizedFiltering:
+    def test_with_services(self):
+        pytest.importorskip("numpy")
+        from ..analytics import service_masks, with_services
+
+        sol = SystemModel.create(name="Sol")
+        stations = [
+            OrbitalStationModel.create(
+                name=f"Station {i}",
+                station_type=enums.StationType.ORBIS,
+                system=sol,
+                services=services,
+            )
+            for i, services in enumerate(
+                [
+                    [StationService.DOCK, StationService.REPAIR],
+                    [StationService.DOCK],
+                    [StationService.REPAIR, StationService.REFUEL, StationService.DOCK],
+                ]
+            )
+        ]
+
+        assert list(service_masks(stations)) == [
+            station.services.mask for station in stations
+        ]
+        assert with_services(
+            stations, [StationService.REPAIR, StationService.DOCK]
+        ) == [
+            stations[0],
+            stations[2],
+        ]
@@ -0,0 +1,87 @@
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .. import enums
+from ..models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+from ..utils import enable_thread_safety
+
+
+@pytest.fixture(autouse=True)
+def thread_safety():
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible to provoke races
+    enable_thread_safety()
+    yield
+    enable_thread_safety(False)
+    sys.setswitchinterval(switch_interval)
+
+
+def run_in_threads(func, threads=8):
+    barrier = threading.Barrier(threads)
+
+    def run(thread_number):
+        barrier.wait()
+        return func(thread_number)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(run, range(threads)))
+
+
+class TestThreadSafety:
+    def test_create_returns_the_same_instance_in_all_threads(self):
+        faction = FactionModel.create(name="Thread Safety Faction")
+        systems = [
+            SystemModel.create(name=f"Thread Safety System {i}") for i in range(20)
+        ]
+
+        def create_branches(_):
+            return [
+                FactionBranchModel.create(faction=faction, system=system)
+                for system in systems
+            ]
+
+        results = run_in_threads(create_branches)
+
+        for faction_branches in results:
+            assert faction_branches == results[0]
+        assert len(faction.faction_branches) == len(systems)
+        for system in systems:
+            assert len(system.faction_branches) == 1
+
+    def test_relations_stay_consistent_under_contention(self):
+        systems = [SystemModel.create(name=f"Contention System {i}") for i in range(5)]
+        stations = [
+            OrbitalStationModel.create(
+                name=f"Contention Station {i}",
+                station_type=enums.StationType.CORIOLIS,
+                system=systems[0],
+            )
+            for i in range(50)
+        ]
+
+        def shuffle_relations(thread_number):
+            rng = random.Random(thread_number)
+            for _ in range(300):
+                if rng.random() < 0.8:
+                    rng.choice(stations).system = rng.choice(systems)
+                else:
+                    rng.choice(systems).stations = rng.sample(stations, 5)
+
+        run_in_threads(shuffle_relations)
+
+        stations_in_systems = []
+        for system in systems:
+            assert len(set(system.stations)) == len(system.stations)
+            for station in system.stations:
+                assert station.system is system
+            stations_in_systems.extend(system.stations)
+        for station in stations:
+            if station.system is not None:
+                assert station in station.system.stations
+        assert len(stations_in_systems) == len(
+            [station for station in stations if station.system is not None]
+        )
@@ -0,0 +1,103 @@
+import pytest
+
+from .. import System, Faction, FactionBranch, OrbitalStation
+from ..ticks import TickWatcher
+from .fake_api import FakeEliteBgsApi, FakeEliteBgsClient
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = FakeEliteBgsClient(api=FakeEliteBgsApi(prefix="Ticks"))
+    for cls in CLASSES:
+        monkeypatch.setattr(cls.adapter, "client", fake_client)
+    return fake_client
+
+
+@pytest.fixture
+def watcher(client):
+    tick_watcher = TickWatcher(client=client, poll_interval_minutes=60)
+    tick_watcher.install(*CLASSES)
+    yield tick_watcher
+    tick_watcher.uninstall()
+
+
+def load_system(name):
+    system = System.create(name=name)
+    for faction_branch in system.faction_branches:
+        faction_branch.influence
+        faction_branch.active_states
+    for station in system.stations:
+        station.services
+    return system
+
+
+class TestTickWatcher:
+    def test_install_polls_for_the_current_tick(self, client, watcher):
+        assert watcher.current_tick == client.api.tick
+        assert client.requests_made == [("ticks", {})]
+
+    def test_data_is_not_reloaded_before_new_tick(self, client, watcher):
+        system = load_system("Ticks System 0")
+        client.requests_made.clear()
+
+        assert watcher.poll() is False
+        load_system("Ticks System 0")
+
+        assert client.requests_made == [("ticks", {})]
+        assert float(system.faction_branches[0].influence) == 0.1
+
+    def test_new_tick_only_expires_tracked_fields(self, client, watcher):
+        system = load_system("Ticks System 1")
+        client.requests_made.clear()
+        client.api.tick = "2022-01-02T12:00:00.000Z"
+        client.api.influence_shift = 1
+
+        assert watcher.poll() is True
+
+        assert client.requests_made == [("ticks", {})]
+        assert float(system.faction_branches[0].influence) == 0.2
+
+    def test_tracked_fields_are_refreshed_with_grouped_requests(self, client, watcher):
+        system = load_system("Ticks System 1")
+        client.api.tick = "2022-01-02T12:00:00.000Z"
+        client.api.influence_shift = 1
+        watcher.poll()
+        client.requests_made.clear()
+
+        watcher.refresh_tracked()
+
+        assert sorted(path for path, params in client.requests_made) == [
+            "factions",
+            "stations",
+        ]
+        client.requests_made.clear()
+        assert float(system.faction_branches[0].influence) == 0.2
+        assert client.requests_made == []
+
+    def test_reading_an_attribute_after_a_tick_loads_only_its_data(
+        self, client, watcher
+    ):
+        system = load_system("Ticks System 1")
+        load_system("Ticks System 2")
+        client.api.tick = "2022-01-02T12:00:00.000Z"
+        watcher._last_poll = None
+        client.requests_made.clear()
+
+        system.stations
+
+        assert client.requests_made == [
+            ("ticks", {}),
+            ("stations", {"system": "Ticks System 1"}),
+        ]
+
+    def test_unloaded_fields_are_not_refreshed(self, client, watcher):
+        System.create(name="Ticks System 2").stations
+        client.api.tick = "2022-01-03T12:00:00.000Z"
+        watcher.poll()
+        client.requests_made.clear()
+
+        watcher.refresh_tracked()
+
+        assert [path for path, params in client.requests_made] == ["stations"]
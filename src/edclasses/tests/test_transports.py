@@ -0,0 +1,158 @@
+import gzip
+import time
+
+import pytest
+
+from .. import System, Faction, FactionBranch, OrbitalStation
+from ..api_clients import EliteBgsClient
+from ..commons.caching_utils import SqliteCache
+from ..commons.rate_scheduler import RateScheduler
+from ..commons.transports import (
+    CassetteMiss,
+    RecordingTransport,
+    ReplayTransport,
+    recording,
+    replaying,
+)
+from ..models import SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel
+from ..utils import InstanceRegistry
+from .fake_api import FakeEliteBgsApi, FakeTransport
+
+CLASSES = (System, Faction, FactionBranch, OrbitalStation)
+
+
+def reset_registries(monkeypatch):
+    for cls in (SystemModel, FactionModel, FactionBranchModel, OrbitalStationModel):
+        monkeypatch.setattr(cls, "registry", InstanceRegistry())
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport(FakeEliteBgsApi(prefix="Cassette"))
+
+
+@pytest.fixture
+def client(monkeypatch, transport):
+    reset_registries(monkeypatch)
+    api_client = EliteBgsClient(
+        transport=transport, scheduler=RateScheduler(calls=1, period=60, burst=100)
+    )
+    for cls in CLASSES:
+        monkeypatch.setattr(cls.adapter, "client", api_client)
+    return api_client
+
+
+def load_system(name):
+    system = System.create(name=name)
+    return (
+        system.eddb_id,
+        [
+            (faction_branch.faction.name, float(faction_branch.influence))
+            for faction_branch in system.faction_branches
+        ],
+        [(station.name, list(station.services)) for station in system.stations],
+    )
+
+
+class TestRecordAndReplay:
+    def test_replay_serves_recorded_responses(self, tmp_path, transport):
+        cassette = tmp_path / "cassette.jsonl.gz"
+        with RecordingTransport(cassette, transport) as recorder:
+            client = EliteBgsClient(transport=recorder)
+            recorded = client.factions(system="Cassette System 0")
+            client.stations(system="Cassette System 0")
+        assert recorder.recorded == 2
+
+        replayed = EliteBgsClient(transport=ReplayTransport(cassette)).factions(
+            system="Cassette System 0"
+        )
+
+        assert replayed == recorded
+        assert len(transport.requests_made) == 2
+
+    def test_cassette_is_compressed(self, tmp_path, transport):
+        cassette = tmp_path / "cassette.jsonl.gz"
+        with RecordingTransport(cassette, transport) as recorder:
+            EliteBgsClient(transport=recorder).factions(system="Cassette System 0")
+
+        with open(cassette, "rb") as file:
+            assert file.read(2) == b"\x1f\x8b"
+        with gzip.open(cassette, "rt") as file:
+            assert file.readline() == '{"cassette": 1}\n'
+
+    def test_lzma_cassette(self, tmp_path, transport):
+        cassette = tmp_path / "cassette.jsonl.xz"
+        with RecordingTransport(cassette, transport) as recorder:
+            EliteBgsClient(transport=recorder).ticks()
+
+        assert len(ReplayTransport(cassette)) == 1
+
+    def test_whole_session_is_replayed_without_network_and_rate_limit(
+        self, tmp_path, monkeypatch, client, transport
+    ):
+        cassette = tmp_path / "session.jsonl.gz"
+        with recording(client, cassette):
+            recorded = [load_system(name) for name in transport.api.systems]
+        requests_count = len(transport.requests_made)
+        acquired = client.scheduler.metrics()["acquired"]
+
+        reset_registries(monkeypatch)
+        with replaying(client, cassette):
+            start = time.monotonic()
+            replayed = [load_system(name) for name in transport.api.systems]
+            elapsed = time.monotonic() - start
+
+        assert replayed == recorded
+        assert len(transport.requests_made) == requests_count
+        assert client.scheduler.metrics()["acquired"] == acquired
+        assert elapsed < 1
+        assert client.transport is transport
+
+    def test_cache_of_the_client_is_left_untouched(self, tmp_path, client):
+        cassette = tmp_path / "session.jsonl.gz"
+        cache = client.cache = SqliteCache(str(tmp_path / "responses.sqlite"))
+        cache.set("kept", {"docs": []})
+
+        with recording(client, cassette):
+            client.factions(system="Cassette System 0")
+        with replaying(client, cassette):
+            client.factions(system="Cassette System 0")
+
+        assert client.cache is cache
+        assert cache.get("kept") == {"docs": []}
+        assert len(cache) == 1
+
+    def test_responses_are_served_in_recorded_order(self, tmp_path, transport):
+        cassette = tmp_path / "ticks.jsonl.gz"
+        with RecordingTransport(cassette, transport) as recorder:
+            client = EliteBgsClient(transport=recorder)
+            first_tick = client.latest_tick()
+            transport.api.tick = "2022-01-02T12:00:00.000Z"
+            second_tick = client.latest_tick()
+
+        replayed = EliteBgsClient(transport=ReplayTransport(cassette))
+
+        assert replayed.latest_tick() == first_tick
+        assert replayed.latest_tick() == second_tick
+        # the last response is repeated
+        assert replayed.latest_tick() == second_tick
+        replayed.transport.rewind()
+        assert replayed.latest_tick() == first_tick
+
+    def test_request_missing_from_cassette(self, tmp_path, transport):
+        cassette = tmp_path / "cassette.jsonl.gz"
+        with RecordingTransport(cassette, transport) as recorder:
+            EliteBgsClient(transport=recorder).ticks()
+
+        client = EliteBgsClient(transport=ReplayTransport(cassette))
+
+        with pytest.raises(CassetteMiss):
+            client.factions(system="Cassette System 0")
+
+    def test_file_which_is_not_a_cassette(self, tmp_path):
+        path = tmp_path / "other.jsonl.gz"
+        with gzip.open(path, "wt") as file:
+            file.write('{"docs": []}\n')
+
+        with pytest.raises(ValueError):
+            ReplayTransport(path)
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import List, Tuple
+
+from .api_adapters.elite_bgs_adapter import ELITE_BGS_CLIENT
+from .utils import load_fields
+
+
+class TickWatcher:
+    """
+    Keeps the data of auto-refreshed classes valid until the next BGS tick, instead of expiring it every few minutes.
+
+    The watcher asks the API for the latest tick at most once per poll_interval_minutes. When a new tick shows up, the
+    client cache is dropped and every field which has already been loaded on the watched classes is expired - nothing
+    is fetched right away, as the tick is usually noticed by reading an attribute. Expired fields are reloaded on their
+    next read, by the background refresher if the class has one, or all at once with refresh_tracked.
+
+    Usage:
+    >>> watcher = TickWatcher()
+    >>> watcher.install(System, Faction, FactionBranch, OrbitalStation)
+    """
+
+    def __init__(
+        self,
+        client=None,
+        poll_interval_minutes: float = 5,
+    ):
+        self.client = client if client is not None else ELITE_BGS_CLIENT
+        self.poll_interval_minutes = poll_interval_minutes
+        self.classes = []
+        self.current_tick = None
+        self._last_poll = None
+
+    def install(self, *classes):
+        for cls in classes:
+            cls.tick_watcher = self
+            if cls not in self.classes:
+                self.classes.append(cls)
+
+        if self.current_tick is None:
+            self.poll()
+
+    def uninstall(self):
+        for cls in self.classes:
+            cls.tick_watcher = None
+            self._expire_all(cls)
+        self.classes = []
+
+    def _is_poll_due(self) -> bool:
+        return (
+            self._last_poll is None
+            or time.monotonic() - self._last_poll >= self.poll_interval_minutes * 60
+        )
+
+    def check(self) -> bool:
+        """
+        Polls the API for the latest tick, unless it has been done less than poll_interval_minutes ago.
+        """
+        if not self._is_poll_due():
+            return False
+        return self.poll()
+
+    async def acheck(self) -> bool:
+        """
+        Asynchronous version of check - the API is polled in the executor.
+        """
+        if not self._is_poll_due():
+            return False
+        # taken right away, so the other tasks checking meanwhile don't poll too
+        self._last_poll = time.monotonic()
+        return await asyncio.get_running_loop().run_in_executor(None, self.poll)
+
+    def poll(self) -> bool:
+        """
+        Asks the API for the latest tick. Returns True if a new tick has been found.
+        """
+        self._last_poll = time.monotonic()
+        latest_tick = self.client.latest_tick()
+        if latest_tick is None or latest_tick == self.current_tick:
+            return False
+
+        is_first_poll = self.current_tick is None
+        self.current_tick = latest_tick
+        if not is_first_poll:
+            self.on_new_tick()
+        return True
+
+    def on_new_tick(self):
+        self.client.cache.clear()
+        self.expire_tracked()
+
+    def expire_tracked(self):
+        """
+        Expires all tracked fields. They stay tracked, so refresh_tracked still reloads them in one go.
+        """
+        now = time.monotonic()
+        for obj, fields in self.tracked_objects():
+            for field in fields:
+                obj._expiration_registry[field] = now
+            background_refresher = obj.background_refresher
+            if background_refresher is not None:
+                for field in fields:
+                    background_refresher.schedule(obj, field, now)
+
+    def tracked_objects(self) -> List[Tuple[object, List[str]]]:
+        """
+        Returns objects of watched classes together with their fields, which have already been loaded.
+        """
+        tracked = []
+        for cls in self.classes:
+            for obj in list(cls.registry.values()):
+                if not isinstance(obj, cls):
+                    continue
+                fields = obj.loaded_fields()
+                if fields:
+                    tracked.append((obj, fields))
+        return tracked
+
+    def refresh_tracked(self) -> int:
+        """
+        Reloads all tracked fields, with every distinct request sent only once. Returns the number of distinct
+        requests.
+        """
+        return load_fields(self.tracked_objects(), force=True)
+
+    @staticmethod
+    def _expire_all(cls):
+        for obj in list(cls.registry.values()):
+            if isinstance(obj, cls):
+                obj.expire()
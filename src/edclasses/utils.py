@@ -1,22 +1,278 @@
-import datetime
-from collections import defaultdict
-from typing import List
+import contextlib
+import functools
+import math
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
+from typing import Iterable, List, Tuple
+
+from . import metrics
+from .commons.caching_utils import make_cache_key
+from .indexes import (
+    IndexedField,
+    index_object,
+    peek_value,
+    run_query,
+    unindex_object,
+)
 
 
 def return_first_match(func, items):
     return next(item for item in items if func(item))
 
 
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NO_LOCK = _NoLock()
+_thread_safety_enabled = False
+_registry_locks = {}
+
+
+def enable_thread_safety(enabled: bool = True):
+    """
+    Turns on locking of the registries and relations, so the classes can be used from many threads at once.
+
+    It's off by default, because most scripts are single threaded and don't need to pay for the locks. Reads are never
+    locked - only creating objects and changing relations is.
+    """
+    global _thread_safety_enabled
+    _thread_safety_enabled = enabled
+
+
+def thread_safety_enabled() -> bool:
+    return _thread_safety_enabled
+
+
+def _get_registry_lock(registry: dict):
+    if not _thread_safety_enabled:
+        return _NO_LOCK
+    # registries are shared between the models and their subclasses, so the lock is kept per registry, not per class
+    return _registry_locks.setdefault(id(registry), threading.RLock())
+
+
+def _locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not _thread_safety_enabled:
+            return method(self, *args, **kwargs)
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def load_fields(
+    objects_fields: Iterable[Tuple["AutoRefreshMixin", Iterable[str]]],
+    force: bool = False,
+) -> int:
+    """
+    Loads refreshed fields of many objects with as few requests as possible.
+
+    First, the requests needed by all the fields are collected from the adapters, and every distinct request is sent
+    once (with all its pages). Then the fields are refreshed from those responses, which are pinned in the clients for the time being, so
+    the batch doesn't depend on the size of the cache. Only expired fields are loaded, unless force is True. Returns
+    the number of distinct requests.
+    """
+    to_load = []
+    planned_requests = {}
+    for obj, fields in objects_fields:
+        fields = [
+            field
+            for field in fields
+            if field in obj.refreshed_fields and (force or obj._is_expired(field))
+        ]
+        if not fields:
+            continue
+
+        to_load.append((obj, fields))
+        client = obj.adapter.client
+        for field in fields:
+            for path, params in obj.adapter.requests_for(obj, field):
+                planned_requests.setdefault(
+                    (id(client), make_cache_key(path, params)), (client, path, params)
+                )
+
+    responses = defaultdict(dict)
+    for (client_id, cache_key), (client, path, params) in planned_requests.items():
+        responses[client].update(client.get_pages(path, **params))
+
+    with contextlib.ExitStack() as stack:
+        for client, client_responses in responses.items():
+            stack.enter_context(client.pinned(client_responses))
+        for obj, fields in to_load:
+            obj.expire(*fields)
+            for field in fields:
+                getattr(obj, field)
+
+    return len(planned_requests)
+
+
+def _flatten_related(values) -> List:
+    related_objects = []
+    for value in values:
+        if isinstance(value, (list, ChildrenView)):
+            related_objects.extend(value)
+        elif value is not None:
+            related_objects.append(value)
+    return related_objects
+
+
+def _weak_key(key: tuple) -> tuple:
+    # objects in the key (e.g. the system of a station) mustn't be kept alive by it
+    return tuple(
+        weakref.ref(part) if isinstance(part, UniqueInstanceMixin) else part
+        for part in key
+    )
+
+
+class InstanceRegistry(OrderedDict):
+    """
+    Registry of unique instances, optionally limited to max_size objects.
+
+    When the limit is exceeded, the least recently used objects are evicted - "used" meaning created or looked up with
+    create or get_from_registry. Eviction drops the references the registry and the parents of the object hold (an
+    evicted station isn't among the stations of its system), so a kept parent doesn't keep its evicted children alive.
+    Objects still in use elsewhere keep their fields and their own links, and looking one up puts it back - among the
+    children of its parents too - so a key never gets a second instance.
+    """
+
+    def __init__(self, max_size: int = None):
+        super().__init__()
+        self.max_size = max_size
+        # field name -> FieldIndex of the registered objects
+        self.indexes = {}
+        # evicted objects which are still alive, by key with weak references to the objects in it
+        self._evicted = weakref.WeakValueDictionary()
+
+    def update_index(self, obj, field: str, value):
+        index = self.indexes.get(field)
+        if index is not None:
+            with _get_registry_lock(self):
+                index.update(obj, value)
+
+    def touch(self, key):
+        if self.max_size is None:
+            return
+        try:
+            self.move_to_end(key)
+        except KeyError:
+            pass
+
+    def pop_overflow(self):
+        while self.max_size is not None and len(self) > self.max_size:
+            key, obj = self.popitem(last=False)
+            unindex_object(self.indexes, obj)
+            for relation in OneToManyRelation.registry.values():
+                relation.release_child(obj)
+            self._evicted[_weak_key(key)] = obj
+
+    def revive(self, key):
+        """
+        Registers again the object evicted under the key, if it's still alive, and returns it. Returns the registered
+        object if there's one already.
+        """
+        obj = self.get(key)
+        if obj is not None or not self._evicted:
+            return obj
+        obj = self._evicted.pop(_weak_key(key), None)
+        if obj is not None:
+            self[key] = obj
+            index_object(self.indexes, obj, obj.indexed_fields)
+            for relation in OneToManyRelation.registry.values():
+                relation.restore_child(obj)
+            self.pop_overflow()
+        return obj
+
+    def forget_evicted(self, key, obj):
+        key = _weak_key(key)
+        if self._evicted.get(key) is obj:
+            del self._evicted[key]
+
+
 class UniqueInstanceMixin:
+    __slots__ = ("_registry_key", "_relation_links", "__weakref__")
     registry = {}
     keys = tuple()
+    # fields with secondary indexes, used by query
+    indexed_fields = tuple()
+    # fields without an index of their own, which other stores can be kept in sync with (see attach_index)
+    watched_fields = tuple()
+    # fields holding the parent of a relation, looked up in the relation by query
+    indexed_relations = tuple()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in (*cls.indexed_fields, *cls.watched_fields):
+            inherited = getattr(cls, name, None)
+            if isinstance(inherited, IndexedField):
+                continue
+            inner = inherited if hasattr(inherited, "__set__") else None
+            setattr(cls, name, IndexedField(name, inner))
+
+    @classmethod
+    def query(cls, **lookups) -> List:
+        """
+        Returns registered objects matching all the lookups. A lookup is a field name, optionally followed by "__" and
+        one of: exact (default), in, contains, gt, gte, lt, lte:
+
+        >>> OrbitalStation.query(services__contains=StationService.MATERIALTRADER, max_landing_pad__gte=LARGE)
+
+        Lookups on indexed fields and relations are answered by the indexes, the rest is checked on each candidate.
+        Only the values already loaded are taken into account - nothing is loaded from the adapter.
+        """
+        return run_query(cls, **lookups)
+
+    @classmethod
+    def attach_index(cls, field: str, index):
+        """
+        Keeps an index (anything with add, remove, update and get methods, like FieldIndex) in sync with given
+        indexed or watched field of the registered objects.
+        """
+        if field not in cls.indexed_fields and field not in cls.watched_fields:
+            raise ValueError(f"{cls.__name__}.{field} is neither indexed nor watched.")
+        with _get_registry_lock(cls.registry):
+            cls.registry.indexes[field] = index
+            for obj in list(cls.registry.values()):
+                index.add(obj, peek_value(obj, field))
+
+    @classmethod
+    def detach_index(cls, field: str):
+        with _get_registry_lock(cls.registry):
+            cls.registry.indexes.pop(field, None)
+
+    @classmethod
+    def set_max_instances(cls, max_instances: int = None):
+        """
+        Limits the number of instances kept in the registry (None means no limit). Least recently used objects above
+        the limit are evicted from the registry - they are freed once nothing refers to them anymore.
+        """
+        with _get_registry_lock(cls.registry):
+            cls.registry.max_size = max_instances
+            cls.registry.pop_overflow()
 
     @classmethod
     def create(cls, **kwargs):
-        try:
-            return cls(**kwargs)
-        except InstanceAlreadyExists:
-            return cls.get_from_registry(**kwargs)
+        # looking the object up first also makes sure __init__ of a duplicate doesn't touch the relations
+        obj = cls.get_from_registry(**kwargs)
+        if obj is not None:
+            return obj
+
+        with _get_registry_lock(cls.registry):
+            obj = cls.get_from_registry(**kwargs)
+            if obj is not None:
+                return obj
+            try:
+                return cls(**kwargs)
+            except InstanceAlreadyExists:
+                return cls.get_from_registry(**kwargs)
 
     @classmethod
     def _get_key(cls, *args, **kwargs):
@@ -29,25 +285,191 @@ class UniqueInstanceMixin:
     @classmethod
     def get_from_registry(cls, **kwargs):
         obj_key = cls._get_key(**kwargs)
-        return cls.registry.get(obj_key)
+        registry = cls.registry
+        obj = registry.get(obj_key)
+        if isinstance(registry, InstanceRegistry):
+            if obj is not None:
+                registry.touch(obj_key)
+            elif registry._evicted:
+                with _get_registry_lock(registry):
+                    obj = registry.revive(obj_key)
+        return obj
 
     def __init__(self, *args, **kwargs):
         obj_key = self._get_key(self)
-        obj = self.__class__.registry.get(obj_key)
-        if obj is not None:
-            raise InstanceAlreadyExists
-        self.__class__.registry[obj_key] = self
+        registry = self.__class__.registry
+        with _get_registry_lock(registry):
+            if isinstance(registry, InstanceRegistry):
+                obj = registry.revive(obj_key)
+            else:
+                obj = registry.get(obj_key)
+            if obj is not None:
+                raise InstanceAlreadyExists
+            registry[obj_key] = self
+            self._registry_key = obj_key
+            if isinstance(registry, InstanceRegistry):
+                index_object(registry.indexes, self, self.indexed_fields)
+                registry.pop_overflow()
         super().__init__()
 
     def remove_from_registry(self):
-        obj_key = self._get_key(**self.__dict__)
-        self.registry.pop(obj_key)
+        obj_key = self._registry_key
+        with _get_registry_lock(self.registry):
+            if self.registry.get(obj_key) is self:
+                self.registry.pop(obj_key)
+            if isinstance(self.registry, InstanceRegistry):
+                unindex_object(self.registry.indexes, self)
+                self.registry.forget_evicted(obj_key, self)
 
     def delete(self):
+        """
+        Removes the object from the registry and from all relations. Objects identified by this one (like stations
+        by their system) are deleted as well, as they couldn't be found in the registry anymore.
+        """
+        relations = [
+            *OneToOneRelation.registry.values(),
+            *OneToManyRelation.registry.values(),
+        ]
+        dependants = [
+            child
+            for relation in relations
+            for child in relation.get_children(self)
+            if self in child._registry_key
+        ]
+
         self.remove_from_registry()
+        for relation in relations:
+            relation.forget(self)
+        for dependant in dependants:
+            dependant.delete()
+
+
+class _Children(dict):
+    """
+    Children of one parent - an insertion-ordered dict used as an ordered set. It keeps a tuple of the children for
+    iterating and indexing, made again only after a change.
+    """
+
+    __slots__ = ("_version", "_snapshot", "_snapshot_version")
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._version = 0
+        self._snapshot_version = -1
+        self._snapshot = ()
+
+    def snapshot(self) -> tuple:
+        # the version is read first, so a snapshot taken during a change is made again on the next call
+        version = self._version
+        if self._snapshot_version != version:
+            self._snapshot = tuple(self)
+            self._snapshot_version = version
+        return self._snapshot
+
+    def __setitem__(self, key, value):
+        self._version += 1
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._version += 1
+        super().__delitem__(key)
+
+    def pop(self, *args):
+        self._version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self._version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._version += 1
+        return super().setdefault(key, default)
+
+    def clear(self):
+        self._version += 1
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        self._version += 1
+        super().update(*args, **kwargs)
+
+
+class ChildrenView(Sequence):
+    """
+    Read-only, live view of the children of one parent in a OneToManyRelation.
+
+    It compares equal to a list (or tuple) with the same objects in the same order. To change the children, set the
+    attribute - e.g. system.stations = [...] - or copy the view with list() first.
+    """
+
+    __slots__ = ("_children",)
+
+    def __init__(self, children: _Children):
+        self._children = children
+
+    def __len__(self):
+        return len(self._children)
+
+    def __iter__(self):
+        # iterating over a snapshot lets the loop body change the relation
+        return iter(self._children.snapshot())
+
+    def __reversed__(self):
+        return reversed(self._children.snapshot())
+
+    def __contains__(self, obj):
+        return obj in self._children
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._children.snapshot()[index])
+        return self._children.snapshot()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (ChildrenView, list, tuple)):
+            return len(self) == len(other) and all(
+                a is b or a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+_NO_CHILDREN = ChildrenView(_Children())
+
+
+def _get_link(obj, key):
+    try:
+        return obj._relation_links.get(key)
+    except AttributeError:
+        return None
+
+
+def _links_of(obj) -> dict:
+    try:
+        return obj._relation_links
+    except AttributeError:
+        links = obj._relation_links = {}
+        return links
+
+
+def _pop_link(obj, key):
+    try:
+        return obj._relation_links.pop(key, None)
+    except AttributeError:
+        return None
 
 
 class OneToOneRelation(UniqueInstanceMixin):
+    """
+    The links are kept by the linked objects themselves (in their _relation_links), so the relation doesn't keep any
+    object alive - an object evicted from its registry is freed together with its links once nothing refers to it.
+    """
+
     registry = {}
     keys = (
         "parent_class_name",
@@ -57,10 +479,13 @@ class OneToOneRelation(UniqueInstanceMixin):
     def __init__(self, parent_class_name: str, child_class_name: str):
         self.parent_class_name = parent_class_name
         self.child_class_name = child_class_name
-        self.parent_side = {}
-        self.child_side = {}
+        # keys of the links in _relation_links of the parents and the children
+        self._parent_side_key = f"{parent_class_name}->{child_class_name}"
+        self._child_side_key = f"{child_class_name}<-{parent_class_name}"
+        self._lock = threading.RLock()
         super().__init__()
 
+    @_locked
     def set_for_parent(self, parent_obj, child_obj):
         old_child = self.get_for_parent(parent_obj)
 
@@ -71,8 +496,9 @@ class OneToOneRelation(UniqueInstanceMixin):
             self._add_link(parent_obj, child_obj)
 
     def get_for_parent(self, parent_obj):
-        return self.parent_side.get(parent_obj, None)
+        return _get_link(parent_obj, self._parent_side_key)
 
+    @_locked
     def set_for_child(self, child_obj, parent_obj):
         old_parent = self.get_for_child(child_obj)
 
@@ -83,49 +509,127 @@ class OneToOneRelation(UniqueInstanceMixin):
             self._add_link(parent_obj, child_obj)
 
     def get_for_child(self, child_obj):
-        return self.child_side.get(child_obj, None)
+        return _get_link(child_obj, self._child_side_key)
+
+    def get_children(self, parent_obj) -> List:
+        child = self.get_for_parent(parent_obj)
+        return [child] if child is not None else []
+
+    @_locked
+    def forget(self, obj):
+        """
+        Removes all links of the object, whichever side of the relation it's on.
+        """
+        child = _pop_link(obj, self._parent_side_key)
+        if child is not None:
+            _pop_link(child, self._child_side_key)
+        parent = _pop_link(obj, self._child_side_key)
+        if parent is not None:
+            _pop_link(parent, self._parent_side_key)
 
     def _delete_link(self, parent_obj, child_obj):
-        self.parent_side.pop(parent_obj)
-        self.child_side.pop(child_obj)
+        _pop_link(parent_obj, self._parent_side_key)
+        _pop_link(child_obj, self._child_side_key)
 
     def _add_link(self, parent_obj, child_obj):
-        self.parent_side[parent_obj] = child_obj
-        self.child_side[child_obj] = parent_obj
+        _links_of(parent_obj)[self._parent_side_key] = child_obj
+        _links_of(child_obj)[self._child_side_key] = parent_obj
 
 
 class OneToManyRelation(OneToOneRelation):
-    registry = {}
+    """
+    Children of every parent are kept in an insertion-ordered dict (used as an ordered set), so adding and removing
+    a link is O(1). Parents get a read-only ChildrenView of them, indexed in O(1) through a snapshot of the children
+    made again after they change.
+    """
 
-    def __init__(self, parent_class_name: str, child_class_name: str):
-        super().__init__(parent_class_name, child_class_name)
-        self.parent_side = defaultdict(list)
+    registry = {}
 
     def _add_link(self, parent_obj, child_obj):
-        self.parent_side[parent_obj].append(child_obj)
-        self.child_side[child_obj] = parent_obj
+        _links_of(parent_obj).setdefault(self._parent_side_key, _Children())[
+            child_obj
+        ] = None
+        _links_of(child_obj)[self._child_side_key] = parent_obj
 
     def _delete_link(self, parent_obj, child_obj):
-        self.parent_side[parent_obj].remove(child_obj)
-        self.child_side.pop(child_obj)
-
-    def get_for_parent(self, parent_obj):
-        return self.parent_side.get(parent_obj, list())
-
-    def set_for_parent(self, parent_obj, children: List):
-        old_children = self.get_for_parent(parent_obj)
-        for child in old_children:
-            self.child_side.pop(child)
+        del _get_link(parent_obj, self._parent_side_key)[child_obj]
+        _pop_link(child_obj, self._child_side_key)
+
+    def get_for_parent(self, parent_obj) -> ChildrenView:
+        children = _get_link(parent_obj, self._parent_side_key)
+        return ChildrenView(children) if children is not None else _NO_CHILDREN
+
+    def get_children(self, parent_obj) -> List:
+        return list(_get_link(parent_obj, self._parent_side_key) or ())
+
+    @_locked
+    def forget(self, obj):
+        for child in _pop_link(obj, self._parent_side_key) or ():
+            _pop_link(child, self._child_side_key)
+        parent = _pop_link(obj, self._child_side_key)
+        if parent is not None:
+            _get_link(parent, self._parent_side_key).pop(obj, None)
+
+    @_locked
+    def set_for_parent(self, parent_obj, children: Iterable):
+        """
+        Replaces the children of the parent. Only the links which actually change are touched.
+        """
+        new_children = dict.fromkeys(children)
+        # updated in place, so the views handed out before stay live
+        current_children = _links_of(parent_obj).setdefault(
+            self._parent_side_key, _Children()
+        )
+        for child in current_children:
+            if child not in new_children:
+                _pop_link(child, self._child_side_key)
 
-        for child in children:
+        for child in new_children:
             old_parent = self.get_for_child(child)
+            if old_parent is parent_obj:
+                continue
             if old_parent is not None:
-                self._delete_link(old_parent, child)
-            self.child_side[child] = parent_obj
-
-        self.parent_side[parent_obj] = children
-
+                _get_link(old_parent, self._parent_side_key).pop(child, None)
+            _links_of(child)[self._child_side_key] = parent_obj
+
+        current_children.clear()
+        current_children.update(new_children)
+
+    @_locked
+    def release_child(self, child_obj):
+        """
+        Takes the child out of the children of its parent, keeping its own link to the parent - used for children
+        evicted from their registry.
+        """
+        parent = _get_link(child_obj, self._child_side_key)
+        if parent is not None:
+            _get_link(parent, self._parent_side_key).pop(child_obj, None)
+
+    @_locked
+    def restore_child(self, child_obj):
+        """
+        Puts a released child back among the children of its parent.
+        """
+        parent = _get_link(child_obj, self._child_side_key)
+        if parent is not None:
+            _links_of(parent).setdefault(self._parent_side_key, _Children())[
+                child_obj
+            ] = None
+
+    @_locked
+    def link_many(self, links: Iterable[Tuple[object, object]]):
+        """
+        Sets the parent of many children at once - links are (parent, child) pairs. Same as calling set_for_child for
+        each of them, but the lock is taken only once.
+        """
+        for parent_obj, child_obj in links:
+            self._set_for_child(child_obj, parent_obj)
+
+    @_locked
     def set_for_child(self, child_obj, parent_obj):
+        self._set_for_child(child_obj, parent_obj)
+
+    def _set_for_child(self, child_obj, parent_obj):
         old_parent = self.get_for_child(child_obj)
 
         if parent_obj is old_parent:
@@ -142,50 +646,197 @@ class InstanceAlreadyExists(Exception):
     pass
 
 
+class RefreshedField:
+    """
+    Data descriptor of a field loaded by the adapter. Reading it refreshes the value first, if it has expired.
+
+    The value itself is kept by whatever the descriptor replaced on the class - a relation property, a slot, or the
+    instance __dict__ - so other attributes are accessed as usual, without any overhead.
+    """
+
+    def __init__(self, name: str, inner=None):
+        self.name = name
+        self.inner = inner
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if obj._is_expired(self.name):
+            # TO CHECK: the adapter reading the same field leads to a loop
+            obj._set_refreshed_value(self.name, obj._load_refreshed_value(self.name))
+
+        # same as get_value, inlined as this is the hot path
+        if self.inner is not None:
+            return self.inner.__get__(obj, owner)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        if self.inner is not None:
+            self.inner.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+    def get_value(self, obj):
+        """
+        Returns the stored value without refreshing it.
+        """
+        if self.inner is not None:
+            return self.inner.__get__(obj, type(obj))
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+
 class AutoRefreshMixin:
+    # subclasses using __slots__ have to add "_expiration_registry"
+    __slots__ = ()
     refreshed_fields = tuple()
     adapter = None
+    tick_watcher = None
+    background_refresher = None
     EXPIRATION_TIME_MINUTES = 15
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.refreshed_fields:
+            inherited = getattr(cls, name, None)
+            if isinstance(inherited, RefreshedField):
+                continue
+            inner = inherited if hasattr(inherited, "__set__") else None
+            setattr(cls, name, RefreshedField(name, inner))
+
     def __init__(self, **kwargs):
+        # field -> monotonic time of expiration, for loaded fields only
+        self._expiration_registry = {}
         super().__init__(**kwargs)
         self._set_adapter(**kwargs)
 
     def _set_adapter(self, **kwargs):
-        self.adapter = kwargs.get("adapter", self.adapter)
-
-    def _get_new_expiration_registry(self):
-        get_atr = super().__getattribute__
-        expiration_registry = {item: None for item in get_atr("refreshed_fields")}
-        self._expiration_registry = expiration_registry
-        return expiration_registry
-
-    def __getattribute__(self, item):
-        get_atr = super().__getattribute__
-        try:
-            expiration_registry = get_atr("_expiration_registry")
-        except AttributeError:
-            expiration_registry = get_atr("_get_new_expiration_registry")()
-
-        try:
-            expiration_date = expiration_registry[item]
-        except KeyError:
-            return get_atr(item)
-
-        is_expired = (
-            expiration_date is None or expiration_date <= datetime.datetime.utcnow()
-        )
+        if "adapter" in kwargs:
+            self.adapter = kwargs["adapter"]
 
-        if is_expired:
-            adapter = get_atr("adapter")
-            refresh_func = getattr(adapter, item)
-            value = refresh_func(
-                self
-            )  # TO CHECK: this will call getattribute again, can lead to loops
+    def _get_new_expiration_date(self) -> float:
+        if self.tick_watcher is not None:
+            # the data only changes on the tick, the watcher expires it when a new one is seen
+            return TICK_EXPIRATION
+        return time.monotonic() + self.EXPIRATION_TIME_MINUTES * 60
 
-            expiration_registry[item] = datetime.datetime.utcnow() + datetime.timedelta(
-                minutes=get_atr("EXPIRATION_TIME_MINUTES")
-            )
-            setattr(self, item, value)
+    @classmethod
+    def prefetch(cls, objects, fields=None, related=()) -> List:
+        """
+        Loads fields of many objects at once, so accessing them later doesn't send any requests.
+
+        objects can be instances, or names for classes identified by the name. fields default to all refreshed fields.
+        related follows relations, with "__" separating the steps - e.g. "faction_branches__stations" loads the
+        branches of every faction and then stations of every branch. Each step is loaded for the whole batch at once.
+
+        >>> factions = Faction.prefetch(["Mother Gaia"], related=["faction_branches__stations"])
+        """
+        objects = [
+            cls.create(name=obj) if isinstance(obj, str) else obj for obj in objects
+        ]
+        fields = cls.refreshed_fields if fields is None else fields
+        load_fields((obj, fields) for obj in objects)
+
+        for lookup in related:
+            current_objects = objects
+            for field in lookup.split("__"):
+                load_fields(
+                    (obj, [field])
+                    for obj in current_objects
+                    if isinstance(obj, AutoRefreshMixin)
+                )
+                current_objects = _flatten_related(
+                    getattr(obj, field) for obj in current_objects
+                )
+
+        return objects
 
-        return get_atr(item)
+    @classmethod
+    def iter_all(cls, **filters):
+        """
+        Yields all objects matching the filters (e.g. Faction.iter_all(system="Sol")), page by page, with the fields
+        found in the API response already loaded.
+        """
+        return cls.adapter.iter_all(**filters)
+
+    def loaded_fields(self):
+        """
+        Returns refreshed fields which have already been loaded from the adapter.
+        """
+        return list(self._expiration_registry)
+
+    def expire(self, *fields):
+        """
+        Marks given refreshed fields (or all of them, if none are given) as expired, so they are reloaded on next
+        access.
+        """
+        expiration_registry = self._expiration_registry
+        if not fields:
+            expiration_registry.clear()
+        for item in fields:
+            expiration_registry.pop(item, None)
+
+    def _is_expired(self, item) -> bool:
+        tick_watcher = self.tick_watcher
+        if tick_watcher is not None:
+            tick_watcher.check()
+
+        expiration_date = self._expiration_registry.get(item)
+        background_refresher = self.background_refresher
+        if background_refresher is not None:
+            # stale values may be returned while the refresher loads new ones
+            return background_refresher.is_expired(self, item, expiration_date)
+        return expiration_date is None or expiration_date <= time.monotonic()
+
+    def _load_refreshed_value(self, item):
+        metrics_registry = metrics.registry
+        if metrics_registry is None:
+            return getattr(self.adapter, item)(self)
+        with metrics_registry.field_load(type(self).__name__, item):
+            return getattr(self.adapter, item)(self)
+
+    def _set_refreshed_value(self, item, value):
+        # the value is set before the expiration date, so other threads never see a fresh field without its value
+        setattr(self, item, value)
+        expiration_date = self._get_new_expiration_date()
+        self._expiration_registry[item] = expiration_date
+        background_refresher = self.background_refresher
+        if background_refresher is not None and expiration_date != TICK_EXPIRATION:
+            background_refresher.schedule(self, item, expiration_date)
+
+    def hydrate(self, **fields):
+        """
+        Sets values of refreshed fields loaded elsewhere (e.g. from a response fetched for another object) and marks
+        them as fresh, so they are not loaded again until they expire.
+        """
+        for item, value in fields.items():
+            self._set_refreshed_value(item, value)
+
+    async def aget(self, item):
+        """
+        Awaitable version of getattr. If the field has expired, the adapter loads it without blocking the event loop,
+        so many objects can be loaded concurrently:
+
+        >>> await asyncio.gather(*(system.aget("stations") for system in systems))
+        """
+        tick_watcher = self.tick_watcher
+        if tick_watcher is not None:
+            # polled here, so _is_expired doesn't ask the API for the tick on the event loop
+            await tick_watcher.acheck()
+        if item in self.refreshed_fields and self._is_expired(item):
+            metrics_registry = metrics.registry
+            if metrics_registry is None:
+                value = await self.adapter.aload(self, item)
+            else:
+                with metrics_registry.field_load(type(self).__name__, item):
+                    value = await self.adapter.aload(self, item)
+            self._set_refreshed_value(item, value)
+        return getattr(self, item)
+
+
+TICK_EXPIRATION = math.inf